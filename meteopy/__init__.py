@@ -1,31 +1,58 @@
 from __future__ import annotations
 
-from .consts import *
-from .data_fetchers import *
-from .eda import *
-from .forecasting import *
-from .preprocessing import *
-from .statistics import *
-from .utils import *
-from .workflow import *
+from .utils.lazy_imports import attach
 
-__all__ = []
-__all__ += consts.__all__
-__all__ += utils.__all__
-__all__ += data_fetchers.__all__
-__all__ += forecasting.__all__
-__all__ += eda.__all__
-__all__ += statistics.__all__
-__all__ += workflow.__all__
-__all__ += preprocessing.__all__
-__all__ += forecasting.__all__
-__all__ += workflow.__all__
-__all__ += ["cli"]
+# Podpakiety (i zależności takie jak pandas czy matplotlib) ładowane są dopiero przy pierwszym użyciu nazwy.
+__getattr__, __dir__, __all__ = attach(
+    __name__,
+    {
+        "Dirs": ".consts",
+        "DownloadManifest": ".data_fetchers",
+        "IMGWDataFetcher": ".data_fetchers",
+        "KODataFetcher": ".data_fetchers",
+        "SynopDataFetcher": ".data_fetchers",
+        "ChartJob": ".eda",
+        "IMGWDataVisualizer": ".eda",
+        "RenderFarm": ".eda",
+        "downsample": ".eda",
+        "lttb": ".eda",
+        "minmax": ".eda",
+        "IMGWSimpleForecaster": ".forecasting",
+        "ModelCache": ".forecasting",
+        "fit_linear_batch": ".forecasting",
+        "rolling_origin_errors": ".forecasting",
+        "to_ordinal": ".forecasting",
+        "IMGWDataHandler": ".preprocessing",
+        "ProcessingState": ".preprocessing",
+        "RollupStore": ".preprocessing",
+        "StationPartitionWriter": ".preprocessing",
+        "StationStore": ".preprocessing",
+        "IMGWStats": ".statistics",
+        "KLLSketch": ".statistics",
+        "RunningMoments": ".statistics",
+        "StreamingSummary": ".statistics",
+        "CorrelationAccumulator": ".statistics",
+        "blocked_correlation": ".statistics",
+        "correlation_table": ".statistics",
+        "grouped_statistics": ".statistics",
+        "top_k_neighbours": ".statistics",
+        "ProgressLog": ".utils",
+        "configure_logging": ".utils",
+        "get_logger": ".utils",
+        "StationCatalog": ".utils",
+        "cli": ".workflow",
+        "download": ".workflow",
+        "fetch_data": ".workflow",
+        "full_analysis": ".workflow",
+        "preprocess_data": ".workflow",
+        "stream_data": ".workflow",
+        "basic_summary": ".workflow",
+        "drop_data": ".workflow",
+        "build_store": ".workflow",
+    },
+)
 
 
 if __name__ == "__main__":
     from .workflow.entrypoint import cli
     cli()
-
-
-#jakaś zmiana
\ No newline at end of file
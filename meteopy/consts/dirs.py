@@ -1,5 +1,6 @@
 from __future__ import annotations
 
+import os
 from pathlib import Path
 
 
@@ -7,11 +8,35 @@ class Dirs:
     ROOT_DIR = Path(__file__).resolve().parent.parent
     DATA_DIR = ROOT_DIR / "data" / "downloaded"
     LOG_DIR = ROOT_DIR / "logs"
+    LOG_FILE = LOG_DIR / "app.log"
     SEPARATED_DIR = ROOT_DIR / "data" / "separated"
+    STAGING_DIR = ROOT_DIR / "data" / "staging"
+    RAW_DIR = ROOT_DIR / "data" / "raw"
+    STATE_DIR = ROOT_DIR / "data" / "state"
     FORECAST_DIR = ROOT_DIR / "data" / "forecast"
     PLOTS_DIR = ROOT_DIR / "data" / "plots"
     STATISTICS_DIR = ROOT_DIR / "data" / "statistics"
+    STORE_DIR = ROOT_DIR / "data" / "store"
+    ROLLUP_DIR = ROOT_DIR / "data" / "rollups"
+    CATALOG_PATH = ROOT_DIR / "data" / "catalog.sqlite"
+    MODEL_CACHE_PATH = ROOT_DIR / "data" / "cache" / "models.sqlite"
     MAXSTATION = 50
+    MAX_DOWNLOAD_WORKERS = 8
+    MANIFEST_NAME = "manifest.json"
+    RENDER_MANIFEST_NAME = "render_manifest.json"
+    SPOOL_MAX_SIZE = 64 * 1024 * 1024
+    PARTITION_BUFFER_BYTES = 64 * 1024 * 1024
+    PARTITION_MAX_OPEN_FILES = 128
+    PREPROCESS_WORKERS = os.cpu_count() or 1
+    RENDER_WORKERS = os.cpu_count() or 1
+    HISTOGRAM_RESOLUTION = 0.1
+    HISTOGRAM_MAX_BINS = 100
+    BOXPLOT_MAX_FLIERS = 200
+    MODEL_CACHE_MAX_ENTRIES = 100_000
+    LOG_PROGRESS_INTERVAL = 5.0
+    INTERPOLATION_MAX_GAP = 7
+    IMPUTATION_WINDOW = 50
+    READ_CHUNK_ROWS = 100_000
 
     IMGW_URL = "https://danepubliczne.imgw.pl/data/dane_pomiarowo_obserwacyjne/dane_meteorologiczne/dobowe/"
     ENCODING = "ISO-8859-2"
@@ -40,6 +65,36 @@ class Dirs:
         ],
     }
 
+    # Schemat surowych plików stacji (po podziale): pozycje kolumn z wartościami parametrów (w kolejności
+    # PARAMETER_MAP) i odpowiadające im kolumny statusu pomiaru (status 8 = brak pomiaru), liczba kolumn
+    # surowego pliku oraz sposób uzupełniania braków: "fill" wg wybranego trybu, "zero_fill" zerami.
+    ID_COLUMNS = ["Kod_stacji", "Nazwa_stacji", "Year", "Month", "Day"]
+    SCHEMA = {
+        "klimat": {
+            "raw_columns": 18,
+            "value_columns": [5, 7, 9, 11, 13, 16],
+            "flag_columns": [6, 8, 10, 12, 14, 17],
+            "fill": PARAMETER_MAP["klimat"][1:4],
+            "zero_fill": PARAMETER_MAP["klimat"][4:6],
+        },
+        "opad": {
+            "raw_columns": 16,
+            "value_columns": [5, 8, 10],
+            "flag_columns": [6, 9, 11],
+            "fill": PARAMETER_MAP["opad"][0:1],
+            "zero_fill": PARAMETER_MAP["opad"][1:3],
+        },
+        "synop": {
+            "raw_columns": 23,
+            "value_columns": [5, 7, 9, 11, 13, 15, 17, 19, 21],
+            "flag_columns": [6, 8, 10, 12, 14, 16, 18, 20, 22],
+            "fill": PARAMETER_MAP["synop"][0:7],
+            "zero_fill": PARAMETER_MAP["synop"][7:9],
+        },
+    }
+    DTYPES = {"Kod_stacji": "int32", "Nazwa_stacji": "category", "Year": "int16", "Month": "int8", "Day": "int8"}
+    VALUE_DTYPE = "float32"
+
     @staticmethod
     def get_available_stations_paths(data_type: str) -> list[str]:
         """Zwraca listę ścierzek dostępnych stacji dla danego typu danych.
@@ -51,19 +106,38 @@ class Dirs:
             list[str]: Lista ścierzek do dostępnych stacji.
 
         """
+        from meteopy.utils.station_catalog import StationCatalog
+
+        catalog = StationCatalog()
+        if catalog.is_populated(data_type):
+            return catalog.paths(data_type)
         datadir = Dirs.SEPARATED_DIR / data_type
         return [d for d in datadir.iterdir()]
     
     @staticmethod
-    def get_stations_id( data_type: str) -> list[str]:
+    def get_stations_id(
+        data_type: str, start_date: str | None = None, end_date: str | None = None, parameters: list[str] | None = None
+    ) -> list[str]:
         """Zwraca listę dostępnych stacji dla danego typu danych.
 
+        Stacje pobierane są z katalogu stacji (StationCatalog), co pozwala od razu pominąć stacje bez danych
+        w zakresie dat lub bez wartości parametrów. Jeśli katalog jest pusty, przeszukiwany jest katalog
+        Dirs.SEPARATED_DIR (wtedy filtry nie są stosowane).
+
         Args:
             data_type (str): Typ danych.
+            start_date (str, optional): Początek zakresu 'YYYY-MM-DD'.
+            end_date (str, optional): Koniec zakresu 'YYYY-MM-DD'.
+            parameters (list[str], optional): Parametry, z których choć jeden musi mieć dane.
 
         Returns:
             list[str]: Lista dostępnych stacji.
 
         """
+        from meteopy.utils.station_catalog import StationCatalog  # import lokalny - katalog importuje Dirs
+
+        catalog = StationCatalog()
+        if catalog.is_populated(data_type):
+            return catalog.stations(data_type, start_date, end_date, parameters)
         datadir = Dirs.SEPARATED_DIR / data_type
         return [d.name.replace(".csv", "") for d in datadir.glob("*.csv")]
@@ -1,5 +1,13 @@
 from __future__ import annotations
 
-from .imgw_fetcher import IMGWDataFetcher, KODataFetcher, SynopDataFetcher
+from meteopy.utils.lazy_imports import attach
 
-__all__ = ["IMGWDataFetcher", "KODataFetcher", "SynopDataFetcher"]
+__getattr__, __dir__, __all__ = attach(
+    __name__,
+    {
+        "DownloadManifest": ".download_manifest",
+        "IMGWDataFetcher": ".imgw_fetcher",
+        "KODataFetcher": ".imgw_fetcher",
+        "SynopDataFetcher": ".imgw_fetcher",
+    },
+)
@@ -0,0 +1,96 @@
+from __future__ import annotations
+
+import json
+import threading
+from datetime import datetime, timezone
+from pathlib import Path
+
+from meteopy.consts.dirs import Dirs
+from meteopy.utils.log_module import get_logger
+
+
+class DownloadManifest:
+    """Lokalny rejestr pobranych archiwów (URL, rozmiar, ETag/Last-Modified, sha256).
+
+    Pozwala wysyłać zapytania warunkowe (If-None-Match / If-Modified-Since) i pomijać archiwa,
+    które nie zmieniły się po stronie IMGW od ostatniego pobrania.
+    """
+
+    def __init__(self, path: Path | None = None):
+        self.path = path if path is not None else Dirs.DATA_DIR / Dirs.MANIFEST_NAME
+        self.logger = get_logger("DownloadManifest")
+        self._lock = threading.Lock()
+        self.entries = self._load()
+
+    def _load(self) -> dict[str, dict]:
+        if not self.path.exists():
+            return {}
+        try:
+            with open(self.path, encoding="utf-8") as file:
+                return json.load(file)
+        except (OSError, ValueError):
+            self.logger.warning(f"Nie udało się wczytać manifestu {self.path}, zostanie utworzony od nowa")
+            return {}
+
+    def get(self, url: str) -> dict | None:
+        with self._lock:
+            return self.entries.get(url)
+
+    def conditional_headers(self, url: str) -> dict[str, str]:
+        """Zwraca nagłówki zapytania warunkowego dla wcześniej pobranego archiwum."""
+        entry = self.get(url)
+        if entry is None:
+            return {}
+        headers = {}
+        if entry.get("etag"):
+            headers["If-None-Match"] = entry["etag"]
+        if entry.get("last_modified"):
+            headers["If-Modified-Since"] = entry["last_modified"]
+        return headers
+
+    def is_unchanged(self, url: str, headers) -> bool:
+        """Sprawdza na podstawie nagłówków odpowiedzi, czy archiwum jest takie samo jak zapisane w manifeście.
+
+        Serwery ignorujące zapytania warunkowe odpowiadają 200 - wtedy porównywane są ETag, Last-Modified
+        i rozmiar. Sam rozmiar wystarcza tylko wtedy, gdy serwer nie zwraca żadnego walidatora.
+        """
+        entry = self.get(url)
+        if entry is None:
+            return False
+        etag = headers.get("ETag")
+        last_modified = headers.get("Last-Modified")
+        length = headers.get("Content-Length")
+        size_matches = length is not None and int(length) == entry.get("size")
+
+        if etag and entry.get("etag"):
+            return etag == entry["etag"]
+        if last_modified and entry.get("last_modified"):
+            return last_modified == entry["last_modified"] and (length is None or size_matches)
+        return size_matches
+
+    def update(self, url: str, headers, size: int, sha256: str) -> None:
+        """Zapisuje (w pamięci) metadane pobranego archiwum."""
+        with self._lock:
+            self.entries[url] = {
+                "size": size,
+                "etag": headers.get("ETag"),
+                "last_modified": headers.get("Last-Modified"),
+                "sha256": sha256,
+                "fetched_at": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+            }
+
+    def save(self) -> None:
+        """Zapisuje manifest na dysk (atomowo, przez plik tymczasowy)."""
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = self.path.with_suffix(".tmp")
+        with self._lock:
+            with open(tmp_path, "w", encoding="utf-8") as file:
+                json.dump(self.entries, file, indent=1, sort_keys=True)
+            tmp_path.replace(self.path)
+        self.logger.debug(f"Zapisano manifest pobierania: {self.path}")
+
+    def clear(self) -> None:
+        """Usuwa wszystkie wpisy i plik manifestu (wymusza pełne pobranie przy następnym fetch)."""
+        with self._lock:
+            self.entries = {}
+        self.path.unlink(missing_ok=True)
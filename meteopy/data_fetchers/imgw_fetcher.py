@@ -1,63 +1,250 @@
 from __future__ import annotations
 
+import hashlib
 import re
+import shutil
+import tempfile
 import zipfile
 from abc import ABC, abstractmethod
+from collections.abc import Iterator
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, as_completed, wait
 from pathlib import Path
+from typing import IO
 
 import requests
+from requests.adapters import HTTPAdapter
 
 from meteopy.consts.dirs import Dirs
-from meteopy.utils.log_module import get_logger
+from meteopy.data_fetchers.download_manifest import DownloadManifest
+from meteopy.utils.log_module import ProgressLog, get_logger
 
 
 class IMGWDataFetcher(ABC):
-    def __init__(self):
+    def __init__(
+        self, max_workers: int = Dirs.MAX_DOWNLOAD_WORKERS, base_url: str = Dirs.IMGW_URL, incremental: bool = True
+    ):
+        """Inicjalizuje fetcher.
+
+        Args:
+            max_workers (int): Maksymalna liczba archiwów pobieranych równolegle.
+            base_url (str): Adres katalogu z danymi dobowymi (np. lokalny serwer HTTP w testach).
+            incremental (bool): Czy pomijać archiwa niezmienione od ostatniego pobrania (wg manifestu).
+
+        """
         self.data_dir = Dirs.DATA_DIR
         self.data_dir.mkdir(parents=True, exist_ok=True)
-        self.base_url = Dirs.IMGW_URL
+        self.base_url = base_url
         self.dataType = ["klimat", "opad", "synop"]
         self.logger = get_logger("IMGWDataFetcher")
+        self.max_workers = max(1, max_workers)
+        self.manifest = DownloadManifest() if incremental else None
+
+        # Jedna sesja z pulą połączeń współdzielona przez wszystkie wątki pobierające
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=self.max_workers, pool_maxsize=self.max_workers)
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
 
     def open_site(self, URL, unzip: bool = True):
-        response = requests.get(URL)
+        response = self.session.get(URL)
         if response.status_code != requests.codes.ok:
             self.logger.critical(f"response.status_code: {response.status_code} Nieprawidłowy address URL")
         else:
             self.logger.debug(f"response.status_code: {response.status_code} Poprawnie otwarto stronę {Path(URL).name}")
         return response.text
 
-    def download_dir(self, URL: str, unzip: bool = True):
-        """Pobiera zawartość katalogu i opcjonalnie nie rozpakowuje zipów."""
+    def list_dir(self, URL: str) -> list[str]:
+        """Zwraca listę adresów archiwów ZIP dostępnych w katalogu."""
         content = self.open_site(URL)
         zips = re.findall(r'href="([^"]+)"', content)
-        zips = [zipp for zipp in zips if zipp.endswith(".zip")]
-        for zipp in zips:
-            self.download_file(URL + zipp, True)
+        return [URL + zipp for zipp in zips if zipp.endswith(".zip")]
+
+    def download_dir(self, URL: str, unzip: bool = True):
+        """Pobiera zawartość katalogu i opcjonalnie nie rozpakowuje zipów."""
+        self.download_files(self.list_dir(URL), unzip)
+
+    def download_files(self, file_urls: list[str], unzip: bool = True) -> list[str]:
+        """Pobiera równolegle podane pliki, używając puli co najwyżej `max_workers` wątków.
+
+        Args:
+            file_urls (list[str]): Adresy plików do pobrania.
+            unzip (bool): Czy pliki powinny zostać wypakowane.
+
+        Returns:
+            list[str]: Adresy plików, których nie udało się pobrać.
+
+        """
+        failed = []
+        if not file_urls:
+            return failed
+        self.logger.info(f"Pobieranie {len(file_urls)} plików ({self.max_workers} wątków)")
+        with (
+            ThreadPoolExecutor(max_workers=self.max_workers) as executor,
+            ProgressLog(self.logger, "Pobieranie", "plików") as progress,
+        ):
+            futures = {executor.submit(self.download_file, url, unzip): url for url in file_urls}
+            for future in as_completed(futures):
+                url = futures[future]
+                progress.update()
+                try:
+                    future.result()
+                except Exception:
+                    self.logger.exception("Błąd podczas pobierania pliku %s", url)
+                    failed.append(url)
+        if failed:
+            self.logger.error(f"Nie udało się pobrać {len(failed)} z {len(file_urls)} plików")
+        return failed
+
+    def fetch_archive(self, file_url: str) -> tuple[tempfile.SpooledTemporaryFile, dict] | None:
+        """Pobiera plik do bufora w pamięci (powyżej Dirs.SPOOL_MAX_SIZE bufor przenoszony jest na dysk).
 
-    def download_file(self, file_url: str, unzip: bool = False):
+        Jeśli plik jest w manifeście, wysyłane jest zapytanie warunkowe i niezmienione archiwa są pomijane.
+
+        Args:
+            file_url (str): URL pliku do pobrania.
+
+        Returns:
+            tuple | None: Bufor ustawiony na początek oraz metadane do manifestu (headers, size, sha256),
+                albo None, jeśli plik nie zmienił się od ostatniego pobrania.
+
+        """
+        headers = self.manifest.conditional_headers(file_url) if self.manifest else {}
+        with self.session.get(file_url, stream=True, headers=headers) as response:
+            if self.manifest and (
+                response.status_code == requests.codes.not_modified
+                or (response.ok and self.manifest.is_unchanged(file_url, response.headers))
+            ):
+                self.logger.debug(f"Bez zmian od ostatniego pobrania, pomijanie: {Path(file_url).name}")
+                return None
+            response.raise_for_status()
+            digest = hashlib.sha256()
+            size = 0
+            buffer = tempfile.SpooledTemporaryFile(max_size=Dirs.SPOOL_MAX_SIZE)
+            for chunk in response.iter_content(chunk_size=64 * 1024):
+                buffer.write(chunk)
+                digest.update(chunk)
+                size += len(chunk)
+        buffer.seek(0)
+        self.logger.debug(f"Pobieranie zakończone: {Path(file_url).name} ({size} B)")
+        return buffer, {"headers": response.headers, "size": size, "sha256": digest.hexdigest()}
+
+    def wanted_members(self, zip_ref: zipfile.ZipFile) -> list[zipfile.ZipInfo]:
+        """Zwraca pliki archiwum, które powinny trafić na dysk (bez katalogów i plików 'k_d_t*' / 's_d_*')."""
+        return [
+            member
+            for member in zip_ref.infolist()
+            if not member.is_dir() and not self.should_delete_file(Path(member.filename).name)
+        ]
+
+    def download_file(self, file_url: str, unzip: bool = False) -> bool:
         """Pobiera plik pod wskazanym URL i opcjonalnie go rozpakowuje.
 
+        Archiwum jest rozpakowywane z bufora w pamięci, a na dysk trafiają tylko potrzebne pliki CSV.
+
         Args:
             file_url (str): URL pliku do pobrania.
             unzip (bool): Czy plik powinien zostać wypakowany (jeśli jest archiwum ZIP).
 
+        Returns:
+            bool: False, jeśli plik nie zmienił się od ostatniego pobrania i został pominięty.
+
         """
-        local_filename = self.tempdata_dir / Path(file_url).name
-        with requests.get(file_url, stream=True) as response:
-            response.raise_for_status()
-            with open(local_filename, "wb") as file:
-                for chunk in response.iter_content(chunk_size=8192):
-                    file.write(chunk)
-        self.logger.debug(f"Pobieranie zakończone: {local_filename}")
-        if unzip and zipfile.is_zipfile(local_filename):
-            with zipfile.ZipFile(local_filename, "r") as zip_ref:
-                zip_ref.extractall(self.tempdata_dir)
-            local_filename.unlink()
+        archive = self.fetch_archive(file_url)
+        if archive is None:
+            return False
+        buffer, record = archive
+        with buffer:
+            if unzip and zipfile.is_zipfile(buffer):
+                with zipfile.ZipFile(buffer, "r") as zip_ref:
+                    for member in self.wanted_members(zip_ref):
+                        zip_ref.extract(member, self.tempdata_dir)
+            else:
+                buffer.seek(0)
+                with open(self.tempdata_dir / Path(file_url).name, "wb") as file:
+                    shutil.copyfileobj(buffer, file)
+        if self.manifest:
+            self.manifest.update(file_url, **record)
+        return True
+
+    def iter_archives(self, file_urls: list[str]) -> Iterator[tuple[str, zipfile.ZipFile]]:
+        """Pobiera archiwa w tle i zwraca je kolejno jako otwarte ZipFile, w kolejności ukończenia pobierania.
+
+        W locie jest co najwyżej `max_workers` archiwów, więc gdy wywołujący przetwarza jedno archiwum,
+        kolejne są już pobierane, a zużycie pamięci/dysku nie zależy od liczby lat w zakresie.
+        Archiwum jest zapisywane w manifeście dopiero po jego przetworzeniu przez wywołującego.
+
+        Args:
+            file_urls (list[str]): Adresy archiwów do pobrania.
+
+        Yields:
+            tuple[str, zipfile.ZipFile]: Adres archiwum i otwarte archiwum (ważne do kolejnej iteracji).
+
+        """
+        urls = iter(file_urls)
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            pending = {}
+
+            def submit_next() -> None:
+                url = next(urls, None)
+                if url is not None:
+                    pending[executor.submit(self.fetch_archive, url)] = url
+
+            for _ in range(self.max_workers):
+                submit_next()
+
+            while pending:
+                done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    url = pending.pop(future)
+                    submit_next()
+                    try:
+                        archive = future.result()
+                    except Exception:
+                        self.logger.exception("Błąd podczas pobierania pliku %s", url)
+                        continue
+                    if archive is None:
+                        continue
+                    buffer, record = archive
+                    with buffer:
+                        if not zipfile.is_zipfile(buffer):
+                            self.logger.error(f"Plik {url} nie jest archiwum ZIP, pomijanie")
+                            continue
+                        with zipfile.ZipFile(buffer, "r") as zip_ref:
+                            yield url, zip_ref
+                    if self.manifest:
+                        self.manifest.update(url, **record)
+
+    def stream_members(self, startYear: int, endYear: int, typdanych: int) -> Iterator[tuple[str, IO[bytes]]]:
+        """Zwraca kolejno potrzebne pliki CSV ze wszystkich archiwów z zakresu lat, bez zapisywania ich na dysk.
+
+        Wpisy manifestu są uzupełniane w pamięci, ale manifest zapisuje wywołujący - dopiero gdy dane z archiwów
+        zostały utrwalone (patrz `IMGWDataHandler.divide_stream(..., manifest=fetcher.manifest)`).
+
+        Args:
+            startYear (int): Rok początkowy.
+            endYear (int): Rok końcowy.
+            typdanych (int): Typ danych: 1 - klimat, 2 - opad, 3 - synop.
+
+        Yields:
+            tuple[str, IO[bytes]]: Nazwa pliku w archiwum i strumień do jego odczytu.
+
+        """
+        archives = self.collect_archives(startYear, endYear, typdanych)
+        self.logger.info(f"Strumieniowe pobieranie {len(archives)} plików ({self.max_workers} wątków)")
+        for _, zip_ref in self.iter_archives(archives):
+            for member in self.wanted_members(zip_ref):
+                with zip_ref.open(member) as stream:
+                    yield member.filename, stream
 
     def cleanup(self) -> None:
-        """Usuwa pliki zaczynające się na 's_d_' i 'k_d_t' z folderu Dirs.DATA_DIR."""
+        """Usuwa pliki zaczynające się na 's_d_' i 'k_d_t' z folderu Dirs.DATA_DIR.
+
+        Przy pobieraniu takie pliki są odfiltrowywane już w archiwum, więc metoda służy tylko do
+        uprzątnięcia danych rozpakowanych w inny sposób.
+        """
         for directory in self.data_dir.iterdir():
+            if not directory.is_dir():
+                continue
             for file_path in directory.glob("*.csv"):
                 if file_path.is_file() and self.should_delete_file(file_path.name):
                     try:
@@ -75,24 +262,34 @@ class IMGWDataFetcher(ABC):
             return True
         return False
 
-    @abstractmethod
     def fetch(self, startYear: int, endYear: int, typdanych: int):
-        pass
+        """Pobiera wszystkie archiwa z zakresu lat równolegle i rozpakowuje je do Dirs.DATA_DIR/<typ>."""
+        self.tempdata_dir = Dirs.DATA_DIR / self.dataType[typdanych - 1]
+        if not self.tempdata_dir.exists():
+            self.tempdata_dir.mkdir(parents=True, exist_ok=True)
+
+        archives = self.collect_archives(startYear, endYear, typdanych)
+        self.download_files(archives, True)
+        if self.manifest:
+            self.manifest.save()
+
+    @abstractmethod
+    def collect_archives(self, startYear: int, endYear: int, typdanych: int) -> list[str]:
+        """Zwraca adresy wszystkich archiwów ZIP z danego zakresu lat."""
 
 
 class KODataFetcher(IMGWDataFetcher):
     """Klasa do pobierania danych meteorologicznych z IMGW."""
 
-    def __init__(self):
-        super().__init__()
+    def __init__(
+        self, max_workers: int = Dirs.MAX_DOWNLOAD_WORKERS, base_url: str = Dirs.IMGW_URL, incremental: bool = True
+    ):
+        super().__init__(max_workers, base_url, incremental)
 
-    def fetch(self, startYear: int, endYear: int, typdanych: int):
-        """Szuka."""
+    def collect_archives(self, startYear: int, endYear: int, typdanych: int) -> list[str]:
+        """Szuka archiwów klimat/opad z zakresu lat."""
         if typdanych == 3:
             self.logger.critical("przekazano zły typ danych (synop) do KO ")
-        self.tempdata_dir = Dirs.DATA_DIR / self.dataType[typdanych - 1]
-        if not self.tempdata_dir.exists():
-            self.tempdata_dir.mkdir(parents=True, exist_ok=True)
         Current_URL = self.base_url + self.dataType[typdanych - 1] + "/"
 
         page_content = self.open_site(Current_URL)
@@ -101,6 +298,7 @@ class KODataFetcher(IMGWDataFetcher):
         folders = [folder for folder in folders if folder.endswith("/")]
         folders = [item for item in folders if re.compile(r"\d").search(item)]
 
+        archives = []
         for folder in folders:
             match_range = re.match(r"(\d{4})_(\d{4})/", folder)
             match_single = re.match(r"(\d{4})/", folder)
@@ -110,39 +308,38 @@ class KODataFetcher(IMGWDataFetcher):
                 if startYear <= folder_year:
                     if folder_year > endYear:
                         break
-                    self.download_dir(Current_URL + folder, True)
+                    archives += self.list_dir(Current_URL + folder)
 
             elif match_range:
                 start, end = map(int, match_range.groups())
                 if startYear <= start and end <= endYear:
-                    self.download_dir(Current_URL + folder, True)
+                    archives += self.list_dir(Current_URL + folder)
 
                 elif start <= endYear and end >= startYear:
-                    content = self.open_site(Current_URL + folder)
-                    zips = re.findall(r'href="([^"]+)"', content)
-                    zips = [zipp for zipp in zips if zipp.endswith(".zip")]
-                    for zipp in zips:
-                        match = re.match(r"^(\d{4})", zipp)  # Dopasowanie roku na początku nazwy
+                    for zipp in self.list_dir(Current_URL + folder):
+                        match = re.match(r"^(\d{4})", Path(zipp).name)  # Dopasowanie roku na początku nazwy
                         if match:
                             year = int(match.group(1))  # Konwersja roku na liczbę całkowitą
                             if startYear <= year <= endYear:
-                                self.download_file(Current_URL + folder + zipp, True)
-        self.cleanup()
+                                archives.append(zipp)
+        return archives
 
 
 class SynopDataFetcher(IMGWDataFetcher):
     """Klasa do pobierania danych meteorologicznych z IMGW."""
 
-    def __init__(self):
-        super().__init__()
+    def __init__(
+        self, max_workers: int = Dirs.MAX_DOWNLOAD_WORKERS, base_url: str = Dirs.IMGW_URL, incremental: bool = True
+    ):
+        super().__init__(max_workers, base_url, incremental)
 
     def fetch(self, startYear: int, endYear: int, typdanych: int = 3):
-        """Szuka."""
+        super().fetch(startYear, endYear, typdanych)
+
+    def collect_archives(self, startYear: int, endYear: int, typdanych: int = 3) -> list[str]:
+        """Szuka archiwów synop z zakresu lat."""
         if typdanych != 3:
             self.logger.critical("przekazano zły typ danych (opad lub klimat) do Synop ")
-        self.tempdata_dir = Dirs.DATA_DIR / self.dataType[typdanych - 1]
-        if not self.tempdata_dir.exists():
-            self.tempdata_dir.mkdir(parents=True, exist_ok=True)
         Current_URL = self.base_url + self.dataType[typdanych - 1] + "/"
 
         page_content = self.open_site(Current_URL)
@@ -151,6 +348,7 @@ class SynopDataFetcher(IMGWDataFetcher):
         folders = [folder for folder in folders if folder.endswith("/")]
         folders = [item for item in folders if re.compile(r"\d").search(item)]
 
+        archives = []
         for folder in folders:
             match_range = re.match(r"(\d{4})_(\d{4})/", folder)
             match_single = re.match(r"(\d{4})/", folder)
@@ -160,9 +358,9 @@ class SynopDataFetcher(IMGWDataFetcher):
                 if startYear <= folder_year:
                     if folder_year > endYear:
                         break
-                    self.download_dir(Current_URL + folder)
+                    archives += self.list_dir(Current_URL + folder)
             elif match_range:
                 start, end = map(int, match_range.groups())
                 if start <= endYear and end >= startYear:
-                    self.download_dir(Current_URL + folder)
-        self.cleanup()
+                    archives += self.list_dir(Current_URL + folder)
+        return archives
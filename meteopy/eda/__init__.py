@@ -1,5 +1,15 @@
 from __future__ import annotations
 
-from .imgw_eda_visualizer import IMGWDataVisualizer
+from meteopy.utils.lazy_imports import attach
 
-__all__ = ["IMGWDataVisualizer"]
+__getattr__, __dir__, __all__ = attach(
+    __name__,
+    {
+        "ChartJob": ".render_farm",
+        "IMGWDataVisualizer": ".imgw_eda_visualizer",
+        "RenderFarm": ".render_farm",
+        "downsample": ".downsampling",
+        "lttb": ".downsampling",
+        "minmax": ".downsampling",
+    },
+)
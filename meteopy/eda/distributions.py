@@ -0,0 +1,79 @@
+from __future__ import annotations
+
+import numpy as np
+
+from meteopy.consts.dirs import Dirs
+
+
+def summarize_values(
+    values: np.ndarray,
+    label: str,
+    resolution: float = Dirs.HISTOGRAM_RESOLUTION,
+    whis: float = 1.5,
+    max_fliers: int = Dirs.BOXPLOT_MAX_FLIERS,
+) -> tuple[tuple[np.ndarray, np.ndarray], dict] | None:
+    """Podsumowuje wartości jednej stacji: rzadki histogram i statystyki wykresu pudełkowego (jedno sortowanie).
+
+    Args:
+        values (np.ndarray): Wartości parametru (NaN są pomijane).
+        label (str): Podpis stacji na wykresie pudełkowym.
+        resolution (float): Szerokość przedziału histogramu (dokładność zapisu danych IMGW to 0.1).
+        whis (float): Zasięg wąsów jako wielokrotność rozstępu międzykwartylowego (jak w matplotlib).
+        max_fliers (int): Największa liczba zapamiętanych wartości odstających (wybierane równomiernie
+            spośród posortowanych, zawsze z najmniejszą i największą).
+
+    Returns:
+        tuple | None: ((klucze przedziałów, liczności), statystyki dla `Axes.bxp`) lub None, jeśli brak wartości.
+            Klucz przedziału to round(wartość / resolution).
+
+    """
+    values = np.asarray(values, dtype=np.float64)
+    values = np.sort(values[~np.isnan(values)])
+    if values.size == 0:
+        return None
+    keys, counts = np.unique(np.round(values / resolution).astype(np.int64), return_counts=True)
+
+    q1, median, q3 = np.percentile(values, [25, 50, 75])
+    iqr = q3 - q1
+    # jak matplotlib.cbook.boxplot_stats: wąs nie sięga do wnętrza pudełka, gdy między kwartylem
+    # a granicą q -/+ whis * iqr nie ma żadnej wartości
+    low = min(values[np.searchsorted(values, q1 - whis * iqr, side="left")], q1)
+    high = max(values[np.searchsorted(values, q3 + whis * iqr, side="right") - 1], q3)
+    fliers = values[(values < low) | (values > high)]
+    if fliers.size > max_fliers:
+        fliers = fliers[np.unique(np.linspace(0, fliers.size - 1, max_fliers).astype(np.int64))]
+    stats = {
+        "label": label,
+        "mean": float(values.mean()),
+        "med": float(median),
+        "q1": float(q1),
+        "q3": float(q3),
+        "iqr": float(iqr),
+        "whislo": float(low),
+        "whishi": float(high),
+        "fliers": fliers,
+    }
+    return (keys, counts), stats
+
+
+def common_bins(
+    histograms: list[tuple[np.ndarray, np.ndarray]],
+    resolution: float = Dirs.HISTOGRAM_RESOLUTION,
+    max_bins: int = Dirs.HISTOGRAM_MAX_BINS,
+) -> tuple[np.ndarray, list[np.ndarray]]:
+    """Przelicza rzadkie histogramy stacji na wspólne przedziały (najwyżej `max_bins`, wielokrotności `resolution`).
+
+    Returns:
+        tuple[np.ndarray, list[np.ndarray]]: Krawędzie przedziałów i liczności każdej stacji.
+
+    """
+    first = min(int(keys[0]) for keys, _ in histograms)
+    last = max(int(keys[-1]) for keys, _ in histograms)
+    width = max(1, -(-(last - first + 1) // max_bins))
+    n_bins = (last - first) // width + 1
+    edges = (first - 0.5 + width * np.arange(n_bins + 1)) * resolution
+    counts = [
+        np.bincount((keys - first) // width, weights=station_counts, minlength=n_bins).astype(np.int64)
+        for keys, station_counts in histograms
+    ]
+    return edges, counts
@@ -0,0 +1,89 @@
+from __future__ import annotations
+
+import numpy as np
+
+DOWNSAMPLING_METHODS = ("lttb", "minmax")
+
+
+def _as_float(x: np.ndarray) -> np.ndarray:
+    x = np.asarray(x)
+    if np.issubdtype(x.dtype, np.datetime64):
+        x = x.astype("datetime64[ns]").astype(np.int64)
+    return x.astype(np.float64)
+
+
+def lttb(x: np.ndarray, y: np.ndarray, n_out: int) -> np.ndarray:
+    """Wybiera `n_out` punktów szeregu algorytmem Largest-Triangle-Three-Buckets (Steinarsson 2013).
+
+    Pierwszy i ostatni punkt są zawsze zachowane, a z każdego z pozostałych `n_out - 2` koszyków wybierany
+    jest punkt tworzący największy trójkąt z punktem wybranym w poprzednim koszyku i średnią następnego
+    koszyka. Kształt wykresu (w tym ekstrema) jest zachowany przy liczbie punktów rzędu szerokości osi w pikselach.
+
+    Args:
+        x (np.ndarray): Wartości osi X (rosnąco; liczby lub datetime64).
+        y (np.ndarray): Wartości osi Y (bez NaN).
+        n_out (int): Docelowa liczba punktów.
+
+    Returns:
+        np.ndarray: Rosnące indeksy wybranych punktów.
+
+    """
+    n = len(x)
+    if n_out >= n or n_out < 3:
+        return np.arange(n)
+    x = _as_float(x)
+    y = np.asarray(y, dtype=np.float64)
+
+    edges = np.linspace(1, n - 1, n_out - 1).astype(np.int64)
+    selected = np.empty(n_out, dtype=np.int64)
+    selected[0], selected[-1] = 0, n - 1
+    previous = 0
+    for bucket in range(n_out - 2):
+        start, end = edges[bucket], edges[bucket + 1]
+        next_end = edges[bucket + 2] if bucket + 2 < edges.size else n
+        next_x, next_y = x[end:next_end].mean(), y[end:next_end].mean()
+        x_a, y_a = x[previous], y[previous]
+        area = np.abs((x_a - next_x) * (y[start:end] - y_a) - (x_a - x[start:end]) * (next_y - y_a))
+        previous = start + int(np.argmax(area))
+        selected[bucket + 1] = previous
+    return selected
+
+
+def minmax(x: np.ndarray, y: np.ndarray, n_buckets: int) -> np.ndarray:
+    """Dzieli oś X na `n_buckets` równych przedziałów (np. kolumn pikseli) i zostawia w każdym minimum i maksimum.
+
+    Wykres z wybranych punktów wygląda w danej rozdzielczości tak samo jak wykres wszystkich punktów
+    (każda kolumna pikseli obejmuje ten sam zakres wartości).
+
+    Args:
+        x (np.ndarray): Wartości osi X (rosnąco; liczby lub datetime64).
+        y (np.ndarray): Wartości osi Y (bez NaN).
+        n_buckets (int): Liczba przedziałów.
+
+    Returns:
+        np.ndarray: Rosnące indeksy wybranych punktów (najwyżej 2 * n_buckets + 2).
+
+    """
+    n = len(x)
+    if 2 * n_buckets >= n or n_buckets < 1:
+        return np.arange(n)
+    x = _as_float(x)
+    y = np.asarray(y, dtype=np.float64)
+
+    span = max(x[-1] - x[0], 1.0)
+    buckets = np.minimum(((x - x[0]) / span * n_buckets).astype(np.int64), n_buckets - 1)
+    order = np.lexsort((y, buckets))
+    boundaries = np.flatnonzero(np.diff(buckets[order])) + 1
+    first = np.concatenate([[0], boundaries])
+    last = np.concatenate([boundaries - 1, [n - 1]])
+    return np.unique(np.concatenate([[0, n - 1], order[first], order[last]]))
+
+
+def downsample(x: np.ndarray, y: np.ndarray, n_pixels: int, method: str = "lttb") -> np.ndarray:
+    """Indeksy punktów szeregu do narysowania na osi szerokiej na `n_pixels` pikseli (NaN w y są pomijane)."""
+    if method not in DOWNSAMPLING_METHODS:
+        raise ValueError(f"Nieznana metoda redukcji punktów: {method}")
+    valid = np.flatnonzero(~np.isnan(np.asarray(y, dtype=np.float64)))
+    x, y = np.asarray(x)[valid], np.asarray(y)[valid]
+    selected = lttb(x, y, n_pixels) if method == "lttb" else minmax(x, y, n_pixels)
+    return valid[selected]
@@ -1,13 +1,17 @@
 from __future__ import annotations
 
 from pathlib import Path
-import warnings
-import matplotlib.pyplot as plt
+import matplotlib as mpl
 import pandas as pd
-import seaborn as sns
 
 from meteopy.consts.dirs import Dirs
+from meteopy.eda.distributions import common_bins, summarize_values
+from meteopy.eda.downsampling import downsample as downsample_series
+from meteopy.eda.render_farm import ChartJob, RenderFarm, as_series
+from meteopy.preprocessing.rollups import RollupStore
+from meteopy.preprocessing.station_store import StationStore
 from meteopy.utils.log_module import get_logger
+from meteopy.utils.station_catalog import StationCatalog
 
 
 class IMGWDataVisualizer:
@@ -16,10 +20,24 @@ class IMGWDataVisualizer:
         
         Dirs.PLOTS_DIR.mkdir(parents=True, exist_ok=True)
         self.logger = get_logger(__name__)
+        self.store = StationStore()
+        self.rollups = RollupStore()
+        self.catalog = StationCatalog()
         # Mapowanie typów danych na dostępne parametry
         self.parameter_map = Dirs.PARAMETER_MAP
 
-    def plot_time_series(self, data_type: str, parameters: list[str], start_date: str, end_date: str, stations: list[str] = None) -> None:
+    def plot_time_series(
+        self,
+        data_type: str,
+        parameters: list[str],
+        start_date: str,
+        end_date: str,
+        stations: list[str] = None,
+        granularity: str = "day",
+        statistic: str = "mean",
+        downsample: str | None = None,
+        workers: int = Dirs.RENDER_WORKERS,
+    ) -> None:
         """Tworzy wykres szeregów czasowych dla wybranego parametru i stacji.
 
         Args:
@@ -28,6 +46,17 @@ class IMGWDataVisualizer:
             start_date (str): Początkowa data w formacie 'YYYY-MM-DD'.
             end_date (str): Końcowa data w formacie 'YYYY-MM-DD'.
             stations (list[str]): Lista ID stacji. Jeśli None, wykresy są tworzone dla wszystkich stacji.
+            granularity (str): 'day' (dane dzienne), 'month' lub 'year' - wtedy wykres powstaje z agregatów
+                okresowych (RollupStore) bez czytania danych dziennych.
+            statistic (str): Wielkość rysowana dla agregatów: 'mean', 'sum', 'min', 'max', 'std_dev', 'count'
+                lub 'positive' (liczba dni z wartością dodatnią).
+            downsample (str, optional): 'lttb' lub 'minmax' - szeregi dzienne są przed narysowaniem redukowane
+                do liczby punktów odpowiadającej szerokości osi w pikselach (patrz meteopy.eda.downsampling),
+                więc zużycie pamięci nie rośnie z liczbą dni. None - rysowane są pełne szeregi.
+            workers (int): Liczba procesów rysujących wykresy.
+
+        Wykresy wszystkich parametrów rysowane są równolegle (RenderFarm) i dopisywane do manifestu
+        Dirs.RENDER_MANIFEST_NAME w katalogu wykresów.
 
         """
         OUTPUT_DIR = Dirs.PLOTS_DIR/data_type
@@ -48,62 +77,124 @@ class IMGWDataVisualizer:
             return
             
         if stations:
-            stations_to_process = [station + ".csv" for station in stations]
+            stations_to_process = self.catalog.prune(data_type, stations, start_date, end_date, parameters)
         else:
-            stations_to_process = [d.name for d in datadir.iterdir()]
-
-
+            stations_to_process = Dirs.get_stations_id(data_type, start_date, end_date, parameters)
 
         start_date = pd.to_datetime(start_date)
         end_date = pd.to_datetime(end_date)
 
-        figures = [plt.figure(figsize=(20, 12)) for _ in parameters]
-        axes = [fig.add_subplot(111) for fig in figures]
+        figsize = (20, 12)
+        farm = RenderFarm(workers)
+        if granularity == "day":
+            series = self._daily_series(
+                data_type, parameters, start_date, end_date, stations_to_process, downsample, figsize, farm.dpi
+            )
+            suffix, details = "", ""
+        else:
+            series = self._rollup_series(
+                data_type, parameters, start_date, end_date, stations_to_process, granularity, statistic
+            )
+            suffix, details = f"_{granularity}_{statistic}", f" ({statistic}, {granularity})"
+
+        jobs = [
+            ChartJob(
+                OUTPUT_DIR / f"{data_type}_multi_{parameter.replace('/', '_')}{suffix}.png",
+                series=series[parameter],
+                title=f"Wykres szeregów czasowych dla '{parameter}'{details}",
+                xlabel="Data",
+                ylabel=parameter,
+                figsize=figsize,
+                max_xticks=10,
+            )
+            for parameter in parameters
+        ]
+        farm.render(jobs, OUTPUT_DIR / Dirs.RENDER_MANIFEST_NAME)
+
+    def _daily_series(
+        self,
+        data_type: str,
+        parameters: list[str],
+        start_date: pd.Timestamp,
+        end_date: pd.Timestamp,
+        stations: list[str],
+        method: str | None,
+        figsize: tuple[float, float],
+        dpi: int,
+    ) -> dict[str, list[dict]]:
+        """Czyta stacje po kolei i zwraca serie dzienne każdego parametru dla zleceń `ChartJob`.
+
+        Przy podanej metodzie `method` szeregi są redukowane do szerokości osi w pikselach, więc w pamięci
+        pozostaje najwyżej kilka tysięcy punktów na stację i parametr, niezależnie od długości szeregów.
+        """
+        subplot_width = mpl.rcParams["figure.subplot.right"] - mpl.rcParams["figure.subplot.left"]
+        n_pixels = max(int(figsize[0] * dpi * subplot_width), 3)
 
-        for station in stations_to_process:
+        series = {parameter: [] for parameter in parameters}
+        for station in stations:
             self.logger.debug(f"analizowanie {station}")
-            station_path = datadir / station
-            if not station_path.exists():
-                self.logger.warning("Stacja '%s' nie istnieje.", station_path)
+            df = self.store.read(data_type, station, ["Nazwa_stacji", "Data"] + parameters, start_date, end_date)
+            if df is None:
+                self.logger.warning("Stacja '%s' nie istnieje.", station)
                 continue
-
-            usecols = ["Nazwa_stacji", "Data"] + parameters
-            df = pd.read_csv(station_path, usecols=usecols, encoding=Dirs.ENCODING)
-            df["Data"] = pd.to_datetime(df["Data"])
-
-            df = df[df["Data"] >= start_date]
-            df = df[df["Data"] <= end_date]
-
             if df.empty:
                 self.logger.warning("Brak danych do wyświetlenia dla stacji '%s' w podanym zakresie czasu.", station)
                 continue
-
-            for parameter, ax in zip(parameters, axes):
-                sns.lineplot(data=df, x="Data", y=parameter, label=f"{df["Nazwa_stacji"][0]}", ax=ax)
-                ax.set_title(f"Wykres szeregów czasowych dla '{parameter}'")
-                ax.set_xlabel("Data")
-                ax.set_ylabel(parameter)
-                ax.xaxis.set_major_locator(plt.MaxNLocator(10))  # Ograniczenie liczby etykiet na osi X
-                ax.legend(bbox_to_anchor=(1.05, 1), loc="upper left", borderaxespad=0.)
-
-        for fig, parameter in zip(figures, parameters):
-            output_file = OUTPUT_DIR / f"{data_type}_multi_{parameter.replace('/', '_')}.png"
-            warnings.filterwarnings("ignore", category=UserWarning)
-            fig.savefig(output_file, bbox_inches="tight")
-            plt.close(fig)
-            self.logger.info("Zapisano wykres do pliku: %s", output_file)
-
-        
-
-    def distribution_polts(self, data_type: str, parameters: list[str], start_date: str, end_date: str, stations: list[str] = None) -> None:
+            label = str(df["Nazwa_stacji"].iloc[0])
+            dates = df["Data"].to_numpy()
+            for parameter in parameters:
+                values = df[parameter].to_numpy(dtype=float)
+                if method is None:
+                    series[parameter].append(as_series(dates, values, label))
+                    continue
+                selected = downsample_series(dates, values, n_pixels, method)
+                series[parameter].append(as_series(dates[selected], values[selected], label, linewidth=0.8))
+        return series
+
+    def _rollup_series(
+        self,
+        data_type: str,
+        parameters: list[str],
+        start_date: pd.Timestamp,
+        end_date: pd.Timestamp,
+        stations: list[str],
+        granularity: str,
+        statistic: str,
+    ) -> dict[str, list[dict]]:
+        """Zwraca serie miesięczne lub roczne z agregatów okresowych stacji dla zleceń `ChartJob`."""
+        series = {parameter: [] for parameter in parameters}
+        rollups = self.rollups.read(data_type, stations, granularity, parameters, start_date, end_date)
+        if rollups.empty:
+            self.logger.warning("Brak agregatów do wyświetlenia w podanym zakresie czasu.")
+            return series
+        names = self.catalog.names(data_type)
+        for (station, parameter), group in rollups.groupby(["station", "parameter"], sort=False):
+            series[parameter].append(as_series(group["Data"], group[statistic], names.get(station, station)))
+        return series
+
+    def distribution_polts(
+        self,
+        data_type: str,
+        parameters: list[str],
+        start_date: str,
+        end_date: str,
+        stations: list[str] = None,
+        workers: int = Dirs.RENDER_WORKERS,
+    ) -> None:
         """Tworzy histogram oraz wykres pudełkowy dla wybranych parametrów, porównując podane stację na jednym wykresie.
 
+        Stacje czytane są po kolei i od razu podsumowywane (rzadki histogram z dokładnością
+        Dirs.HISTOGRAM_RESOLUTION oraz kwartyle, wąsy i próbka wartości odstających), więc pamięć zależy
+        od liczby stacji i przedziałów, a nie od liczby wierszy. Wykresy rysowane są z samych podsumowań
+        (RenderFarm).
+
         Args:
             data_type (str): Typ danych.
             parameters (list[str], optional): Nazwy parametrów do analizy.
             start_date (str): Początkowa data w formacie 'YYYY-MM-DD'.
             end_date (str): Końcowa data w formacie 'YYYY-MM-DD'.
             stations (list[str], optional): Lista ID stacji. Jeśli None, wykresy są tworzone dla wszystkich stacji.
+            workers (int): Liczba procesów rysujących wykresy.
 
         Returns:
             None
@@ -119,69 +210,69 @@ class IMGWDataVisualizer:
             if parameter not in self.parameter_map[data_type]:
                 self.logger.error("Parameter '%s' nie jest dostępny dla typu danych '%s'.\n KOŃCZENIE DZIALANIA FUNKCJI", parameter, data_type)
                 return
-        datadir = Path(Dirs.SEPARATED_DIR / data_type)
 
         if stations:
-            stations_to_process = [station + ".csv" for station in stations]
+            stations_to_process = self.catalog.prune(data_type, stations, start_date, end_date, parameters)
         else:
-            stations_to_process = [d.name for d in datadir.iterdir()]
+            stations_to_process = Dirs.get_stations_id(data_type, start_date, end_date, parameters)
 
         start_date = pd.to_datetime(start_date)
         end_date = pd.to_datetime(end_date)
 
-        plt.figure(figsize=(15, 10))
-
-        all_data = []
+        histograms = {parameter: [] for parameter in parameters}
+        boxes = {parameter: [] for parameter in parameters}
         for station in stations_to_process:
-            station_path = datadir / station
-            if not station_path.exists():
-                self.logger.warning("Stacja '%s' nie istnieje.", station_path)
-                continue
-            
             cols_to_read = ["Kod_stacji", "Nazwa_stacji", "Data"] +  parameters
-            df = pd.read_csv(station_path, usecols=cols_to_read, encoding=Dirs.ENCODING)
-            df["Data"] = pd.to_datetime(df["Data"])
-            df = df[df["Data"] >= start_date]
-            df = df[df["Data"] <= end_date]
+            df = self.store.read(data_type, station, cols_to_read, start_date, end_date)
+            if df is None:
+                self.logger.warning("Stacja '%s' nie istnieje.", station)
+                continue
 
             if df.empty:
                 self.logger.warning("Brak danych do wyświetlenia dla stacji '%s' w podanym zakresie czasu.", station)
                 continue
 
-            all_data.append(df)
+            label = str(df["Nazwa_stacji"].iloc[0])
+            for parameter in parameters:
+                summary = summarize_values(df[parameter].to_numpy(dtype=float), label)
+                if summary is not None:
+                    histograms[parameter].append((label, summary[0]))
+                    boxes[parameter].append(summary[1])
 
-        if not all_data:
+        if not any(boxes.values()):
             self.logger.warning("Brak danych do wyświetlenia dla żadnej stacji w podanym zakresie czasu.")
             return
 
-        combined_df = pd.concat(all_data, ignore_index=True)
-        #combined_df.to_csv( self.output_dir / data_type, encoding= Dirs.ENCODING, index=False)
-        
+        jobs = []
         for parameter in parameters:
-        # Tworzenie wykresu histogramu
-            plt.figure(figsize=(15, 10))
-            sns.histplot(data=combined_df, x=parameter, hue="Nazwa_stacji", multiple="stack", element="step", edgecolor=None, legend=False )
-            plt.title(f"Histogram dla '{parameter}'")
-            plt.xlabel(parameter)
-            plt.ylabel("Liczba wystąpień")
-        
-            plt.tight_layout()
-            output_file_hist = Dirs.PLOTS_DIR / data_type / f"Hist_{parameter.replace('/', '_')}_{data_type}.png"
-            plt.savefig(output_file_hist, bbox_inches="tight")
-            plt.close()
-            self.logger.info("Zapisano histogram do pliku: %s", output_file_hist)
-
-            # Tworzenie wykresu pudełkowego
-            plt.figure(figsize=(20, 12))
-            sns.boxplot(data=combined_df, x="Nazwa_stacji", y=parameter, legend=False)
-            plt.title(f"Wykres pudełkowy dla '{parameter}'")
-            plt.xlabel("Stacja")
-            plt.ylabel(parameter)
-            plt.xticks(rotation=45)
-            plt.tight_layout()
-            #plt.legend(bbox_to_anchor=(1.05, 1), loc="upper left", borderaxespad=0.)
-            output_file = Dirs.PLOTS_DIR / data_type / f"Distribution_{parameter.replace('/', '_')}_{data_type}.png"
-            warnings.filterwarnings("ignore", category=UserWarning)
-            plt.savefig(output_file, bbox_inches="tight")
-            plt.close()
-            self.logger.info("Zapisano wykresy rozkładu do pliku: %s", output_file)
+            if not boxes[parameter]:
+                continue
+            edges, counts = common_bins([histogram for _, histogram in histograms[parameter]])
+            jobs.append(
+                ChartJob(
+                    OUTPUT_DIR / f"Hist_{parameter.replace('/', '_')}_{data_type}.png",
+                    kind="hist",
+                    series=[
+                        {"edges": edges, "counts": station_counts, "label": label}
+                        for (label, _), station_counts in zip(histograms[parameter], counts)
+                    ],
+                    title=f"Histogram dla '{parameter}'",
+                    xlabel=parameter,
+                    ylabel="Liczba wystąpień",
+                    legend=False,
+                )
+            )
+            jobs.append(
+                ChartJob(
+                    OUTPUT_DIR / f"Distribution_{parameter.replace('/', '_')}_{data_type}.png",
+                    kind="box",
+                    series=boxes[parameter],
+                    title=f"Wykres pudełkowy dla '{parameter}'",
+                    xlabel="Stacja",
+                    ylabel=parameter,
+                    figsize=(20, 12),
+                    legend=False,
+                    xticks_rotation=45,
+                )
+            )
+        RenderFarm(workers).render(jobs, OUTPUT_DIR / Dirs.RENDER_MANIFEST_NAME)
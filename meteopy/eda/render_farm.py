@@ -0,0 +1,177 @@
+from __future__ import annotations
+
+import json
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+import numpy as np
+from matplotlib.backends.backend_agg import FigureCanvasAgg
+from matplotlib.figure import Figure
+from matplotlib.ticker import MaxNLocator
+
+from meteopy.consts.dirs import Dirs
+from meteopy.utils.log_module import get_logger
+
+
+class ChartJob:
+    """Samodzielne zlecenie narysowania jednego wykresu: wycinek danych i opis wykresu.
+
+    Zlecenie nie odwołuje się do plików ani do stanu pyplot, więc może zostać narysowane w dowolnym procesie.
+
+    Args:
+        output_file (Path | str): Plik PNG wykresu.
+        kind (str): Rodzaj wykresu (klucz `RENDERERS`): 'line', 'hist' (histogram skumulowany) lub 'box'.
+        series (list[dict]): Dane serii; dla 'line' słowniki z kluczami x, y oraz opcjonalnie label, linestyle
+            i linewidth (patrz `as_series`), dla 'hist' - edges, counts i label, dla 'box' - statystyki
+            `Axes.bxp` (patrz `meteopy.eda.distributions.summarize_values`).
+        title (str): Tytuł wykresu.
+        xlabel (str): Opis osi X.
+        ylabel (str): Opis osi Y.
+        figsize (tuple[float, float]): Rozmiar wykresu w calach.
+        legend (bool): Czy rysować legendę (z prawej strony, poza osiami).
+        xticks_rotation (int): Obrót etykiet osi X w stopniach.
+        max_xticks (int | None): Ograniczenie liczby etykiet osi X.
+
+    """
+
+    def __init__(
+        self,
+        output_file: Path | str,
+        kind: str = "line",
+        series: list[dict] | None = None,
+        title: str = "",
+        xlabel: str = "",
+        ylabel: str = "",
+        figsize: tuple[float, float] = (15, 10),
+        legend: bool = True,
+        xticks_rotation: int = 0,
+        max_xticks: int | None = None,
+    ):
+        self.output_file = str(output_file)
+        self.kind = kind
+        self.series = series if series is not None else []
+        self.title = title
+        self.xlabel = xlabel
+        self.ylabel = ylabel
+        self.figsize = figsize
+        self.legend = legend
+        self.xticks_rotation = xticks_rotation
+        self.max_xticks = max_xticks
+
+
+def _draw_lines(ax, job: ChartJob) -> None:
+    for series in job.series:
+        ax.plot(
+            series["x"],
+            series["y"],
+            label=series.get("label"),
+            linestyle=series.get("linestyle", "-"),
+            linewidth=series.get("linewidth"),
+        )
+
+
+def _draw_stacked_histogram(ax, job: ChartJob) -> None:
+    bottom = 0
+    for series in job.series:
+        top = bottom + series["counts"]
+        ax.stairs(top, series["edges"], baseline=bottom, fill=True, label=series.get("label"))
+        bottom = top
+
+
+def _draw_boxes(ax, job: ChartJob) -> None:
+    ax.bxp(job.series, showfliers=True)
+
+
+RENDERERS = {"line": _draw_lines, "hist": _draw_stacked_histogram, "box": _draw_boxes}
+
+
+def render_chart(job: ChartJob, dpi: int = 100) -> dict:
+    """Rysuje zlecenie backendem Agg przez obiektowe API Figure i zwraca wpis manifestu.
+
+    Zdefiniowana na poziomie modułu, aby mogła działać w procesie roboczym.
+    """
+    entry = {"output_file": job.output_file, "kind": job.kind, "title": job.title, "series": len(job.series)}
+    try:
+        fig = Figure(figsize=job.figsize, dpi=dpi)
+        FigureCanvasAgg(fig)
+        ax = fig.add_subplot(111)
+        RENDERERS[job.kind](ax, job)
+        ax.set_title(job.title)
+        ax.set_xlabel(job.xlabel)
+        ax.set_ylabel(job.ylabel)
+        if job.max_xticks:
+            ax.xaxis.set_major_locator(MaxNLocator(job.max_xticks))
+        if job.xticks_rotation:
+            ax.tick_params(axis="x", labelrotation=job.xticks_rotation)
+        if job.legend and job.series:
+            ax.legend(bbox_to_anchor=(1.05, 1), loc="upper left", borderaxespad=0.)
+        Path(job.output_file).parent.mkdir(parents=True, exist_ok=True)
+        fig.savefig(job.output_file, bbox_inches="tight")
+        entry.update(status="ok", size=Path(job.output_file).stat().st_size)
+    except Exception as e:
+        entry.update(status="error", error=f"{type(e).__name__}: {e}")
+    return entry
+
+
+class RenderFarm:
+    """Rysuje zlecenia `ChartJob` równolegle w puli procesów i zapisuje manifest wygenerowanych plików.
+
+    Każdy proces rysuje backendem Agg bez udziału pyplot, więc wykresy nie dzielą stanu i liczba
+    rysowanych jednocześnie wykresów rośnie z liczbą rdzeni. Nazwy plików ustala wywołujący (są
+    deterministyczne), a manifest (JSON, posortowany po nazwie pliku) uzupełniany jest o wyniki kolejnych
+    wywołań `render`.
+    """
+
+    def __init__(self, workers: int = Dirs.RENDER_WORKERS, dpi: int = 100):
+        self.workers = workers
+        self.dpi = dpi
+        self.logger = get_logger("RenderFarm")
+
+    def render(self, jobs: list[ChartJob], manifest_path: Path | None = None) -> list[dict]:
+        """Rysuje zlecenia i zwraca wpisy manifestu (output_file, kind, title, series, status, size/error).
+
+        Args:
+            jobs (list[ChartJob]): Zlecenia do narysowania.
+            manifest_path (Path, optional): Plik manifestu do uzupełnienia (bez zapisu, jeśli None).
+
+        """
+        if not jobs:
+            return []
+        if self.workers > 1 and len(jobs) > 1:
+            workers = min(self.workers, len(jobs))
+            chunksize = max(1, len(jobs) // (workers * 4))
+            with ProcessPoolExecutor(max_workers=workers) as executor:
+                entries = list(executor.map(render_chart, jobs, [self.dpi] * len(jobs), chunksize=chunksize))
+        else:
+            entries = [render_chart(job, self.dpi) for job in jobs]
+
+        for entry in entries:
+            if entry["status"] == "ok":
+                self.logger.info("Zapisano wykres do pliku: %s", entry["output_file"])
+            else:
+                self.logger.error("Nie udało się narysować wykresu %s: %s", entry["output_file"], entry["error"])
+        if manifest_path is not None:
+            self._write_manifest(Path(manifest_path), entries)
+        return entries
+
+    def _write_manifest(self, manifest_path: Path, entries: list[dict]) -> None:
+        manifest = {}
+        if manifest_path.exists():
+            try:
+                with open(manifest_path, encoding="utf-8") as file:
+                    manifest = {entry["output_file"]: entry for entry in json.load(file)}
+            except (OSError, ValueError, KeyError, TypeError):
+                self.logger.warning(f"Nie udało się wczytać manifestu {manifest_path}, zostanie utworzony od nowa")
+        manifest.update({entry["output_file"]: entry for entry in entries})
+        manifest_path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = manifest_path.with_suffix(".tmp")
+        with open(tmp_path, "w", encoding="utf-8") as file:
+            json.dump([manifest[key] for key in sorted(manifest)], file, indent=2, ensure_ascii=False)
+        tmp_path.replace(manifest_path)
+
+
+def as_series(
+    x: np.ndarray, y: np.ndarray, label: str | None = None, linestyle: str = "-", linewidth: float | None = None
+) -> dict:
+    """Seria wykresu liniowego dla `ChartJob` (kopie tablic, aby zlecenie nie trzymało całych ramek danych)."""
+    return {"x": np.array(x), "y": np.array(y), "label": label, "linestyle": linestyle, "linewidth": linewidth}
@@ -1,5 +1,14 @@
 from __future__ import annotations
 
-from .imgw_simple_forecaster import IMGWSimpleForecaster
+from meteopy.utils.lazy_imports import attach
 
-__all__ = ["IMGWSimpleForecaster"]
+__getattr__, __dir__, __all__ = attach(
+    __name__,
+    {
+        "IMGWSimpleForecaster": ".imgw_simple_forecaster",
+        "ModelCache": ".model_cache",
+        "fit_linear_batch": ".batch_regression",
+        "rolling_origin_errors": ".backtesting",
+        "to_ordinal": ".batch_regression",
+    },
+)
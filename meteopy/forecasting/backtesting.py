@@ -0,0 +1,109 @@
+from __future__ import annotations
+
+import numpy as np
+import pandas as pd
+
+from meteopy.forecasting.batch_regression import to_ordinal
+from meteopy.preprocessing.station_store import StationStore
+
+BACKTEST_COLUMNS = ["station", "parameter", "origins", "points", "mae", "rmse"]
+
+
+def rolling_origin_errors(
+    x: np.ndarray,
+    y: np.ndarray,
+    horizon: int = 30,
+    step: int = 30,
+    initial: int = 365,
+    window: int | None = None,
+    min_train: int = 30,
+) -> tuple[int, int, float, float]:
+    """Ocenia prostą y = a + b * x metodą kolejnych punktów odcięcia (rolling origin) dla jednego szeregu.
+
+    Punkty odcięcia przypadają co `step` dni, począwszy od `initial` dni po pierwszej obserwacji. Dla każdego
+    z nich prosta dopasowywana jest do obserwacji sprzed punktu (wszystkich - okno rosnące, albo z ostatnich
+    `window` dni - okno przesuwne) i porównywana z obserwacjami z kolejnych `horizon` dni. Sumy potrzebne do
+    równań normalnych pochodzą z sum skumulowanych liczonych raz dla całego szeregu, więc dopasowanie w każdym
+    punkcie kosztuje O(1), a błędy wszystkich punktów liczone są wektorowo.
+
+    Args:
+        x (np.ndarray): Numery dni (rosnąco, np. z `to_ordinal`).
+        y (np.ndarray): Wartości; wiersze z NaN są pomijane.
+        horizon (int): Horyzont prognozy w dniach.
+        step (int): Odstęp między punktami odcięcia w dniach.
+        initial (int): Długość pierwszego okna treningowego w dniach.
+        window (int, optional): Długość okna przesuwnego w dniach (None - okno rosnące).
+        min_train (int): Minimalna liczba obserwacji treningowych; punkty z mniejszą liczbą są pomijane.
+
+    Returns:
+        tuple[int, int, float, float]: Liczba ocenionych punktów odcięcia, liczba prognozowanych obserwacji,
+            MAE i RMSE (NaN, jeśli nie oceniono żadnego punktu).
+
+    """
+    valid = ~np.isnan(y)
+    x = np.asarray(x, dtype=np.float64)[valid]
+    y = np.asarray(y, dtype=np.float64)[valid]
+    if x.size == 0:
+        return 0, 0, np.nan, np.nan
+    x = x - x[0]
+
+    origins = np.arange(initial, x[-1] + 1, step, dtype=np.float64)
+    train_end = np.searchsorted(x, origins, side="left")
+    train_start = np.zeros_like(train_end) if window is None else np.searchsorted(x, origins - window, side="left")
+    test_end = np.searchsorted(x, origins + horizon, side="left")
+    n = (train_end - train_start).astype(np.float64)
+    keep = (n >= min_train) & (test_end > train_end)
+    if not keep.any():
+        return 0, 0, np.nan, np.nan
+    train_start, train_end, test_end, n = train_start[keep], train_end[keep], test_end[keep], n[keep]
+
+    def window_sum(values: np.ndarray) -> np.ndarray:
+        cumulative = np.concatenate([[0.0], np.cumsum(values)])
+        return cumulative[train_end] - cumulative[train_start]
+
+    sum_x, sum_y = window_sum(x), window_sum(y)
+    mean_x, mean_y = sum_x / n, sum_y / n
+    sxx = window_sum(x * x) - sum_x * mean_x
+    sxy = window_sum(x * y) - sum_x * mean_y
+    with np.errstate(invalid="ignore", divide="ignore"):
+        slope = np.where(sxx > 1e-9 * n, sxy / sxx, 0.0)
+    intercept = mean_y - slope * mean_x
+
+    # indeksy obserwacji testowych wszystkich punktów odcięcia w jednej tablicy
+    lengths = test_end - train_end
+    origin_index = np.repeat(np.arange(lengths.size), lengths)
+    test_index = np.arange(lengths.sum()) - np.repeat(np.cumsum(lengths) - lengths, lengths) + train_end[origin_index]
+    errors = y[test_index] - (intercept[origin_index] + slope[origin_index] * x[test_index])
+    return int(lengths.size), int(errors.size), float(np.abs(errors).mean()), float(np.sqrt((errors**2).mean()))
+
+
+def _backtest_stations(
+    data_type: str,
+    stations: list[str],
+    parameters: list[str],
+    start_date: str | None,
+    end_date: str | None,
+    options: dict,
+) -> list[dict]:
+    """Ocenia prognozy stacji po kolei; zdefiniowana na poziomie modułu, aby mogła działać w procesie roboczym."""
+    store = StationStore()
+    rows = []
+    for station in stations:
+        df = store.read(data_type, station, ["Data", *parameters], start_date, end_date)
+        if df is None or df.empty:
+            continue
+        x = to_ordinal(pd.to_datetime(df["Data"]).to_numpy())
+        for parameter in parameters:
+            origins, points, mae, rmse = rolling_origin_errors(x, df[parameter].to_numpy(np.float64), **options)
+            if origins:
+                rows.append(
+                    {
+                        "station": str(station),
+                        "parameter": parameter,
+                        "origins": origins,
+                        "points": points,
+                        "mae": mae,
+                        "rmse": rmse,
+                    }
+                )
+    return rows
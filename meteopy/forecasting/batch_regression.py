@@ -0,0 +1,53 @@
+from __future__ import annotations
+
+import numpy as np
+import pandas as pd
+
+# datetime.date(1970, 1, 1).toordinal() - przesunięcie między dniami od epoki a numerem dnia z `toordinal`
+EPOCH_ORDINAL = 719163
+
+
+def to_ordinal(dates: pd.Series | pd.DatetimeIndex | np.ndarray) -> np.ndarray:
+    """Wektorowy odpowiednik `date.toordinal()` dla tablicy dat."""
+    days = np.asarray(dates, dtype="datetime64[ns]").astype("datetime64[D]").astype(np.int64)
+    return days + EPOCH_ORDINAL
+
+
+def fit_linear_batch(
+    x: np.ndarray, y: np.ndarray, groups: np.ndarray, n_groups: int, x0: float = 0.0
+) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """Dopasowuje jednocześnie osobne proste y = a + b * x dla każdej grupy (metoda najmniejszych kwadratów).
+
+    Rozwiązanie ma postać zamkniętą: sumy potrzebne do równań normalnych liczone są dla wszystkich grup
+    jednym `np.bincount`. Wyniki są takie same jak z LinearRegression dopasowanej osobno do każdej grupy
+    (dla grupy z jedną obserwacją lub stałym x nachylenie wynosi 0, a wyraz wolny to średnia y).
+
+    Args:
+        x (np.ndarray): Zmienna objaśniająca (np. numer dnia).
+        y (np.ndarray): Zmienna objaśniana; wiersze z NaN są pomijane.
+        groups (np.ndarray): Numer grupy (0..n_groups-1) każdego wiersza.
+        n_groups (int): Liczba grup.
+        x0 (float): Punkt odniesienia x - sumy liczone są dla x - x0, co ogranicza błędy zaokrągleń.
+
+    Returns:
+        tuple[np.ndarray, np.ndarray, np.ndarray]: Liczność, nachylenie i wyraz wolny (dla x, nie x - x0)
+            każdej grupy. Grupy bez obserwacji mają nachylenie i wyraz wolny NaN.
+
+    """
+    valid = ~np.isnan(y)
+    x = np.asarray(x, dtype=np.float64)[valid] - x0
+    y = np.asarray(y, dtype=np.float64)[valid]
+    groups = np.asarray(groups)[valid]
+
+    n = np.bincount(groups, minlength=n_groups).astype(np.float64)
+    sum_x = np.bincount(groups, weights=x, minlength=n_groups)
+    sum_y = np.bincount(groups, weights=y, minlength=n_groups)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        mean_x, mean_y = sum_x / n, sum_y / n
+        dx = x - mean_x[groups]
+        sxx = np.bincount(groups, weights=dx * dx, minlength=n_groups)
+        sxy = np.bincount(groups, weights=dx * (y - mean_y[groups]), minlength=n_groups)
+        slope = np.where(sxx > 0, sxy / sxx, 0.0)
+    slope[n == 0] = np.nan
+    intercept = mean_y - slope * (mean_x + x0)
+    return n.astype(np.int64), slope, intercept
@@ -1,18 +1,29 @@
 from __future__ import annotations
 
 import os
+from concurrent.futures import ProcessPoolExecutor, as_completed
 
-import matplotlib.pyplot as plt
+import numpy as np
 import pandas as pd
 from sklearn.linear_model import LinearRegression
 from meteopy.utils.log_module import get_logger
 from meteopy.consts.dirs import Dirs
+from meteopy.eda.render_farm import ChartJob, RenderFarm, as_series
+from meteopy.forecasting.backtesting import BACKTEST_COLUMNS, _backtest_stations
+from meteopy.forecasting.batch_regression import fit_linear_batch, to_ordinal
+from meteopy.forecasting.model_cache import ModelCache
+from meteopy.preprocessing.processing_state import ProcessingState
+from meteopy.preprocessing.station_store import StationStore
+from meteopy.utils.station_catalog import StationCatalog
 
 
 class IMGWSimpleForecaster:
     def __init__(self):
         self.model = LinearRegression()
         self.logger = get_logger(__name__)
+        self.store = StationStore()
+        self.catalog = StationCatalog()
+        self.cache = ModelCache()
 
     def linear_regression_forecast(self, data_type: str, start_date: str, end_date: str, till_predict_date: str, stations: list[str], parameter: str):
         """Tworzy prosty model regresji liniowej do przewidywania wartości na podstawie danych historycznych.
@@ -37,12 +48,9 @@ class IMGWSimpleForecaster:
             if parameter not in parameter_list:
                 raise ValueError(f"Parameter {parameter} nie jest obsługiwany.")
             
-            file_path = os.path.join(Dirs.SEPARATED_DIR, data_type, f"{station}.csv")
-            df = pd.read_csv(file_path, encoding=Dirs.ENCODING)
-            
-            df["Data"] = pd.to_datetime(df["Data"])
-            df = df[df["Data"] >= start_date]
-            df = df[df["Data"] <= end_date]
+            df = self.store.read(data_type, station, ["Data", parameter], start_date, end_date)
+            if df is None:
+                return None, None, None, None, None
             
             # Przygotowanie danych treningowych           
             filtered_data = df[["Data", parameter]].dropna()
@@ -66,43 +74,280 @@ class IMGWSimpleForecaster:
 
             return X_train, y_train, X_predict_dates, predictions, filtered_data
 
-    def plot_forecast(self, data_type: str, start_date: str, end_date: str, till_predict_date: str, stations: list[str], parameter: str):
-        """Tworzy wykres wartości użytych do trenowania modelu oraz wartości przewidywanych.
+    def load_stations(
+        self, data_type: str, start_date: str, end_date: str, stations: list[str], parameters: list[str]
+    ) -> dict[str, pd.DataFrame]:
+        """Wczytuje raz dane stacji (kolumna 'Data' i parametry) z zakresu dat.
+
+        Returns:
+            dict[str, pd.DataFrame]: Dane każdej stacji, która istnieje i ma wiersze w zakresie.
+
+        """
+        frames = {}
+        for station in stations:
+            df = self.store.read(data_type, station, ["Data", *parameters], start_date, end_date)
+            if df is None or df.empty:
+                continue
+            frames[str(station)] = df
+        return frames
+
+    def batch_forecast(
+        self,
+        data_type: str,
+        start_date: str,
+        end_date: str,
+        till_predict_date: str,
+        stations: list[str],
+        parameters: list[str],
+        frames: dict[str, pd.DataFrame] | None = None,
+        use_cache: bool = True,
+    ) -> tuple[pd.DataFrame, pd.DataFrame]:
+        """Prognozuje regresją liniową wszystkie pary (stacja, parametr) jednocześnie.
+
+        Dane stacji wczytywane są raz, numery dni liczone wektorowo, a wszystkie proste dopasowywane jednym
+        obliczeniem w postaci zamkniętej (`fit_linear_batch`) - wynik jest taki sam jak
+        z `linear_regression_forecast`.
 
         Args:
-            data_type: Typ danych (np. 'temperature')
+            data_type: Typ danych (np. 'klimat')
             start_date: Data początkowa w formacie 'YYYY-MM-DD'
             end_date: Data końcowa w formacie 'YYYY-MM-DD'
             till_predict_date: Data do której przewidujemy wartości w formacie 'YYYY-MM-DD'
             stations: Lista stacji do uwzględnienia
-            parameter: Parameter do przewidywania
+            parameters: Parametry do przewidywania
+            frames: Wcześniej wczytane dane stacji (`load_stations`), aby nie czytać ich ponownie
+            use_cache: Czy korzystać z pamięci podręcznej modeli (`ModelCache`); modele stacji, których dane
+                się nie zmieniły, nie są dopasowywane ponownie, a dane stacji nie są wtedy wczytywane
+
+        Returns:
+            Tabela współczynników (station, parameter, n, slope, intercept) oraz tabela przewidywań
+            (station, parameter, Data, prediction) dla dni od end_date do till_predict_date.
 
         """
+        parameter_list = Dirs.PARAMETER_MAP.get(data_type)
+        for parameter in parameters:
+            if parameter not in parameter_list:
+                raise ValueError(f"Parameter {parameter} nie jest obsługiwany.")
+        start_key = pd.Timestamp(start_date).strftime("%Y-%m-%d")
+        end_key = pd.Timestamp(end_date).strftime("%Y-%m-%d")
+        fingerprints = {}
+        state = ProcessingState(data_type)
+        for station in map(str, stations):
+            fingerprint = ModelCache.fingerprint(data_type, station, state)
+            if fingerprint is not None:
+                fingerprints[station] = fingerprint
+
+        models = self.cache.get_many(data_type, start_key, end_key, fingerprints, parameters) if use_cache else {}
+        to_fit = [station for station in fingerprints if any((station, p) not in models for p in parameters)]
+        if to_fit:
+            if frames is None:
+                fit_frames = self.load_stations(data_type, start_date, end_date, to_fit, parameters)
+            else:
+                fit_frames = {station: frames[station] for station in to_fit if station in frames}
+            fitted = self._fit_frames(fit_frames, parameters, pd.Timestamp(start_date))
+            for station in to_fit:
+                if station not in fit_frames:  # brak wierszy w oknie treningowym
+                    fitted.update({(station, parameter): (0, np.nan, np.nan) for parameter in parameters})
+            models.update(fitted)
+            if use_cache:
+                self.cache.put_many(data_type, start_key, end_key, fingerprints, fitted)
+        self.logger.debug(f"Dopasowano {len(to_fit)} stacji, {len(fingerprints) - len(to_fit)} z pamięci podręcznej")
+
+        keys = [(station, parameter) for station in fingerprints for parameter in parameters]
+        coefficients = pd.DataFrame(
+            [(station, parameter, *models[(station, parameter)]) for station, parameter in keys],
+            columns=["station", "parameter", "n", "slope", "intercept"],
+        )
+        coefficients = coefficients[coefficients["n"] > 0].reset_index(drop=True)
+
+        predict_dates = pd.date_range(start=pd.Timestamp(end_date), end=pd.Timestamp(till_predict_date), freq="D")
+        x_predict = to_ordinal(predict_dates.to_numpy()).astype(np.float64)
+        intercept = coefficients["intercept"].to_numpy(np.float64)[:, None]
+        values = intercept + coefficients["slope"].to_numpy(np.float64)[:, None] * x_predict[None, :]
+        predictions = pd.DataFrame(
+            {
+                "station": np.repeat(coefficients["station"].to_numpy(), len(predict_dates)),
+                "parameter": np.repeat(coefficients["parameter"].to_numpy(), len(predict_dates)),
+                "Data": np.tile(predict_dates.to_numpy(), len(coefficients)),
+                "prediction": values.ravel(),
+            }
+        )
+        return coefficients, predictions
+
+    @staticmethod
+    def _fit_frames(
+        frames: dict[str, pd.DataFrame], parameters: list[str], start_date: pd.Timestamp
+    ) -> dict[tuple[str, str], tuple[int, float, float]]:
+        """Dopasowuje proste dla wszystkich par (stacja, parametr) jednym wywołaniem `fit_linear_batch`."""
+        station_ids = list(frames)
+        if not station_ids:
+            return {}
+        lengths = np.array([len(frames[station]) for station in station_ids], dtype=np.int64)
+        x = to_ordinal(np.concatenate([frames[station]["Data"].to_numpy() for station in station_ids]))
+        station_index = np.repeat(np.arange(len(station_ids)), lengths)
+        y = [
+            np.concatenate([frames[station][parameter].to_numpy(np.float64) for station in station_ids])
+            for parameter in parameters
+        ]
+        groups = [station_index * len(parameters) + p_index for p_index in range(len(parameters))]
+        n, slope, intercept = fit_linear_batch(
+            np.tile(x, len(parameters)),
+            np.concatenate(y),
+            np.concatenate(groups),
+            len(station_ids) * len(parameters),
+            float(to_ordinal(np.array([start_date]))[0]),
+        )
+        keys = [(station, parameter) for station in station_ids for parameter in parameters]
+        return {key: (int(n[i]), float(slope[i]), float(intercept[i])) for i, key in enumerate(keys)}
+
+    def plot_forecasts(
+        self,
+        data_type: str,
+        start_date: str,
+        end_date: str,
+        till_predict_date: str,
+        stations: list[str],
+        parameters: list[str],
+        workers: int = Dirs.RENDER_WORKERS,
+    ) -> pd.DataFrame:
+        """Tworzy wykresy prognoz dla wielu stacji i parametrów, wczytując dane i dopasowując modele jednorazowo.
+
+        Każdy wykres jest osobnym zleceniem (`ChartJob`) rysowanym równolegle przez `RenderFarm`; lista plików
+        trafia do manifestu Dirs.FORECAST_DIR/<typ>/Dirs.RENDER_MANIFEST_NAME.
+
+        Args:
+            data_type: Typ danych (np. 'klimat')
+            start_date: Data początkowa w formacie 'YYYY-MM-DD'
+            end_date: Data końcowa w formacie 'YYYY-MM-DD'
+            till_predict_date: Data do której przewidujemy wartości w formacie 'YYYY-MM-DD'
+            stations: Lista stacji do uwzględnienia (wszystkie dostępne, jeśli pusta)
+            parameters: Parametry do przewidywania (wszystkie parametry typu danych, jeśli pusta)
+            workers: Liczba procesów rysujących wykresy
+
+        Returns:
+            Tabela współczynników modeli (patrz `batch_forecast`).
+
+        """
+        if not parameters:
+            parameters = Dirs.PARAMETER_MAP[data_type]
         if not stations:
-            data_dir = os.path.join(Dirs.SEPARATED_DIR, data_type)
-            stations = [os.path.splitext(file)[0] for file in os.listdir(data_dir) if file.endswith(".csv")]
+            stations = Dirs.get_stations_id(data_type, start_date, end_date, parameters)
+        else:
+            stations = self.catalog.prune(data_type, stations, start_date, end_date, parameters)
 
-        for station in stations:
-            X_train, y_train, X_predict_dates, predictions, filtered_data = self.linear_regression_forecast(
-                data_type, start_date, end_date, till_predict_date, [station], parameter
+        frames = self.load_stations(data_type, start_date, end_date, stations, parameters)
+        coefficients, predictions = self.batch_forecast(
+            data_type, start_date, end_date, till_predict_date, stations, parameters, frames
+        )
+        if coefficients.empty:
+            self.logger.error("Training data is empty. Skipping forecast plot.")
+            return coefficients
+
+        output_dir = Dirs.FORECAST_DIR / data_type
+        jobs = []
+        for (station, parameter), predicted in predictions.groupby(["station", "parameter"], sort=False):
+            history = frames[station][["Data", parameter]].dropna()
+            jobs.append(
+                ChartJob(
+                    output_dir / f"{station}_{parameter.replace('/', '_')}_forecast.png",
+                    series=[
+                        as_series(history["Data"], history[parameter], "Dane historyczne"),
+                        as_series(predicted["Data"], predicted["prediction"], "Przewidywania", linestyle="--"),
+                    ],
+                    title=f"Przewidywania dla stacji {station}",
+                    xlabel="Data",
+                    ylabel=parameter,
+                    xticks_rotation=45,
+                )
             )
+        RenderFarm(workers).render(jobs, output_dir / Dirs.RENDER_MANIFEST_NAME)
+        return coefficients
+
+    def backtest(
+        self,
+        data_type: str,
+        start_date: str | None = None,
+        end_date: str | None = None,
+        stations: list[str] = [],
+        parameters: list[str] = [],
+        horizon: int = 30,
+        step: int = 30,
+        initial: int = 365,
+        window: int | None = None,
+        min_train: int = 30,
+        workers: int = 1,
+    ) -> pd.DataFrame:
+        """Ocenia jakość prognoz regresji liniowej metodą kolejnych punktów odcięcia (rolling origin).
+
+        Dla każdej pary (stacja, parametr) model trenowany jest w wielu punktach odcięcia i porównywany
+        z obserwacjami z następnych `horizon` dni (patrz `rolling_origin_errors`). Stacje rozdzielane są między
+        procesy robocze. Wynik zapisywany jest do Dirs.FORECAST_DIR/<typ>/BACKTEST.csv.
+
+        Args:
+            data_type: Typ danych (np. 'klimat')
+            start_date: Data początkowa w formacie 'YYYY-MM-DD' (opcjonalna)
+            end_date: Data końcowa w formacie 'YYYY-MM-DD' (opcjonalna)
+            stations: Lista stacji do uwzględnienia (wszystkie dostępne, jeśli pusta)
+            parameters: Parametry do oceny (wszystkie parametry typu danych, jeśli pusta)
+            horizon: Horyzont prognozy w dniach
+            step: Odstęp między punktami odcięcia w dniach
+            initial: Długość pierwszego okna treningowego w dniach
+            window: Długość okna przesuwnego w dniach (None - okno rosnące)
+            min_train: Minimalna liczba obserwacji treningowych w punkcie odcięcia
+            workers: Liczba procesów (1 - obliczenia w tym procesie)
+
+        Returns:
+            Tabela (station, parameter, origins, points, mae, rmse).
+
+        """
+        if not parameters:
+            parameters = Dirs.PARAMETER_MAP[data_type]
+        parameter_list = Dirs.PARAMETER_MAP.get(data_type)
+        for parameter in parameters:
+            if parameter not in parameter_list:
+                raise ValueError(f"Parameter {parameter} nie jest obsługiwany.")
+        if not stations:
+            stations = Dirs.get_stations_id(data_type, start_date, end_date, parameters)
+        else:
+            stations = self.catalog.prune(data_type, stations, start_date, end_date, parameters)
 
-            if X_train is None or y_train is None:
-                self.logger.error("Training data is empty. Skipping forecast plot.")
-                return
-
-            plt.figure(figsize=(15, 10))
-            plt.plot(filtered_data["date"], y_train, label="Dane historyczne")
-            plt.plot(X_predict_dates, predictions, label="Przewidywania", linestyle="--")
-            plt.xlabel("Data")
-            plt.ylabel(parameter)
-            plt.title(f"Przewidywania dla stacji {station}")
-            plt.legend()
-            plt.xticks(rotation=45)
-
-            output_dir = os.path.join(Dirs.FORECAST_DIR, data_type)
-            os.makedirs(output_dir, exist_ok=True)
-            output_file = os.path.join(output_dir, f"{station}_{parameter}_forecast.png")
-            plt.savefig(output_file, bbox_inches="tight")
-            plt.close()
-            print(f"Zapisano wykres do pliku: {output_file}")
+        options = {"horizon": horizon, "step": step, "initial": initial, "window": window, "min_train": min_train}
+        rows = []
+        if workers > 1 and len(stations) > 1:
+            batches = [stations[i::workers] for i in range(workers)]
+            with ProcessPoolExecutor(max_workers=workers) as executor:
+                futures = [
+                    executor.submit(_backtest_stations, data_type, batch, parameters, start_date, end_date, options)
+                    for batch in batches
+                    if batch
+                ]
+                for future in as_completed(futures):
+                    rows += future.result()
+        else:
+            rows = _backtest_stations(data_type, stations, parameters, start_date, end_date, options)
+
+        table = pd.DataFrame(rows, columns=BACKTEST_COLUMNS)
+        table = table.sort_values(["station", "parameter"], kind="stable", ignore_index=True)
+        if table.empty:
+            self.logger.error("Brak danych do oceny prognoz.")
+            return table
+        output_dir = os.path.join(Dirs.FORECAST_DIR, data_type)
+        os.makedirs(output_dir, exist_ok=True)
+        output_file = os.path.join(output_dir, "BACKTEST.csv")
+        table.to_csv(output_file, index=False, encoding=Dirs.ENCODING)
+        print(f"Zapisano wyniki oceny prognoz do pliku: {output_file}")
+        return table
+
+    def plot_forecast(self, data_type: str, start_date: str, end_date: str, till_predict_date: str, stations: list[str], parameter: str):
+        """Tworzy wykres wartości użytych do trenowania modelu oraz wartości przewidywanych.
+
+        Args:
+            data_type: Typ danych (np. 'temperature')
+            start_date: Data początkowa w formacie 'YYYY-MM-DD'
+            end_date: Data końcowa w formacie 'YYYY-MM-DD'
+            till_predict_date: Data do której przewidujemy wartości w formacie 'YYYY-MM-DD'
+            stations: Lista stacji do uwzględnienia
+            parameter: Parameter do przewidywania
+
+        """
+        return self.plot_forecasts(data_type, start_date, end_date, till_predict_date, stations, [parameter])
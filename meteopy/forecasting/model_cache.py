@@ -0,0 +1,140 @@
+from __future__ import annotations
+
+import hashlib
+import sqlite3
+import time
+from contextlib import closing
+from pathlib import Path
+
+from meteopy.consts.dirs import Dirs
+from meteopy.preprocessing.processing_state import ProcessingState
+from meteopy.utils.log_module import get_logger
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS models (
+    data_type TEXT NOT NULL,
+    station TEXT NOT NULL,
+    parameter TEXT NOT NULL,
+    start_date TEXT NOT NULL,
+    end_date TEXT NOT NULL,
+    fingerprint TEXT NOT NULL,
+    n INTEGER NOT NULL,
+    slope REAL,
+    intercept REAL,
+    last_used REAL NOT NULL,
+    PRIMARY KEY (data_type, station, parameter, start_date, end_date)
+);
+CREATE INDEX IF NOT EXISTS models_last_used ON models (last_used);
+"""
+
+
+class ModelCache:
+    """Trwała pamięć podręczna dopasowanych modeli regresji (SQLite w Dirs.MODEL_CACHE_PATH).
+
+    Kluczem jest typ danych, stacja, parametr i okno treningowe; przy każdym wpisie zapisany jest odcisk
+    zawartości przetworzonego pliku stacji (skrót sha256, patrz `fingerprint`). Gdy plik się zmieni (np.
+    preprocessing dopisze nowe dni albo przepisze dane bez zmiany rozmiaru), odcisk się nie zgadza i model
+    jest dopasowywany ponownie. Liczba wpisów jest ograniczona do `max_entries` - nadmiarowe, najdawniej
+    używane wpisy są usuwane (LRU). Wiersze mają stały rozmiar (klucz, odcisk i trzy liczby, ok. 300 B
+    z indeksami), więc limit wpisów ogranicza też rozmiar pliku (domyślnie ok. 30 MB).
+    """
+
+    def __init__(self, path: Path | None = None, max_entries: int = Dirs.MODEL_CACHE_MAX_ENTRIES):
+        self.path = path if path is not None else Dirs.MODEL_CACHE_PATH
+        self.max_entries = max_entries
+        self.logger = get_logger("ModelCache")
+
+    def _connect(self) -> sqlite3.Connection:
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        connection = sqlite3.connect(self.path)
+        connection.executescript(_SCHEMA)
+        return connection
+
+    @staticmethod
+    def fingerprint(data_type: str, station: str, state: ProcessingState | None = None) -> str | None:
+        """Odcisk zawartości przetworzonego pliku stacji (None, jeśli plik nie istnieje).
+
+        Jest to skrót sha256 zapisany przez preprocessing w `ProcessingState`, o ile wpis stanu opisuje
+        aktualny plik; w przeciwnym razie (plik zmieniony poza meteopy lub brak stanu) skrót liczony jest
+        z zawartości pliku.
+
+        Args:
+            data_type (str): Typ danych.
+            station (str): ID stacji.
+            state (ProcessingState, optional): Wczytany stan typu danych (przy wielu stacjach - wczytany raz).
+
+        """
+        processed_file = Dirs.SEPARATED_DIR / data_type / f"{station}.csv"
+        if not processed_file.exists():
+            return None
+        entry = (state if state is not None else ProcessingState(data_type)).get(station)
+        if ProcessingState.is_valid(entry, processed_file) and entry.get("sha256"):
+            return entry["sha256"]
+        digest = hashlib.sha256()
+        with open(processed_file, "rb") as file:
+            for block in iter(lambda: file.read(1024 * 1024), b""):
+                digest.update(block)
+        return f"file-{digest.hexdigest()}"
+
+    def get_many(
+        self, data_type: str, start_date: str, end_date: str, fingerprints: dict[str, str], parameters: list[str]
+    ) -> dict[tuple[str, str], tuple[int, float, float]]:
+        """Zwraca zapisane modele (n, slope, intercept) dla par (stacja, parametr) o aktualnym odcisku danych."""
+        if not fingerprints or not self.path.exists():
+            return {}
+        found = {}
+        with closing(self._connect()) as connection, connection:
+            rows = connection.execute(
+                "SELECT station, parameter, fingerprint, n, slope, intercept FROM models"
+                " WHERE data_type = ? AND start_date = ? AND end_date = ?"
+                f" AND station IN ({','.join('?' * len(fingerprints))})",
+                [data_type, start_date, end_date, *fingerprints],
+            ).fetchall()
+            for station, parameter, fingerprint, n, slope, intercept in rows:
+                if parameter in parameters and fingerprints[station] == fingerprint:
+                    # NaN (brak danych parametru) SQLite zapisuje jako NULL
+                    found[(station, parameter)] = (
+                        n,
+                        float("nan") if slope is None else slope,
+                        float("nan") if intercept is None else intercept,
+                    )
+            if found:
+                now = time.time()
+                connection.executemany(
+                    "UPDATE models SET last_used = ? WHERE data_type = ? AND station = ? AND parameter = ?"
+                    " AND start_date = ? AND end_date = ?",
+                    [(now, data_type, station, parameter, start_date, end_date) for station, parameter in found],
+                )
+        self.logger.debug(f"Znaleziono {len(found)} modeli w pamięci podręcznej")
+        return found
+
+    def put_many(
+        self,
+        data_type: str,
+        start_date: str,
+        end_date: str,
+        fingerprints: dict[str, str],
+        models: dict[tuple[str, str], tuple[int, float, float]],
+    ) -> None:
+        """Zapisuje modele (stacja, parametr) -> (n, slope, intercept) i usuwa najdawniej używane ponad limit."""
+        if not models:
+            return
+        now = time.time()
+        with closing(self._connect()) as connection, connection:
+            connection.executemany(
+                "INSERT OR REPLACE INTO models VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                [
+                    (data_type, station, parameter, start_date, end_date, fingerprints[station], *model, now)
+                    for (station, parameter), model in models.items()
+                ],
+            )
+            (count,) = connection.execute("SELECT COUNT(*) FROM models").fetchone()
+            if count > self.max_entries:
+                connection.execute(
+                    "DELETE FROM models WHERE rowid IN (SELECT rowid FROM models ORDER BY last_used LIMIT ?)",
+                    (count - self.max_entries,),
+                )
+
+    def clear(self) -> None:
+        if self.path.exists():
+            self.path.unlink()
@@ -1,5 +1,14 @@
 from __future__ import annotations
 
-from .imgw_handler import IMGWDataHandler
+from meteopy.utils.lazy_imports import attach
 
-__all__ = ["IMGWDataHandler"]
+__getattr__, __dir__, __all__ = attach(
+    __name__,
+    {
+        "IMGWDataHandler": ".imgw_handler",
+        "ProcessingState": ".processing_state",
+        "RollupStore": ".rollups",
+        "StationPartitionWriter": ".partition_writer",
+        "StationStore": ".station_store",
+    },
+)
@@ -1,70 +1,132 @@
 from __future__ import annotations
 
+import re
+import shutil
 import unicodedata
+from collections.abc import Iterable
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from io import BytesIO
 from pathlib import Path
-import time
+from typing import IO
 import numpy as np
 import pandas as pd
 
 from meteopy.consts.dirs import Dirs
-from meteopy.utils.log_module import get_logger
+from meteopy.data_fetchers.download_manifest import DownloadManifest
+from meteopy.preprocessing.imputation import fill_climatology, fill_linear, fill_rolling_mean
+from meteopy.preprocessing.partition_writer import StationPartitionWriter
+from meteopy.preprocessing.processing_state import ProcessingState
+from meteopy.preprocessing.rollups import RollupStore
+from meteopy.preprocessing.station_store import StationStore
+from meteopy.utils.log_module import ProgressLog, get_logger
+from meteopy.utils.station_catalog import StationCatalog
+
+_DATE_PATTERN = re.compile(rb",(\d{4}-\d{2}-\d{2})(?:,|\r?$)")
 
 
 class IMGWDataHandler:
     def __init__(self):
         self.logger = get_logger("IMGWDataHandler")
+        self.store = StationStore()
+        self.rollups = RollupStore()
 
 
 
-    def split_csv_by_station(self, csv_file: Path, output_dir: Path, encoding: str = Dirs.ENCODING):
+    def split_csv_by_station(
+        self,
+        csv_file: Path | IO[bytes],
+        output_dir: Path,
+        encoding: str = Dirs.ENCODING,
+        writer: StationPartitionWriter | None = None,
+    ) -> int:
         """Dzieli plik CSV na osobne pliki według nazwy stacji i roku.
 
         Args:
-            csv_file (Path): Ścieżka do pliku wejściowego.
+            csv_file (Path | IO[bytes]): Ścieżka do pliku wejściowego lub strumień (np. plik z archiwum ZIP).
             output_dir (Path): Katalog, w którym zapisane zostaną pliki wyjściowe.
             encoding (str): Kodowanie pliku wejściowego i wyjściowego.
+            writer (StationPartitionWriter, optional): Wspólny bufor zapisu dla wielu plików wejściowych.
+                Jeśli nie podano, tworzony jest na czas jednego pliku.
+
+        Returns:
+            int: Liczba podzielonych wierszy (0, jeśli pliku nie udało się wczytać).
 
         """
         try:
             df = pd.read_csv(csv_file, encoding=encoding)
         except Exception as e:
             self.logger.critical(f"Błąd wczytywania {csv_file}: {e}")
-            return
+            return 0
 
         if df.shape[1] < 3:
             self.logger.error(f"Plik {csv_file} ma niepoprawny format (za mało kolumn).")
-            return
+            return 0
 
         df.columns = ["ID", "Station", "Year", "Month", "Day"] + list(df.columns[5:])
 
-        for (id), group in df.groupby("ID"):
-            output_file = output_dir / f"{id}.csv"
-            file_exists = Path(output_file).exists()
-
-            group.to_csv(output_file, mode="a" if file_exists else "w",
-                         encoding=encoding, index=False, header=not file_exists)
-
-            self.logger.info(f"Zapisano tryb: {'dopisywanie' if file_exists else 'nowy plik'}")
+        if writer is None:
+            with StationPartitionWriter(output_dir, encoding) as own_writer:
+                own_writer.write_frame(df)
+        else:
+            writer.write_frame(df)
+        return len(df)
 
     def divide_downloaded(self, encoding=Dirs.ENCODING):
+        """Dzieli pobrane pliki z Dirs.DATA_DIR na surowe pliki stacji w Dirs.STAGING_DIR (czekające na preprocess)."""
         base_input_dir = Dirs.DATA_DIR
-        base_output_dir = Dirs.SEPARATED_DIR
+        base_output_dir = Dirs.STAGING_DIR
 
         for subdir in base_input_dir.iterdir():
             if subdir.is_dir():
                 output_subdir = base_output_dir / subdir.name
                 output_subdir.mkdir(parents=True, exist_ok=True)
 
-                for csv_file in subdir.rglob("*.csv"):
-                    self.split_csv_by_station(csv_file, output_subdir, encoding)
+                # pliki wejściowe są usuwane dopiero po zapisaniu wszystkich buforów
+                csv_files = list(subdir.rglob("*.csv"))
+                with (
+                    StationPartitionWriter(output_subdir, encoding) as writer,
+                    ProgressLog(self.logger, f"Podział plików {subdir.name}", "plików") as progress,
+                ):
+                    for csv_file in csv_files:
+                        progress.update(1, self.split_csv_by_station(csv_file, output_subdir, encoding, writer))
+
+                for csv_file in csv_files:
                     try:
                         csv_file.unlink()
                     except Exception:
                         self.logger.exception("Błąd podczas usuwania pliku %s", csv_file.name)
-                    else:
-                        self.logger.info(f"Usunięto plik: {csv_file.name}")
+                self.logger.info(f"Podzielono i usunięto {len(csv_files)} plików z {subdir.name}")
         self.logger.info("Podział plików zakończony.")
 
+    def divide_stream(
+        self,
+        members: Iterable[tuple[str, IO[bytes]]],
+        data_type: str,
+        encoding=Dirs.ENCODING,
+        manifest: DownloadManifest | None = None,
+    ):
+        """Dzieli na stacje pliki CSV podawane jako strumienie (np. prosto z pobieranych archiwów).
+
+        Args:
+            members (Iterable[tuple[str, IO[bytes]]]): Pary (nazwa pliku, strumień), np. z IMGWDataFetcher.stream_members.
+            data_type (str): Typ danych, wyznacza katalog Dirs.STAGING_DIR/<data_type>.
+            encoding (str): Kodowanie plików.
+            manifest (DownloadManifest, optional): Manifest pobierania uzupełniany przez źródło strumieni; zapisywany
+                dopiero po zapisaniu wszystkich buforów na dysk, aby nieudany zapis nie oznaczył archiwów
+                jako pobranych.
+
+        """
+        output_subdir = Dirs.STAGING_DIR / data_type
+        output_subdir.mkdir(parents=True, exist_ok=True)
+        with (
+            StationPartitionWriter(output_subdir, encoding) as writer,
+            ProgressLog(self.logger, f"Podział plików {data_type}", "plików") as progress,
+        ):
+            for _, stream in members:
+                progress.update(1, self.split_csv_by_station(stream, output_subdir, encoding, writer))
+        if manifest is not None:
+            manifest.save()
+
     def replace_with_na(self, data_frame: pd.DataFrame, column_indices: list[int]) -> pd.DataFrame:
         """Sprawdza, czy w DataFrame w kolumnie o podanym indeksie (lub liście indeksów) znajduje się wartość "8", a
         następnie zmienia dane w poprzedniej kolumnie w tym wierszu na NaN.
@@ -83,7 +145,9 @@ class IMGWDataHandler:
                 data_frame.loc[mask, data_frame.columns[col_index - 1]] = np.nan
         return data_frame
 
-    def fill_missing_data(self, data_frame: pd.DataFrame, value_cols: list[str], mode: int) -> pd.DataFrame:
+    def fill_missing_data(
+        self, data_frame: pd.DataFrame, value_cols: list[str], mode: int, measured: np.ndarray | None = None
+    ) -> pd.DataFrame:
         """Uzupełnia brakujące dane w DataFrame w zależności od wybranego trybu.
 
         Args:
@@ -93,11 +157,16 @@ class IMGWDataHandler:
                 1 - zostawia brakujące dane bez zmian.
                 2 - uzupełnia brakujące dane wartością z poprzedniego dnia.
                 3 - uzupełnia brakujące dane średnią z 50 poprzednich dni.
+                4 - interpoluje liniowo luki nie dłuższe niż Dirs.INTERPOLATION_MAX_GAP dni.
+                5 - uzupełnia brakujące dane średnią wieloletnią dla danego dnia roku.
+            measured (np.ndarray, optional): Maska wartości zmierzonych w `value_cols` dla trybu 3 (domyślnie
+                niepuste); wiersze już uzupełnione mają False (patrz `fill_rolling_mean`).
 
         Returns:
             pd.DataFrame: DataFrame z uzupełnionymi danymi.
 
         """
+        value_cols = list(value_cols)
         if mode == 1:
             # Tryb 1: zostawia brakujące dane bez zmian
             return data_frame
@@ -108,20 +177,34 @@ class IMGWDataHandler:
                 data_frame[col] = data_frame[col].ffill()
 
         elif mode == 3:
-            # Tryb 3: uzupełnia brakujące dane średnią z 50 poprzednich dni
-            for col in value_cols:
-                self.logger.debug("Checking {}".format(col))
-                data_frame.loc[0, col] = 0 if pd.isna(data_frame.loc[0, col]) else data_frame.loc[0, col]
-                start_time = time.time()
-                while data_frame[col].isna().sum() > 0:
-                    if time.time() - start_time >=1:
-                        self.logger.warning("problem z obliczeniem śrdniej, stosowanie 2 trybu")
-                        return self.fill_missing_data(data_frame, value_cols, 2)
-                    else:
-                        data_frame[col] = data_frame[col].fillna(data_frame[col].rolling(window=50, min_periods=1).mean())
+            # Tryb 3: średnia z 50 poprzednich dni (sumy skumulowane, wszystkie kolumny naraz)
+            data_frame[value_cols] = fill_rolling_mean(
+                data_frame[value_cols].to_numpy(dtype=np.float64), Dirs.IMPUTATION_WINDOW, measured
+            )
+
+        elif mode == 4:
+            # Tryb 4: interpolacja liniowa krótkich luk, położenie wierszy liczone w dniach
+            days = self._dates(data_frame).to_numpy().astype("datetime64[D]").astype(np.int64)
+            data_frame[value_cols] = fill_linear(
+                data_frame[value_cols].to_numpy(dtype=np.float64), Dirs.INTERPOLATION_MAX_GAP, days
+            )
+
+        elif mode == 5:
+            # Tryb 5: średnia wieloletnia dla dnia roku
+            day_of_year = self._dates(data_frame).dt.dayofyear.to_numpy()
+            data_frame[value_cols] = fill_climatology(data_frame[value_cols].to_numpy(dtype=np.float64), day_of_year)
         else:
-            self.logger.critical("Nieprawidłowy tryb. Wybierz 1, 2 lub 3.")
+            self.logger.critical("Nieprawidłowy tryb. Wybierz 1, 2, 3, 4 lub 5.")
         return data_frame
+
+    @staticmethod
+    def _dates(data_frame: pd.DataFrame) -> pd.Series:
+        """Zwraca daty wierszy z kolumny 'Data' lub z kolumn 'Year', 'Month', 'Day'."""
+        if "Data" in data_frame.columns:
+            return pd.to_datetime(data_frame["Data"])
+        return pd.to_datetime(
+            data_frame[["Year", "Month", "Day"]].rename(columns={"Year": "year", "Month": "month", "Day": "day"})
+        )
     
     def merge_to_date(self, data_frame: pd.DataFrame) -> pd.DataFrame:
         """Łączy kolumny z datą w jedną kolumnę. UWAGA: kolumny z datą muszą być nazwane 'Year', 'Month' i 'Day'.
@@ -141,94 +224,443 @@ class IMGWDataHandler:
 
         return data_frame
 
-    def preprocess(self, mode: int) -> None:
+    def read_raw(self, csv_file: Path, data_type: str) -> pd.DataFrame:
+        """Wczytuje surowy plik stacji zgodnie ze schematem Dirs.SCHEMA.
+
+        Wczytywane są tylko kolumny identyfikujące, wartości parametrów i ich statusy (przez `usecols`),
+        od razu w zwartych typach. Wartości ze statusem 8 (brak pomiaru) zamieniane są na NaN, a kolumny
+        statusów usuwane.
+
+        Args:
+            csv_file (Path): Surowy plik stacji.
+            data_type (str): Typ danych ('klimat', 'opad' lub 'synop').
+
+        Returns:
+            pd.DataFrame: Kolumny Dirs.ID_COLUMNS oraz parametry z Dirs.PARAMETER_MAP[data_type].
+
+        """
+        schema = Dirs.SCHEMA[data_type]
+        parameters = Dirs.PARAMETER_MAP[data_type]
+        value_columns = schema["value_columns"]
+        flag_columns = schema["flag_columns"]
+
+        names = dict(enumerate(Dirs.ID_COLUMNS))
+        names.update(zip(value_columns, parameters))
+        names.update({position: f"_status_{position}" for position in flag_columns})
+        dtype = {0: Dirs.DTYPES["Kod_stacji"], 1: Dirs.DTYPES["Nazwa_stacji"]}
+        dtype.update({position: Dirs.VALUE_DTYPE for position in value_columns + flag_columns})
+
+        df = pd.read_csv(
+            csv_file, encoding=Dirs.ENCODING, header=None, skiprows=1, usecols=list(names), dtype=dtype
+        ).rename(columns=names)
+
+        for value_position, flag_position in zip(value_columns, flag_columns):
+            df.loc[df[names[flag_position]] == 8, names[value_position]] = np.nan
+        df.drop(columns=[names[position] for position in flag_columns], inplace=True)
+
+        df[["Year", "Month", "Day"]] = df[["Year", "Month", "Day"]].apply(pd.to_numeric, errors="coerce")
+        df.dropna(subset=["Year", "Month", "Day"], inplace=True)
+        df = df.astype({column: Dirs.DTYPES[column] for column in ("Year", "Month", "Day")})
+        return df[Dirs.ID_COLUMNS + parameters]
+
+    @staticmethod
+    def _column_count(csv_file: Path) -> int:
+        return len(pd.read_csv(csv_file, encoding=Dirs.ENCODING, nrows=0).columns)
+
+    def _normalize(self, raw: pd.DataFrame) -> pd.DataFrame:
+        """Sortuje wiersze z `read_raw`, zostawia ostatni wiersz każdego dnia i łączy datę w kolumnę 'Data'."""
+        df = raw.drop_duplicates(subset=["Year", "Month", "Day"], keep="last")
+        df = df.sort_values(["Year", "Month", "Day"], ascending=[True, True, True], ignore_index=True)
+        return self.merge_to_date(df)
+
+    def _impute(
+        self,
+        df: pd.DataFrame,
+        data_type: str,
+        mode: int,
+        context: pd.DataFrame | None = None,
+        raw_context: pd.DataFrame | None = None,
+    ) -> pd.DataFrame:
+        """Uzupełnia braki w wierszach z `_normalize`.
+
+        Args:
+            df (pd.DataFrame): Wiersze stacji posortowane po dacie (Kod_stacji, Nazwa_stacji, Data, parametry).
+            data_type (str): Typ danych.
+            mode (int): Tryb uzupełniania brakujących danych (patrz `fill_missing_data`).
+            context (pd.DataFrame, optional): Przetworzone wiersze stacji bezpośrednio poprzedzające `df` -
+                używane tylko jako okno dla imputacji, nie są zwracane.
+            raw_context (pd.DataFrame, optional): Surowe wiersze z dat `context` - wskazują, które wartości
+                kontekstu zostały zmierzone (średnie trybu 3 liczone są tylko z pomiarów).
+
+        Returns:
+            pd.DataFrame: Przetworzone wiersze (Kod_stacji, Nazwa_stacji, Data, parametry).
+
+        """
+        schema = Dirs.SCHEMA[data_type]
+        parameters = Dirs.PARAMETER_MAP[data_type]
+
+        df = df.copy()
+        if context is not None and not context.empty:
+            context = context.assign(Data=pd.to_datetime(context["Data"]))
+            measured = None
+            if raw_context is not None:
+                fill = list(schema["fill"])
+                known = raw_context.set_index("Data")[fill].reindex(context["Data"]).notna().to_numpy()
+                measured = np.vstack([known, df[fill].notna().to_numpy()])
+            combined = self.fill_missing_data(
+                pd.concat([context, df], ignore_index=True), schema["fill"], mode, measured
+            )
+            df = combined.iloc[len(context) :].reset_index(drop=True)
+        else:
+            df = self.fill_missing_data(df, schema["fill"], mode)
+        df[schema["zero_fill"]] = df[schema["zero_fill"]].fillna(0)  # zera tam, gdzie średnie są bezsensu
+        df[parameters] = df[parameters].astype(Dirs.VALUE_DTYPE)
+        return df
+
+    @staticmethod
+    def raw_history_path(data_type: str, station: str) -> Path:
+        """Surowa historia stacji: wiersze z `_normalize` (bez imputacji), posortowane po dacie."""
+        return Dirs.RAW_DIR / data_type / f"{station}.csv"
+
+    @staticmethod
+    def _merge_rows(existing: pd.DataFrame, delta: pd.DataFrame) -> pd.DataFrame:
+        """Łączy wiersze po dacie; wiersz z `delta` zastępuje wiersz z tego samego dnia w `existing`."""
+        merged = pd.concat([existing, delta], ignore_index=True).drop_duplicates(subset="Data", keep="last")
+        return merged.sort_values("Data", kind="stable", ignore_index=True)
+
+    @staticmethod
+    def _to_csv(df: pd.DataFrame, header: bool = False) -> bytes:
+        return df.to_csv(index=False, header=header, lineterminator="\n").encode(Dirs.ENCODING)
+
+    @staticmethod
+    def _parse(header: bytes, lines: list[bytes]) -> pd.DataFrame:
+        return StationStore.to_typed(pd.read_csv(BytesIO(header + b"".join(lines)), encoding=Dirs.ENCODING))
+
+    @staticmethod
+    def _replace_from(csv_file: Path, offset: int, chunk: bytes) -> None:
+        """Zastępuje zawartość pliku od pozycji `offset` bajtami `chunk`."""
+        with open(csv_file, "r+b") as file:
+            file.seek(offset)
+            file.truncate()
+            file.write(chunk)
+
+    @classmethod
+    def _lines_since(cls, csv_file: Path, since: pd.Timestamp, extra_rows: int = 0) -> tuple[bytes, int, list[bytes]]:
+        """Czyta od końca posortowany po dacie plik stacji, aż dojdzie do wierszy sprzed `since`.
+
+        Args:
+            csv_file (Path): Plik z kolumną 'Data' (przetworzony plik lub surowa historia stacji).
+            since (pd.Timestamp): Pierwsza data zwracanych wierszy.
+            extra_rows (int): Liczba wierszy sprzed `since` zwracanych dodatkowo (np. okno imputacji).
+
+        Returns:
+            tuple[bytes, int, list[bytes]]: Nagłówek, pozycja pierwszego zwróconego wiersza w bajtach i wiersze.
+
+        """
+        first_date = since.strftime("%Y-%m-%d").encode()
+        with open(csv_file, "rb") as file:
+            header = file.readline()
+            file.seek(0, 2)
+            position = file.tell()
+            lines: list[bytes] = []
+            earlier = 0  # liczba wczytanych wierszy sprzed `since`
+            head = b""  # niepełny wiersz na początku wczytanego fragmentu
+            while position > len(header) and earlier <= extra_rows:
+                step = min(64 * 1024, position - len(header))
+                position -= step
+                file.seek(position)
+                block = file.read(step) + head
+                head = b""
+                if position > len(header):
+                    cut = block.find(b"\n") + 1
+                    if cut == 0:
+                        head = block
+                        continue
+                    head, block = block[:cut], block[cut:]
+                new_lines = block.splitlines(keepends=True)
+                earlier += sum(cls._line_date(line) < first_date for line in new_lines)
+                lines = new_lines + lines
+        skip = max(0, earlier - extra_rows)
+        offset = position + len(head) + sum(len(line) for line in lines[:skip])
+        return header, offset, lines[skip:]
+
+    @staticmethod
+    def _line_date(line: bytes) -> bytes:
+        match = _DATE_PATTERN.search(line)
+        return match.group(1) if match else b""
+
+    def preprocess_file(self, csv_file: Path, data_type: str, mode: int) -> str:
+        """Przetwarza w całości jeden surowy plik stacji (nadpisuje go wersją przetworzoną).
+
+        Args:
+            csv_file (Path): Plik stacji w Dirs.SEPARATED_DIR/<data_type>.
+            data_type (str): Typ danych ('klimat', 'opad' lub 'synop').
+            mode (int): Tryb uzupełniania brakujących danych (patrz `fill_missing_data`).
+
+        Returns:
+            str: 'processed', 'skipped' (plik już przetworzony) lub 'deleted' (plik uszkodzony i usunięty).
+
+        """
+        if data_type not in Dirs.SCHEMA:
+            raise ValueError(f"Nieznany typ danych: {data_type}")
+
+        n_columns = self._column_count(csv_file)
+        if n_columns == 3 + len(Dirs.PARAMETER_MAP[data_type]):
+            self.logger.warning(f"plik {csv_file} został już przeprocesowany lub jest uszkodzony")
+            return "skipped"
+        if n_columns != Dirs.SCHEMA[data_type]["raw_columns"]:
+            self.logger.critical(f"plik {csv_file} uszkodzony -> usuwanie")
+            csv_file.unlink()
+            return "deleted"
+
+        self.logger.debug(f"Filling missing data {csv_file}")
+        raw = self._normalize(self.read_raw(csv_file, data_type))
+        raw_file = self.raw_history_path(data_type, csv_file.stem)
+        raw_file.parent.mkdir(parents=True, exist_ok=True)
+        raw_file.write_bytes(self._to_csv(raw, header=True))
+        df = self._impute(raw, data_type, mode)
+        df.to_csv(csv_file, encoding=Dirs.ENCODING, index=False)
+        self.store.write(data_type, csv_file.stem, df)
+        self.rollups.update(data_type, csv_file.stem, df)
+        self.logger.debug(f"pomyślnie preprocessowano plik: {Path(csv_file).name}")
+        return "processed"
+
+    def preprocess_station(
+        self, station: str, data_type: str, mode: int, state: dict | None = None, catalogued: bool = True
+    ) -> tuple[str, dict | None, dict | None]:
+        """Przetwarza nowe surowe wiersze stacji z Dirs.STAGING_DIR i scala je z przetworzonym plikiem.
+
+        Nowe wiersze trafiają najpierw do surowej historii stacji (Dirs.RAW_DIR, wartości bez imputacji),
+        a w przetworzonym pliku przepisywany jest tylko fragment od pierwszej daty, na którą mogą wpłynąć:
+        zwykle są to same nowe dni dopisywane na końcu, a imputacja korzysta z końcówki (Dirs.IMPUTATION_WINDOW
+        wierszy) już przetworzonych danych. Wiersze z datami nie późniejszymi niż ostatni przetworzony dzień
+        (zaległe lata, korekty IMGW) powodują ponowne przetworzenie wszystkiego od najwcześniejszej z nich.
+        W trybie 4 przetwarzane są też ostatnie Dirs.INTERPOLATION_MAX_GAP dni, bo luka na styku danych może
+        zostać uzupełniona dopiero po dopisaniu nowych pomiarów, a tryb 5 (średnia wieloletnia) przelicza całą
+        stację. Wynik jest taki sam jak przy przetworzeniu całej historii naraz, a ponowne uruchomienie bez
+        nowych wierszy niczego nie zmienia. Surowe pliki w Dirs.SEPARATED_DIR (dawny układ) są najpierw
+        przetwarzane w całości.
+
+        Args:
+            station (str): ID stacji.
+            data_type (str): Typ danych.
+            mode (int): Tryb uzupełniania brakujących danych (patrz `fill_missing_data`).
+            state (dict, optional): Dotychczasowy wpis z ProcessingState dla stacji.
+            catalogued (bool): Czy stacja jest już w katalogu stacji. Jeśli nie, podsumowanie liczone jest
+                z całego przetworzonego pliku.
+
+        Returns:
+            tuple[str, dict | None, dict | None]: Status ('processed', 'appended', 'reprocessed', 'up-to-date',
+                'deleted'), nowy wpis stanu i podsumowanie dla StationCatalog (None, jeśli katalog nie wymaga zmian).
+
+        """
+        processed_file = Dirs.SEPARATED_DIR / data_type / f"{station}.csv"
+        staged_file = Dirs.STAGING_DIR / data_type / f"{station}.csv"
+        raw_file = self.raw_history_path(data_type, station)
+        processed_columns = 3 + len(Dirs.PARAMETER_MAP[data_type])
+
+        status = "up-to-date"
+        summary = None
+        if processed_file.exists() and self._column_count(processed_file) != processed_columns:
+            status = self.preprocess_file(processed_file, data_type, mode)
+            state = None
+        if processed_file.exists() and (
+            not catalogued
+            or not ProcessingState.is_valid(state, processed_file)
+            or not self.rollups.exists(data_type, station)
+        ):
+            state, summary = self._state_from_file(processed_file, data_type)
+
+        if not staged_file.exists():
+            return status, state, summary
+        if self._column_count(staged_file) != Dirs.SCHEMA[data_type]["raw_columns"]:
+            self.logger.critical(f"plik {staged_file} uszkodzony -> usuwanie")
+            staged_file.unlink()
+            return "deleted", state, summary
+
+        delta = self._normalize(self.read_raw(staged_file, data_type))
+        if delta.empty:
+            staged_file.unlink()
+            return status, state, summary
+        if processed_file.exists() and not raw_file.exists():
+            # pliki przetworzone przed wprowadzeniem surowej historii - lepsze przybliżenie nie jest dostępne
+            self.logger.warning(
+                f"Brak surowej historii stacji {station} - wcześniej uzupełnione wartości traktowane są jak pomiary"
+            )
+            raw_file.parent.mkdir(parents=True, exist_ok=True)
+            shutil.copyfile(processed_file, raw_file)
+
+        if not processed_file.exists() or mode == 5:
+            raw = delta
+            if raw_file.exists():
+                raw = self._merge_rows(StationStore.to_typed(pd.read_csv(raw_file, encoding=Dirs.ENCODING)), delta)
+            raw_file.parent.mkdir(parents=True, exist_ok=True)
+            raw_file.write_bytes(self._to_csv(raw, header=True))
+
+            processed_file.parent.mkdir(parents=True, exist_ok=True)
+            df = self._impute(raw, data_type, mode)
+            chunk = self._to_csv(df, header=True)
+            processed_file.write_bytes(chunk)
+            self.store.write(data_type, station, df)
+            self.rollups.update(data_type, station, df)
+            summary = StationCatalog.summarize(df, data_type, processed_file)
+            staged_file.unlink()
+            status = "processed" if state is None else "reprocessed"
+            high_water_mark = df["Data"].max().strftime("%Y-%m-%d")
+            return status, ProcessingState.next_entry(None, processed_file, high_water_mark, len(df), chunk), summary
+
+        high_water_mark = pd.Timestamp(state["high_water_mark"])
+        start = delta["Data"].min()
+        backfill = start <= high_water_mark
+        if backfill:
+            self.logger.info(
+                f"Stacja {station}: wiersze sprzed ostatniej przetworzonej daty ({high_water_mark:%Y-%m-%d}) - "
+                f"ponowne przetwarzanie od {start:%Y-%m-%d}"
+            )
+        rewrite = backfill
+        if mode == 4:
+            start = min(start, high_water_mark - pd.Timedelta(days=Dirs.INTERPOLATION_MAX_GAP))
+            rewrite = True
+
+        # surowa historia: wiersze od `start` scalone z nowymi; wcześniejsze wiersze okna imputacji zostają
+        # bez zmian i wskazują, które wartości kontekstu były zmierzone
+        raw_header, raw_offset, raw_lines = self._lines_since(raw_file, start, Dirs.IMPUTATION_WINDOW)
+        history = self._parse(raw_header, raw_lines)
+        before = (history["Data"] < start).to_numpy()
+        raw = self._merge_rows(history[~before], delta)
+        raw_offset += sum(len(line) for line, keep in zip(raw_lines, before) if keep)
+        self._replace_from(raw_file, raw_offset, self._to_csv(raw))
+
+        # przetworzony plik: wiersze sprzed `start` zostają, od `start` są zastępowane; przy przepisywaniu
+        # wczytywany jest cały rok `start`, z którego przeliczane są agregaty okresowe
+        since = pd.Timestamp(start.year, 1, 1) if rewrite else start
+        store_current = self.store.has_parquet(data_type, station)  # przed zmianą pliku CSV
+        header, offset, lines = self._lines_since(processed_file, since, Dirs.IMPUTATION_WINDOW)
+        existing = self._parse(header, lines)
+        kept = (existing["Data"] < start).to_numpy()
+        df = self._impute(raw, data_type, mode, existing[kept].tail(Dirs.IMPUTATION_WINDOW), history[before])
+        chunk = self._to_csv(df)
+        offset += sum(len(line) for line, keep in zip(lines, kept) if keep)
+        self._replace_from(processed_file, offset, chunk)
+
+        removed = existing[~kept]
+        self.store.append(data_type, station, df, rebuild=not store_current)
+        if rewrite:
+            period_rows = pd.concat([existing[kept & (existing["Data"] >= since).to_numpy()], df], ignore_index=True)
+            self.rollups.update(data_type, station, period_rows, replace=False, replace_periods=True)
+        else:
+            self.rollups.update(data_type, station, df, replace=False)
+        appended = StationCatalog.summarize(df, data_type, processed_file, replace=False, removed=removed)
+        summary = appended if summary is None else StationCatalog.merge(summary, appended)
+        status = "reprocessed" if backfill else "appended"
+
+        staged_file.unlink()
+        high_water_mark = max(high_water_mark, df["Data"].max()).strftime("%Y-%m-%d")
+        entry = ProcessingState.next_entry(
+            state, processed_file, high_water_mark, len(df) - len(removed), chunk, offset if rewrite else None
+        )
+        return status, entry, summary
+
+    def _state_from_file(self, processed_file: Path, data_type: str) -> tuple[dict, dict]:
+        """Odtwarza wpis stanu, podsumowanie katalogu i agregaty okresowe na podstawie całego przetworzonego
+        pliku (gdy brak wpisu, plik zmieniono, stacji nie ma w katalogu lub brak agregatów)."""
+        self.logger.debug(f"Odtwarzanie stanu przetworzenia z pliku {processed_file}")
+        df = pd.read_csv(processed_file, encoding=Dirs.ENCODING)
+        self.rollups.update(data_type, processed_file.stem, df)
+        dates = pd.to_datetime(df["Data"])
+        entry = ProcessingState.next_entry(
+            None, processed_file, dates.max().strftime("%Y-%m-%d"), len(dates), processed_file.read_bytes()
+        )
+        return entry, StationCatalog.summarize(df, data_type, processed_file)
+
+    def preprocess(self, mode: int, workers: int = 1) -> dict[Path, str]:
         """Przetwarza dane meteorologiczne.
 
+        Przetwarzane są tylko nowe surowe wiersze z Dirs.STAGING_DIR (patrz `preprocess_station`), więc
+        codzienna aktualizacja kosztuje tyle, ile nowych danych, a nie całej historii.
+
         Args:
-        mode (int): Tryb uzupełniania brakujących danych:
+        mode (int): Tryb uzupełniania brakujących danych (patrz `fill_missing_data`):
             1 - zostawia brakujące dane bez zmian.
             2 - uzupełnia brakujące dane wartością z poprzedniego dnia.
             3 - uzupełnia brakujące dane średnią z 50 poprzednich dni.
+            4 - interpoluje liniowo krótkie luki.
+            5 - uzupełnia brakujące dane średnią wieloletnią dla danego dnia roku.
+        workers (int): Liczba procesów przetwarzających pliki stacji równolegle (1 - przetwarzanie w tym procesie).
+
+        Returns:
+            dict[Path, str]: Wynik dla każdego pliku stacji: 'processed', 'appended', 'reprocessed', 'up-to-date',
+                'deleted' lub 'error: <opis>'.
 
         """
-        Directory = Dirs.SEPARATED_DIR / "klimat"
-        if Directory.exists():
+        results = {}
+        catalog = StationCatalog()
+        for data_type in Dirs.DATA_TYPES:
+            Directory = Dirs.SEPARATED_DIR / data_type
+            staging_dir = Dirs.STAGING_DIR / data_type
+            if not Directory.exists() and not staging_dir.exists():
+                continue
             self.logger.info(f"Preprocessowanie {Path(Directory).name}")
-            for csv_file in Directory.glob("*.csv"):
-                df = pd.read_csv(csv_file, encoding=Dirs.ENCODING, dtype={15: str})
-                if df.shape[1] ==9:
-                    self.logger.warning(f"plik {csv_file} został już przeprocesowany lub jest uszkodzony")
-                    continue
-                elif df.shape[1] != 18:
-                    self.logger.critical(f"plik {csv_file} uszkodzony -> usuwanie")
-                    csv_file.unlink()
-                    continue
-                df = self.replace_with_na( df, [6,8,10,12,14,17])
-                df[['Year', 'Month', 'Day']] = df[['Year', 'Month', 'Day']].apply(pd.to_numeric, errors='coerce')
-                df.dropna(subset=['Year', 'Month', 'Day'], inplace=True)
-                df.drop(columns=df.columns[[6,8,10,12,14,15,17]], inplace=True)
-                self.logger.debug("Usunięto kolumny z niepotrzebnymi danymi")
-                df.columns=["Kod_stacji", "Nazwa_stacji", "Year", "Month", "Day", "Maksymalna_temperatura_dobowa_[C]", "Minimalna_temperatura_dobowa_[C]", "Srednia_temperatura_dobowa_[C]", "Temperatura_minimalna_przy_gruncie_[C]", "Suma_dobowa_opadow_[mm]", "Wysokosc_pokrywy_snieznej_[cm]"]
-                df.sort_values( ['Year', 'Month', 'Day'], ascending=[True, True, True], inplace=True )
-
-                self.logger.debug("Filling missing data")
-                df = self.fill_missing_data(df, df.columns[[6,7,8]], mode)
-                df[df.columns[[9,10]]] = df[df.columns[[9,10]]].fillna(0)
-                self.logger.debug("Zmiana daty")
-                df=self.merge_to_date(df)
-                df.to_csv(csv_file, encoding=Dirs.ENCODING, index=False)
-                
-            self.logger.info(f"pomyślnie przetworzono katalog: {Directory}")
-
-
-        Directory = Dirs.SEPARATED_DIR / "opad"
-        if Directory.exists():
-            self.logger.info(f"Preprocessowanie {Path(Directory).name}")
-            for csv_file in Directory.glob("*.csv"):
-                df = pd.read_csv(csv_file, encoding=Dirs.ENCODING, dtype={15: str})
-                if df.shape[1] == 6:
-                    self.logger.warning(f"plik {csv_file} został już przeprocesowany lub jest uszkodzony")
-                    continue
-                if df.shape[1] != 16:
-                    self.logger.critical(f"plik {csv_file} uszkodzony -> usuwanie")
-                    csv_file.unlink()
-                    continue
-                df = self.replace_with_na(df, [6, 9, 11])
-                df[["Year", "Month", "Day"]] = df[["Year", "Month", "Day"]].apply(pd.to_numeric, errors="coerce")
-                df.dropna(subset=["Year", "Month", "Day"], inplace=True)
-                df.drop(columns=df.columns[[6, 7, 9, 11, 12, 13, 14, 15]], inplace=True)
-                df.columns = ["Kod_stacji", "Nazwa_stacji", "Year", "Month", "Day", "Suma_dobowa_opadow_[mm]", "Wysokosc_pokrywy_sniesnej_[cm]", "Wysokosc_swiezospalego_sniegu_[cm]"]
-                df.sort_values(["Year", "Month", "Day"], ascending=[True, True, True], inplace=True)
-                self.logger.debug(f"Filling missing data {csv_file}")
-                df = self.fill_missing_data(df, df.columns[[5]], mode)      # uzupełnia dane wydług trybu
-                df[df.columns[[6, 7]]] = df[df.columns[[6, 7]]].fillna(0)       # uzupełnia dane n/a zerami tam gdzie średnie są bezsensu
-                self.logger.debug("merging: {csv_file}")
-                df = self.merge_to_date(df)
-                df.to_csv(csv_file, encoding=Dirs.ENCODING, index=False)
-            self.logger.info(f"pomyślnie przetworzono katalog: {Directory}")
-
-        Directory = Dirs.SEPARATED_DIR / "synop"
-        if Directory.exists():
-            self.logger.info(f"Preprocessowanie {Path(Directory).name}")
-            for csv_file in Directory.glob("*.csv"):
-                df = pd.read_csv(csv_file, encoding=Dirs.ENCODING, dtype={15: str})
-                if df.shape[1] == 12:
-                    self.logger.warning(f"plik {csv_file} został już przeprocesowany lub jest uszkodzony")
-                    continue
-                if df.shape[1] != 23:
-                    self.logger.critical(f"plik {csv_file} uszkodzony -> usuwanie")
-                    csv_file.unlink()
-                    continue
-                df = self.replace_with_na(df, [6, 8, 10, 12, 14, 16, 18, 20, 22])
-                df[["Year", "Month", "Day"]] = df[["Year", "Month", "Day"]].apply(pd.to_numeric, errors="coerce")
-                df.dropna(subset=["Year", "Month", "Day"], inplace=True)
-                df.drop(columns=df.columns[[6, 8, 10, 12, 14, 16, 18, 20, 22]], inplace=True)
-                df.columns = ["Kod_stacji", "Nazwa_stacji", "Year", "Month", "Day", "Zachmurzenie_[oktany]", "Srednia_dobowa_predkosc_wiatru_[m/s]", "Srednia_temperatura_dobowa_[C]", "Srednia_dobowe_cisnienie_pary_wodnej_[hPa]", "Srednia_dobowa_wilgotnosc_wzgledna_[%]", "Srednia_dobowe_cisnienie_na_poziomie_stacji_[hPa]", "Srednie_dobowe_cisnienie_na_pozimie_morza_[hPa]", "Suma_opadu_dzien_[mm]", "Suma_opadu_noc_[mm]"]
-
-                df.sort_values(["Year", "Month", "Day"], ascending=[True, True, True], inplace=True)
-                df = self.fill_missing_data(df, df.columns[[5, 6, 7, 8, 9, 10, 11]], mode)
-                df[df.columns[[12, 13]]] = df[df.columns[[12, 13]]].fillna(0)
-                df = self.merge_to_date(df)
-                df.to_csv(csv_file, encoding=Dirs.ENCODING, index=False)
-                self.logger.debug(f"pomyślnie preprocessowano plik: {Path(csv_file).name}")
-            self.logger.info(f"pomyślnie przetworzono katalog: {Directory}")
+            state = ProcessingState(data_type)
+            stations = sorted({f.stem for f in Directory.glob("*.csv")} | {f.stem for f in staging_dir.glob("*.csv")})
+            catalogued = set(catalog.stations(data_type))
+            progress = ProgressLog(self.logger, f"Preprocessowanie {data_type}", "stacji")
+
+            def collect(station: str, outcome: tuple[str, dict | None, dict | None]) -> None:
+                progress.update()
+                results[Directory / f"{station}.csv"], entry, summary = outcome
+                state.set(station, entry)
+                if summary is not None:
+                    catalog.update(data_type, station, summary)
+                elif not (Directory / f"{station}.csv").exists():
+                    catalog.remove(data_type, station)
+
+            if workers > 1 and len(stations) > 1:
+                with ProcessPoolExecutor(max_workers=workers) as executor:
+                    futures = {
+                        executor.submit(
+                            _preprocess_station_worker,
+                            station,
+                            data_type,
+                            mode,
+                            state.get(station),
+                            station in catalogued,
+                        ): station
+                        for station in stations
+                    }
+                    for future in as_completed(futures):
+                        station = futures[future]
+                        try:
+                            collect(station, future.result())
+                        except Exception as e:
+                            self.logger.error(f"Błąd przetwarzania stacji {station}: {e}")
+                            results[Directory / f"{station}.csv"] = f"error: {e}"
+            else:
+                for station in stations:
+                    try:
+                        outcome = self.preprocess_station(
+                            station, data_type, mode, state.get(station), station in catalogued
+                        )
+                        collect(station, outcome)
+                    except Exception as e:
+                        self.logger.exception(f"Błąd przetwarzania stacji {station}")
+                        results[Directory / f"{station}.csv"] = f"error: {e}"
+            state.save()
+            progress.close()
+
+            statuses = [results[Directory / f"{station}.csv"] for station in stations]
+            errors = sum(status.startswith("error") for status in statuses)
+            self.logger.info(
+                f"pomyślnie przetworzono katalog: {Directory} "
+                f"(nowe: {statuses.count('processed')}, uzupełnione: {statuses.count('appended')}, "
+                f"przeliczone: {statuses.count('reprocessed')}, "
+                f"bez zmian: {statuses.count('up-to-date')}, usunięte: {statuses.count('deleted')}, błędy: {errors})"
+            )
+        return results
+
+
+def _preprocess_station_worker(
+    station: str, data_type: str, mode: int, state: dict | None, catalogued: bool
+) -> tuple[str, dict | None, dict | None]:
+    """Funkcja uruchamiana w procesie roboczym puli (musi być zdefiniowana na poziomie modułu)."""
+    return IMGWDataHandler().preprocess_station(station, data_type, mode, state, catalogued)
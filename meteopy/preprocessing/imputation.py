@@ -0,0 +1,124 @@
+from __future__ import annotations
+
+import numpy as np
+
+
+def _as_2d(values: np.ndarray) -> np.ndarray:
+    out = np.array(values, dtype=np.float64, copy=True)
+    return out.reshape(-1, 1) if out.ndim == 1 else out
+
+
+def fill_rolling_mean(values: np.ndarray, window: int = 50, measured: np.ndarray | None = None) -> np.ndarray:
+    """Uzupełnia braki średnią zmierzonych wartości z `window` poprzednich wierszy.
+
+    Średnie wszystkich wierszy liczone są naraz z sum skumulowanych wartości zmierzonych i ich liczby, więc
+    koszt jest liniowy względem liczby wierszy, a wszystkie kolumny przetwarzane są jednocześnie. Brak
+    w pierwszym wierszu zastępowany jest zerem (nie wchodzi do średnich). Wiersze luk dłuższych niż okno,
+    bez żadnego pomiaru w oknie, dostają wartość poprzedniego wiersza.
+
+    Args:
+        values (np.ndarray): Tablica (n,) lub (n, k) posortowana chronologicznie.
+        window (int): Liczba poprzednich wierszy, z których liczona jest średnia.
+        measured (np.ndarray, optional): Maska wartości zmierzonych o kształcie `values` (domyślnie niepuste).
+            Pozwala podać na początku wiersze już uzupełnione (kontekst z poprzedniego przetwarzania): ich
+            wartości nie wchodzą do średnich, ale mogą zostać przeniesione do kolejnej długiej luki.
+
+    Returns:
+        np.ndarray: Uzupełniona kopia tablicy (n, k) typu float64.
+
+    """
+    out = _as_2d(values)
+    n = out.shape[0]
+    if n == 0:
+        return out
+    missing = np.isnan(out)
+    measured = ~missing if measured is None else _as_2d(measured).astype(bool) & ~missing
+    out[0, missing[0]] = 0
+
+    zeros = np.zeros((1, out.shape[1]))
+    sums = np.concatenate([zeros, np.cumsum(np.where(measured, out, 0.0), axis=0)])
+    counts = np.concatenate([zeros, np.cumsum(measured, axis=0)])
+    rows = np.arange(n)
+    first = np.maximum(rows - window, 0)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        means = (sums[rows] - sums[first]) / (counts[rows] - counts[first])
+    missing[0] = False
+    out[missing] = means[missing]
+
+    # luki dłuższe niż okno: wartość ostatniego uzupełnionego wiersza
+    empty = np.isnan(out)
+    if empty.any():
+        last = np.maximum.accumulate(np.where(empty, 0, rows[:, None]), axis=0)
+        out = np.take_along_axis(out, last, axis=0)
+    return out
+
+
+def fill_linear(values: np.ndarray, max_gap: int, positions: np.ndarray | None = None) -> np.ndarray:
+    """Interpoluje liniowo luki nie dłuższe niż `max_gap` (luki na brzegach zostają bez zmian).
+
+    Długość luki mierzona jest na osi `positions`: luka między pomiarami w punktach p i q ma długość q - p - 1,
+    więc pojedynczy brakujący wiersz między datami odległymi o kilka tygodni nie jest interpolowany.
+    Bez `positions` długość luki to liczba kolejnych brakujących wierszy.
+
+    Args:
+        values (np.ndarray): Tablica (n,) lub (n, k) posortowana chronologicznie.
+        max_gap (int): Maksymalna długość luki, która zostanie uzupełniona.
+        positions (np.ndarray, optional): Położenie wierszy na osi czasu (np. numer dnia). Domyślnie 0..n-1.
+
+    Returns:
+        np.ndarray: Uzupełniona kopia tablicy (n, k) typu float64.
+
+    """
+    out = _as_2d(values)
+    n = out.shape[0]
+    if n == 0:
+        return out
+    rows = np.arange(n)[:, None]
+    x = np.arange(n, dtype=np.float64) if positions is None else np.asarray(positions, dtype=np.float64)
+
+    valid = ~np.isnan(out)
+    prev = np.maximum.accumulate(np.where(valid, rows, -1), axis=0)
+    next_ = np.minimum.accumulate(np.where(valid, rows, n)[::-1], axis=0)[::-1]
+    prev_safe = np.clip(prev, 0, n - 1)
+    next_safe = np.clip(next_, 0, n - 1)
+    x_prev = x[prev_safe]
+    x_next = x[next_safe]
+    gap = x_next - x_prev - 1
+    fill = ~valid & (prev >= 0) & (next_ < n) & (gap <= max_gap)
+    if not fill.any():
+        return out
+
+    y_prev = np.take_along_axis(out, prev_safe, axis=0)
+    y_next = np.take_along_axis(out, next_safe, axis=0)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        frac = (x[:, None] - x_prev) / (x_next - x_prev)
+    out[fill] = (y_prev + frac * (y_next - y_prev))[fill]
+    return out
+
+
+def fill_climatology(values: np.ndarray, day_of_year: np.ndarray) -> np.ndarray:
+    """Uzupełnia braki średnią wieloletnią ze zmierzonych wartości dla tego samego dnia roku.
+
+    Dni roku, dla których nie ma żadnego pomiaru, zostają bez zmian.
+
+    Args:
+        values (np.ndarray): Tablica (n,) lub (n, k).
+        day_of_year (np.ndarray): Dzień roku (1-366) dla każdego wiersza.
+
+    Returns:
+        np.ndarray: Uzupełniona kopia tablicy (n, k) typu float64.
+
+    """
+    out = _as_2d(values)
+    doy = np.asarray(day_of_year, dtype=np.int64)
+    for col in range(out.shape[1]):
+        column = out[:, col]
+        valid = ~np.isnan(column)
+        if valid.all() or not valid.any():
+            continue
+        sums = np.bincount(doy[valid], weights=column[valid], minlength=367)
+        counts = np.bincount(doy[valid], minlength=367)
+        with np.errstate(invalid="ignore", divide="ignore"):
+            climate = sums / counts
+        column[~valid] = climate[doy[~valid]]
+    return out
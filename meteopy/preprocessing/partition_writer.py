@@ -0,0 +1,121 @@
+from __future__ import annotations
+
+from collections import OrderedDict
+from pathlib import Path
+from typing import IO
+
+import numpy as np
+import pandas as pd
+
+from meteopy.consts.dirs import Dirs
+from meteopy.utils.log_module import get_logger
+
+
+class StationPartitionWriter:
+    """Buforowany zapis wierszy do plików <ID stacji>.csv.
+
+    Wiersze każdej stacji są zbierane w pamięci do łącznego limitu `buffer_bytes`, a następnie zapisywane
+    dużymi porcjami (najpierw największe bufory). Otwarte pliki trzymane są w LRU o rozmiarze `max_open_files`,
+    więc dopisywanie do tysiąca stacji z setek plików wejściowych nie otwiera i nie zamyka pliku na każdą grupę.
+    Nagłówek jest zapisywany tylko do nowych plików, tak jak przy `to_csv(mode="a", header=not file_exists)`.
+    """
+
+    def __init__(
+        self,
+        output_dir: Path,
+        encoding: str = Dirs.ENCODING,
+        buffer_bytes: int = Dirs.PARTITION_BUFFER_BYTES,
+        max_open_files: int = Dirs.PARTITION_MAX_OPEN_FILES,
+    ):
+        self.output_dir = output_dir
+        self.encoding = encoding
+        self.buffer_bytes = buffer_bytes
+        self.max_open_files = max(1, max_open_files)
+        self.logger = get_logger("StationPartitionWriter")
+
+        self._buffers: dict[str, list[str]] = {}
+        self._buffer_sizes: dict[str, int] = {}
+        self._buffered = 0
+        self._handles: OrderedDict[str, IO[str]] = OrderedDict()
+        self._known_stations: set[str] = set()
+        self.rows_written = 0
+
+    def __enter__(self) -> StationPartitionWriter:
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+    def write_frame(self, df: pd.DataFrame, key: str = "ID") -> int:
+        """Dzieli DataFrame według kolumny `key` i buforuje wiersze każdej stacji.
+
+        Cały DataFrame jest zamieniany na tekst CSV jednym wywołaniem `to_csv`, a potem cięty na zakresy stacji.
+
+        Returns:
+            int: Liczba stacji w DataFrame.
+
+        """
+        if df.empty:
+            return 0
+        df = df.sort_values(key, kind="stable")
+        header = df.iloc[:0].to_csv(index=False, lineterminator="\n")
+        lines = df.to_csv(index=False, header=False, lineterminator="\n").splitlines(keepends=True)
+
+        ids = df[key].to_numpy()
+        bounds = [0, *(np.flatnonzero(ids[1:] != ids[:-1]) + 1), len(ids)]
+        for start, end in zip(bounds[:-1], bounds[1:]):
+            self.write_rows(str(ids[start]), "".join(lines[start:end]), header)
+        self.rows_written += len(ids)
+        return len(bounds) - 1
+
+    def write_rows(self, station: str, text: str, header: str) -> None:
+        """Buforuje gotowe wiersze CSV stacji (nagłówek dodawany jest tylko do nowego pliku)."""
+        if station not in self._known_stations:
+            self._known_stations.add(station)
+            if not (self.output_dir / f"{station}.csv").exists():
+                text = header + text
+        self._buffers.setdefault(station, []).append(text)
+        self._buffer_sizes[station] = self._buffer_sizes.get(station, 0) + len(text)
+        self._buffered += len(text)
+        if self._buffered > self.buffer_bytes:
+            self._flush_largest(self.buffer_bytes // 2)
+
+    def _flush_largest(self, target: int) -> None:
+        for station in sorted(self._buffer_sizes, key=self._buffer_sizes.get, reverse=True):
+            if self._buffered <= target:
+                break
+            self._flush_station(station)
+
+    def _handle(self, station: str) -> IO[str]:
+        handle = self._handles.get(station)
+        if handle is not None:
+            self._handles.move_to_end(station)
+            return handle
+        if len(self._handles) >= self.max_open_files:
+            _, oldest = self._handles.popitem(last=False)
+            oldest.close()
+        handle = open(self.output_dir / f"{station}.csv", "a", encoding=self.encoding, newline="")
+        self._handles[station] = handle
+        return handle
+
+    def _flush_station(self, station: str) -> None:
+        chunks = self._buffers.pop(station, None)
+        if not chunks:
+            return
+        self._handle(station).write("".join(chunks))
+        self._buffered -= self._buffer_sizes.pop(station)
+
+    def flush(self) -> None:
+        """Zapisuje wszystkie bufory na dysk."""
+        for station in list(self._buffers):
+            self._flush_station(station)
+        for handle in self._handles.values():
+            handle.flush()
+
+    def close(self) -> None:
+        """Zapisuje bufory i zamyka wszystkie otwarte pliki."""
+        self.flush()
+        while self._handles:
+            _, handle = self._handles.popitem()
+            handle.close()
+        self.logger.debug(f"Zapisano {self.rows_written} wierszy do {len(self._known_stations)} stacji")
@@ -0,0 +1,84 @@
+from __future__ import annotations
+
+import hashlib
+import json
+from pathlib import Path
+
+from meteopy.consts.dirs import Dirs
+from meteopy.utils.log_module import get_logger
+
+
+class ProcessingState:
+    """Stan przetworzenia plików stacji jednego typu danych (Dirs.STATE_DIR/<typ>.json).
+
+    Dla każdej stacji zapisywane są: data ostatniego przetworzonego wiersza (high_water_mark), liczba wierszy,
+    rozmiar i mtime przetworzonego pliku (do wykrywania zmian dokonanych poza meteopy) oraz skrót sha256
+    liczony łańcuchowo z kolejno zapisywanych porcji danych (i miejsc, od których zostały zapisane).
+    """
+
+    def __init__(self, data_type: str):
+        self.data_type = data_type
+        self.path = Dirs.STATE_DIR / f"{data_type}.json"
+        self.logger = get_logger("ProcessingState")
+        self.entries: dict[str, dict] = {}
+        if self.path.exists():
+            try:
+                with open(self.path, encoding="utf-8") as file:
+                    self.entries = json.load(file)
+            except (OSError, ValueError):
+                self.logger.warning(f"Nie udało się wczytać stanu {self.path}, zostanie odtworzony z plików")
+
+    def get(self, station: str) -> dict | None:
+        return self.entries.get(station)
+
+    def set(self, station: str, entry: dict | None) -> None:
+        if entry is None:
+            self.entries.pop(station, None)
+        else:
+            self.entries[station] = entry
+
+    def save(self) -> None:
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = self.path.with_suffix(".tmp")
+        with open(tmp_path, "w", encoding="utf-8") as file:
+            json.dump(self.entries, file, indent=1, sort_keys=True)
+        tmp_path.replace(self.path)
+
+    @staticmethod
+    def is_valid(entry: dict | None, processed_file: Path) -> bool:
+        """Czy wpis opisuje aktualną zawartość pliku (ten sam rozmiar i czas modyfikacji)."""
+        if entry is None or not processed_file.exists():
+            return False
+        stat = processed_file.stat()
+        return entry.get("size") == stat.st_size and entry.get("mtime_ns") == stat.st_mtime_ns
+
+    @staticmethod
+    def next_entry(
+        entry: dict | None,
+        processed_file: Path,
+        high_water_mark: str,
+        rows: int,
+        chunk: bytes,
+        offset: int | None = None,
+    ) -> dict:
+        """Zwraca wpis po zapisaniu porcji `chunk` do przetworzonego pliku.
+
+        Args:
+            entry (dict | None): Dotychczasowy wpis (None - `chunk` to cały plik).
+            processed_file (Path): Przetworzony plik stacji.
+            high_water_mark (str): Data ostatniego przetworzonego wiersza.
+            rows (int): Zmiana liczby wierszy pliku.
+            chunk (bytes): Zapisane bajty.
+            offset (int, optional): Pozycja, od której plik został przepisany (None - porcja dopisana na końcu).
+
+        """
+        previous_hash = entry["sha256"] if entry else ""
+        position = b"" if offset is None else f"@{offset}".encode()
+        stat = processed_file.stat()
+        return {
+            "high_water_mark": high_water_mark,
+            "rows": (entry["rows"] if entry else 0) + rows,
+            "size": stat.st_size,
+            "mtime_ns": stat.st_mtime_ns,
+            "sha256": hashlib.sha256(previous_hash.encode() + position + hashlib.sha256(chunk).digest()).hexdigest(),
+        }
@@ -0,0 +1,163 @@
+from __future__ import annotations
+
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from meteopy.consts.dirs import Dirs
+from meteopy.utils.log_module import get_logger
+
+GRANULARITIES = {"month": ["Year", "Month"], "year": ["Year"]}
+ROLLUP_COLUMNS = ["count", "sum", "min", "max", "sumsq", "positive"]
+_MERGE = {"count": "sum", "sum": "sum", "min": "min", "max": "max", "sumsq": "sum", "positive": "sum"}
+
+
+class RollupStore:
+    """Zagregowane dane stacji w podziale na miesiące i lata (Dirs.ROLLUP_DIR/<typ>/<stacja>.<month|year>.csv).
+
+    Dla każdego okresu i parametru z Dirs.PARAMETER_MAP przechowywane są: liczba wartości, suma, minimum,
+    maksimum, suma kwadratów i liczba wartości dodatnich (np. dni z opadem lub pokrywą śnieżną). Z tych
+    wielkości wynikają średnia, odchylenie standardowe i sumy okresowe, więc statystyki i wykresy miesięczne
+    lub roczne nie muszą czytać danych dziennych. Agregaty tworzy preprocessing; po dopisaniu nowych dni
+    łączone są tylko wiersze nowych okresów (ostatni, niepełny okres jest uzupełniany).
+    """
+
+    def __init__(self):
+        self.logger = get_logger("RollupStore")
+
+    @staticmethod
+    def path(data_type: str, station: str, granularity: str) -> Path:
+        return Dirs.ROLLUP_DIR / data_type / f"{station}.{granularity}.csv"
+
+    def exists(self, data_type: str, station: str) -> bool:
+        return all(self.path(data_type, station, granularity).exists() for granularity in GRANULARITIES)
+
+    @staticmethod
+    def compute(df: pd.DataFrame, data_type: str, granularity: str) -> pd.DataFrame:
+        """Agreguje dzienne wiersze stacji (z kolumną 'Data') do okresów `granularity` ('month' lub 'year').
+
+        Returns:
+            pd.DataFrame: Kolumny Year[, Month], parameter oraz ROLLUP_COLUMNS.
+
+        """
+        keys = GRANULARITIES[granularity]
+        parameters = [parameter for parameter in Dirs.PARAMETER_MAP[data_type] if parameter in df.columns]
+        dates = pd.to_datetime(df["Data"])
+        periods = {"Year": dates.dt.year.to_numpy(), "Month": dates.dt.month.to_numpy()}
+
+        values = df[parameters].to_numpy(dtype=np.float64)
+        long = pd.DataFrame(
+            {
+                **{key: np.tile(periods[key], len(parameters)) for key in keys},
+                "parameter": np.repeat(parameters, len(df)),
+                "value": values.ravel(order="F"),
+            }
+        )
+        long["sumsq"] = long["value"] ** 2
+        long["positive"] = long["value"] > 0
+        return long.groupby([*keys, "parameter"], sort=True).agg(
+            count=("value", "count"),
+            sum=("value", "sum"),
+            min=("value", "min"),
+            max=("value", "max"),
+            sumsq=("sumsq", "sum"),
+            positive=("positive", "sum"),
+        ).reset_index()
+
+    @staticmethod
+    def merge(existing: pd.DataFrame, delta: pd.DataFrame, granularity: str) -> pd.DataFrame:
+        """Łączy agregaty tych samych okresów (sumy się dodają, minimum i maksimum wybierane są z obu)."""
+        keys = GRANULARITIES[granularity]
+        combined = pd.concat([existing, delta], ignore_index=True)
+        return combined.groupby([*keys, "parameter"], sort=True).agg(_MERGE).reset_index()
+
+    def update(
+        self, data_type: str, station: str, df: pd.DataFrame, replace: bool = True, replace_periods: bool = False
+    ) -> None:
+        """Zapisuje agregaty przetworzonych wierszy stacji.
+
+        Args:
+            data_type (str): Typ danych.
+            station (str): ID stacji.
+            df (pd.DataFrame): Przetworzone wiersze stacji.
+            replace (bool): True - wiersze to cała historia stacji; False - dopisane wiersze, łączone z istniejącymi
+                agregatami (tylko okresy, których dotyczą nowe wiersze, są przeliczane).
+            replace_periods (bool): Przy replace=False: wiersze obejmują pełne okresy od pierwszego z nich do końca
+                historii (przeliczony fragment stacji), więc agregaty tych okresów są zastępowane, a nie łączone.
+
+        """
+        for granularity, keys in GRANULARITIES.items():
+            rollup = self.compute(df, data_type, granularity)
+            output_file = self.path(data_type, station, granularity)
+            if not replace and output_file.exists():
+                existing = pd.read_csv(output_file, encoding=Dirs.ENCODING)
+                if len(rollup):
+                    overlap = _period_key(existing, keys) >= _period_key(rollup, keys).min()
+                    if not replace_periods:
+                        rollup = self.merge(existing[overlap], rollup, granularity)
+                    rollup = pd.concat([existing[~overlap], rollup], ignore_index=True)
+                else:
+                    rollup = existing
+            output_file.parent.mkdir(parents=True, exist_ok=True)
+            tmp_file = output_file.with_suffix(".tmp")
+            rollup.to_csv(tmp_file, index=False, encoding=Dirs.ENCODING)
+            tmp_file.replace(output_file)
+
+    def read(
+        self,
+        data_type: str,
+        stations: list[str],
+        granularity: str = "month",
+        parameters: list[str] | None = None,
+        start_date: str | None = None,
+        end_date: str | None = None,
+    ) -> pd.DataFrame:
+        """Wczytuje agregaty stacji wraz z pochodnymi wielkościami.
+
+        Args:
+            data_type (str): Typ danych.
+            stations (list[str]): ID stacji.
+            granularity (str): 'month' lub 'year'.
+            parameters (list[str], optional): Parametry (domyślnie wszystkie).
+            start_date (str, optional): Pominięcie okresów kończących się przed tą datą.
+            end_date (str, optional): Pominięcie okresów zaczynających się po tej dacie.
+
+        Returns:
+            pd.DataFrame: Kolumny station, Data (początek okresu), parameter, ROLLUP_COLUMNS oraz mean i std_dev.
+
+        """
+        keys = GRANULARITIES[granularity]
+        frames = []
+        for station in stations:
+            rollup_file = self.path(data_type, str(station), granularity)
+            if not rollup_file.exists():
+                self.logger.warning(f"Brak agregatów {granularity} dla stacji {station}")
+                continue
+            frames.append(pd.read_csv(rollup_file, encoding=Dirs.ENCODING).assign(station=str(station)))
+        if not frames:
+            return pd.DataFrame(columns=["station", "Data", "parameter", *ROLLUP_COLUMNS, "mean", "std_dev"])
+
+        df = pd.concat(frames, ignore_index=True)
+        if parameters:
+            df = df[df["parameter"].isin(parameters)]
+        period = {"year": df["Year"], "month": df["Month"] if "Month" in keys else 1, "day": 1}
+        df.insert(1, "Data", pd.to_datetime(pd.DataFrame(period)))
+        if start_date is not None:
+            period_end = df["Data"] + (pd.offsets.MonthEnd(0) if granularity == "month" else pd.offsets.YearEnd(0))
+            df = df[period_end >= pd.Timestamp(start_date)]
+        if end_date is not None:
+            df = df[df["Data"] <= pd.Timestamp(end_date)]
+
+        with np.errstate(invalid="ignore", divide="ignore"):
+            count = df["count"].to_numpy(dtype=np.float64)
+            mean = np.where(count > 0, df["sum"] / count, np.nan)
+            variance = np.maximum(df["sumsq"] / count - mean**2, 0)
+        df = df.drop(columns=keys).assign(mean=mean, std_dev=np.sqrt(variance))
+        return df[["station", "Data", "parameter", *ROLLUP_COLUMNS, "mean", "std_dev"]].reset_index(drop=True)
+
+
+def _period_key(df: pd.DataFrame, keys: list[str]) -> np.ndarray:
+    """Numer okresu rosnący w czasie (rok * 100 + miesiąc lub sam rok)."""
+    key = df["Year"].to_numpy(dtype=np.int64)
+    return key * 100 + df["Month"].to_numpy(dtype=np.int64) if "Month" in keys else key
@@ -0,0 +1,399 @@
+from __future__ import annotations
+
+import hashlib
+import json
+import re
+from io import BytesIO
+from pathlib import Path
+from typing import Iterator
+
+import numpy as np
+import pandas as pd
+
+from meteopy.consts.dirs import Dirs
+from meteopy.utils.log_module import get_logger
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:  # pyarrow jest opcjonalny: pip install meteopy[parquet]
+    pa = None
+    pq = None
+
+
+class StationStore:
+    """Kolumnowy magazyn przetworzonych danych stacji (Parquet) obok plików CSV z Dirs.SEPARATED_DIR.
+
+    Dane zapisywane są jako Dirs.STORE_DIR/<typ>/<stacja>/<rok>.parquet (jeden plik na rok) z typowanymi
+    kolumnami (float32 dla parametrów, int32 dla kodu stacji, słownik dla nazwy stacji, natywna data).
+    Plik _meta.json w katalogu stacji zawiera listę lat oraz rozmiar i mtime pliku CSV, z którym magazyn jest
+    zgodny. Odczyt jest przezroczysty: jeśli magazynu stacji nie ma lub nie odpowiada aktualnemu CSV (albo brak
+    pyarrow), dane są czytane z CSV i konwertowane do tych samych typów.
+
+    Dopisanie nowych dni (`append`) przepisuje tylko pliki lat, których dotyczą, więc koszt aktualizacji zależy
+    od liczby nowych wierszy, a nie od długości historii stacji. Odczyt zakresu dat dekoduje tylko potrzebne
+    lata: w Parquet czytane są tylko pliki lat z zakresu, a w CSV tylko bajty wskazane przez indeks
+    rok -> zakres bajtów (Dirs.STORE_DIR/<typ>/<stacja>.index.json).
+    """
+
+    _YEAR_PATTERN = re.compile(rb",(\d{4})-\d{2}-\d{2}(?:,|\r?$)")
+    _CHECKED_BYTES = 64 * 1024
+    _META_NAME = "_meta.json"
+
+    def __init__(self):
+        self.logger = get_logger("StationStore")
+
+    @staticmethod
+    def available() -> bool:
+        """Czy dostępny jest backend kolumnowy (pyarrow)."""
+        return pq is not None
+
+    @staticmethod
+    def csv_path(data_type: str, station: str) -> Path:
+        return Dirs.SEPARATED_DIR / data_type / f"{station}.csv"
+
+    @staticmethod
+    def parquet_dir(data_type: str, station: str) -> Path:
+        """Katalog z plikami <rok>.parquet stacji."""
+        return Dirs.STORE_DIR / data_type / str(station)
+
+    @staticmethod
+    def index_path(data_type: str, station: str) -> Path:
+        return Dirs.STORE_DIR / data_type / f"{station}.index.json"
+
+    @staticmethod
+    def to_typed(df: pd.DataFrame) -> pd.DataFrame:
+        """Konwertuje przetworzone dane stacji do zwartych typów."""
+        for column in df.columns:
+            if column == "Data":
+                df[column] = pd.to_datetime(df[column])
+            elif column in Dirs.DTYPES:
+                df[column] = df[column].astype(Dirs.DTYPES[column])
+            else:
+                df[column] = pd.to_numeric(df[column], errors="coerce").astype(Dirs.VALUE_DTYPE)
+        return df
+
+    def _meta(self, data_type: str, station: str) -> dict | None:
+        meta_file = self.parquet_dir(data_type, station) / self._META_NAME
+        if not meta_file.exists():
+            return None
+        try:
+            with open(meta_file, encoding="utf-8") as file:
+                return json.load(file)
+        except (OSError, ValueError):
+            return None
+
+    def has_parquet(self, data_type: str, station: str) -> bool:
+        """Czy dla stacji istnieje magazyn Parquet zgodny z aktualnym plikiem CSV (ten sam rozmiar i mtime)."""
+        if not self.available():
+            return False
+        meta = self._meta(data_type, station)
+        if not meta or not meta.get("years"):
+            return False
+        csv_file = self.csv_path(data_type, station)
+        if not csv_file.exists():
+            return True
+        stat = csv_file.stat()
+        return meta.get("csv_size") == stat.st_size and meta.get("csv_mtime_ns") == stat.st_mtime_ns
+
+    def _year_files(
+        self, data_type: str, station: str, start: pd.Timestamp | None = None, end: pd.Timestamp | None = None
+    ) -> list[Path]:
+        """Pliki lat magazynu stacji z zakresu dat (rosnąco)."""
+        directory = self.parquet_dir(data_type, station)
+        return [
+            directory / f"{year}.parquet"
+            for year in self._meta(data_type, station)["years"]
+            if (start is None or year >= start.year) and (end is None or year <= end.year)
+        ]
+
+    def exists(self, data_type: str, station: str) -> bool:
+        return self.has_parquet(data_type, station) or self.csv_path(data_type, station).exists()
+
+    def read(
+        self,
+        data_type: str,
+        station: str,
+        columns: list[str] | None = None,
+        start_date: str | pd.Timestamp | None = None,
+        end_date: str | pd.Timestamp | None = None,
+    ) -> pd.DataFrame | None:
+        """Wczytuje przetworzone dane stacji, opcjonalnie tylko z zakresu dat.
+
+        Args:
+            data_type (str): Typ danych.
+            station (str): ID stacji.
+            columns (list[str], optional): Kolumny do wczytania. Domyślnie wszystkie.
+            start_date (str | pd.Timestamp, optional): Pierwsza data zakresu (włącznie).
+            end_date (str | pd.Timestamp, optional): Ostatnia data zakresu (włącznie).
+
+        Returns:
+            pd.DataFrame | None: Dane stacji z kolumną 'Data' typu datetime lub None, jeśli stacja nie istnieje.
+
+        """
+        start = pd.Timestamp(start_date) if start_date is not None else None
+        end = pd.Timestamp(end_date) if end_date is not None else None
+        ranged = start is not None or end is not None
+        read_columns = columns
+        if ranged and columns is not None and "Data" not in columns:
+            read_columns = [*columns, "Data"]
+
+        if self.has_parquet(data_type, station):
+            files = self._year_files(data_type, station, start, end)
+            if files:
+                table = pa.concat_tables(
+                    [pq.read_table(file, columns=read_columns) for file in files], promote_options="default"
+                )
+            else:
+                table = pq.read_schema(self._year_files(data_type, station)[0]).empty_table()
+                table = table.select(read_columns) if read_columns is not None else table
+            df = table.to_pandas(date_as_object=False)
+        else:
+            csv_file = self.csv_path(data_type, station)
+            if not csv_file.exists():
+                self.logger.warning(f"File {csv_file} does not exist.")
+                return None
+            if ranged:
+                df = self._read_csv_years(data_type, station, read_columns, start, end)
+            else:
+                df = self.to_typed(pd.read_csv(csv_file, usecols=read_columns, encoding=Dirs.ENCODING))
+
+        if ranged:
+            # grupy wierszy i zakresy bajtów obejmują całe lata - dokładne przycięcie do zakresu dat
+            mask = np.ones(len(df), dtype=bool)
+            if start is not None:
+                mask &= (df["Data"] >= start).to_numpy()
+            if end is not None:
+                mask &= (df["Data"] <= end).to_numpy()
+            df = df[mask].reset_index(drop=True)
+            if read_columns is not columns:
+                df = df.drop(columns="Data")
+        return df
+
+    def iter_chunks(
+        self, data_type: str, station: str, columns: list[str] | None = None, chunk_rows: int = Dirs.READ_CHUNK_ROWS
+    ) -> Iterator[pd.DataFrame]:
+        """Wczytuje przetworzone dane stacji porcjami po najwyżej `chunk_rows` wierszy.
+
+        Pamięć zależy od wielkości porcji, a nie od długości historii stacji: pliki lat Parquet czytane są
+        partiami (`iter_batches`, łączonymi do `chunk_rows` wierszy), a CSV przez `pd.read_csv(chunksize=...)`.
+        Brak stacji daje pusty iterator.
+        """
+        if self.has_parquet(data_type, station):
+            batches, rows = [], 0
+            for file in self._year_files(data_type, station):
+                for batch in pq.ParquetFile(file).iter_batches(batch_size=chunk_rows, columns=columns):
+                    if rows + batch.num_rows > chunk_rows and batches:
+                        yield pa.Table.from_batches(batches).to_pandas(date_as_object=False)
+                        batches, rows = [], 0
+                    batches.append(batch)
+                    rows += batch.num_rows
+            if batches:
+                yield pa.Table.from_batches(batches).to_pandas(date_as_object=False)
+            return
+        csv_file = self.csv_path(data_type, station)
+        if not csv_file.exists():
+            self.logger.warning(f"File {csv_file} does not exist.")
+            return
+        with pd.read_csv(csv_file, usecols=columns, encoding=Dirs.ENCODING, chunksize=chunk_rows) as reader:
+            for chunk in reader:
+                yield self.to_typed(chunk)
+
+    def _read_csv_years(
+        self,
+        data_type: str,
+        station: str,
+        columns: list[str] | None,
+        start: pd.Timestamp | None,
+        end: pd.Timestamp | None,
+    ) -> pd.DataFrame:
+        """Wczytuje z CSV tylko wiersze z lat zakresu, korzystając z indeksu rok -> zakres bajtów."""
+        csv_file = self.csv_path(data_type, station)
+        index = self.year_index(data_type, station)
+        years = [
+            bounds
+            for year, bounds in index["years"].items()
+            if (start is None or int(year) >= start.year) and (end is None or int(year) <= end.year)
+        ]
+        with open(csv_file, "rb") as file:
+            data = file.read(index["header_end"])
+            if years:
+                first, last = min(b[0] for b in years), max(b[1] for b in years)
+                file.seek(first)
+                data += file.read(last - first)
+        return self.to_typed(pd.read_csv(BytesIO(data), usecols=columns, encoding=Dirs.ENCODING))
+
+    def year_index(self, data_type: str, station: str) -> dict:
+        """Zwraca indeks rok -> [początek, koniec) w bajtach przetworzonego pliku CSV stacji.
+
+        Indeks jest zapisywany obok magazynu Parquet razem ze skrótem nagłówka i ostatnich 64 KiB
+        zindeksowanej części pliku. Gdy plik urósł, a ta część się nie zmieniła (dopisano nowe dni), skanowane
+        są jedynie nowe bajty; w pozostałych przypadkach (plik skrócony, podmieniony lub przepisany od
+        wcześniejszej daty) indeks jest budowany od nowa.
+        """
+        csv_file = self.csv_path(data_type, station)
+        index_file = self.index_path(data_type, station)
+        stat = csv_file.stat()
+
+        index = None
+        if index_file.exists():
+            try:
+                with open(index_file, encoding="utf-8") as file:
+                    index = json.load(file)
+            except (OSError, ValueError):
+                index = None
+        if index is not None and index["size"] == stat.st_size and index["mtime_ns"] == stat.st_mtime_ns:
+            return index
+
+        with open(csv_file, "rb") as file:
+            if (
+                index is None
+                or index["size"] >= stat.st_size
+                or index.get("prefix_sha256") != self._prefix_digest(file, index["header_end"], index["size"])
+            ):
+                index = {"header_end": 0, "size": 0, "years": {}}
+            if index["size"] == 0:
+                file.seek(0)
+                file.readline()
+                index["header_end"] = index["size"] = file.tell()
+            file.seek(index["size"])
+            position = index["size"]
+            years = index["years"]
+            for line in file:
+                match = self._YEAR_PATTERN.search(line)
+                if match is not None:
+                    year = str(int(match.group(1)))
+                    bounds = years.setdefault(year, [position, position])
+                    bounds[1] = position + len(line)
+                position += len(line)
+            index.update(
+                size=position,
+                mtime_ns=stat.st_mtime_ns,
+                prefix_sha256=self._prefix_digest(file, index["header_end"], position),
+            )
+
+        index_file.parent.mkdir(parents=True, exist_ok=True)
+        tmp_file = index_file.with_suffix(".tmp")
+        with open(tmp_file, "w", encoding="utf-8") as file:
+            json.dump(index, file)
+        tmp_file.replace(index_file)
+        return index
+
+    @classmethod
+    def _prefix_digest(cls, file, header_end: int, size: int) -> str:
+        """Skrót nagłówka i ostatnich `_CHECKED_BYTES` bajtów z pierwszych `size` bajtów pliku."""
+        digest = hashlib.sha256()
+        file.seek(0)
+        digest.update(file.read(header_end))
+        start = max(header_end, size - cls._CHECKED_BYTES)
+        file.seek(start)
+        digest.update(file.read(size - start))
+        return digest.hexdigest()
+
+    def write(self, data_type: str, station: str, df: pd.DataFrame) -> Path | None:
+        """Zapisuje wszystkie przetworzone dane stacji do magazynu Parquet (jeden plik na rok).
+
+        Returns:
+            Path | None: Katalog magazynu stacji lub None, jeśli pyarrow nie jest dostępny.
+
+        """
+        if not self.available():
+            return None
+        df = self.to_typed(df.copy()).sort_values("Data", kind="stable")
+        meta = self._meta(data_type, station) or {}
+        frames = dict(iter(df.groupby(df["Data"].dt.year, sort=True)))
+        return self._write_years(data_type, station, frames, set(meta.get("years", [])) - set(frames), set())
+
+    def append(self, data_type: str, station: str, df: pd.DataFrame, rebuild: bool = False) -> Path | None:
+        """Zastępuje dane stacji od pierwszej daty `df` wierszami `df`, przepisując tylko pliki tych lat.
+
+        Wiersze roku pierwszej daty sprzed tej daty są zachowywane (wczytywany jest tylko plik tego roku),
+        a pliki późniejszych lat, których nie ma w `df`, są usuwane.
+
+        Args:
+            data_type (str): Typ danych.
+            station (str): ID stacji.
+            df (pd.DataFrame): Przetworzone wiersze od pierwszej zastępowanej daty do końca danych stacji.
+            rebuild (bool): Czy odtworzyć magazyn z całego pliku CSV (np. gdy przed aktualizacją CSV magazyn
+                nie był z nim zgodny). Magazyn jest odtwarzany także wtedy, gdy jeszcze nie istnieje.
+
+        Returns:
+            Path | None: Katalog magazynu stacji lub None, jeśli pyarrow nie jest dostępny.
+
+        """
+        if not self.available():
+            return None
+        meta = self._meta(data_type, station)
+        if rebuild or not meta or not meta.get("years"):
+            csv_file = self.csv_path(data_type, station)
+            return self.write(data_type, station, pd.read_csv(csv_file, encoding=Dirs.ENCODING))
+        if df.empty:
+            return self._write_years(data_type, station, {}, set(), set(meta["years"]))
+        df = self.to_typed(df.copy()).sort_values("Data", kind="stable")
+        first = df["Data"].iloc[0]
+        frames = dict(iter(df.groupby(df["Data"].dt.year, sort=True)))
+        if first.year in meta["years"]:
+            year_file = self.parquet_dir(data_type, station) / f"{first.year}.parquet"
+            existing = pq.read_table(year_file).to_pandas(date_as_object=False)
+            existing = existing[existing["Data"] < first]
+            frames[first.year] = pd.concat([existing, frames[first.year]], ignore_index=True)
+        removed = {year for year in meta["years"] if year > first.year and year not in frames}
+        return self._write_years(data_type, station, frames, removed, set(meta["years"]))
+
+    def _write_years(
+        self, data_type: str, station: str, frames: dict[int, pd.DataFrame], removed: set[int], kept: set[int]
+    ) -> Path:
+        """Zapisuje pliki lat `frames`, usuwa pliki lat `removed` i aktualizuje _meta.json (zapisywany na końcu).
+
+        `kept` to lata dotychczasowego magazynu; pozostają w nim te, których nie ma w `removed`.
+        """
+        directory = self.parquet_dir(data_type, station)
+        directory.mkdir(parents=True, exist_ok=True)
+        for year, rows in frames.items():
+            table = pa.Table.from_pandas(self.to_typed(rows.copy()), preserve_index=False)
+            date_index = table.schema.get_field_index("Data")
+            table = table.set_column(date_index, "Data", table.column("Data").cast(pa.date32()))
+            tmp_file = directory / f"{year}.parquet.tmp"
+            pq.write_table(table, tmp_file)
+            tmp_file.replace(directory / f"{year}.parquet")
+        for year in removed:
+            (directory / f"{year}.parquet").unlink(missing_ok=True)
+        # magazyn sprzed podziału na lata (jeden plik na stację)
+        (Dirs.STORE_DIR / data_type / f"{station}.parquet").unlink(missing_ok=True)
+
+        csv_file = self.csv_path(data_type, station)
+        stat = csv_file.stat() if csv_file.exists() else None
+        meta = {
+            "years": sorted(int(year) for year in (kept - removed) | set(frames)),
+            "csv_size": stat.st_size if stat else None,
+            "csv_mtime_ns": stat.st_mtime_ns if stat else None,
+        }
+        tmp_file = directory / f"{self._META_NAME}.tmp"
+        with open(tmp_file, "w", encoding="utf-8") as file:
+            json.dump(meta, file)
+        tmp_file.replace(directory / self._META_NAME)
+        return directory
+
+    def convert_csv(self, data_type: str) -> int:
+        """Konwertuje istniejące przetworzone pliki CSV danego typu do magazynu Parquet.
+
+        Returns:
+            int: Liczba skonwertowanych stacji.
+
+        """
+        if not self.available():
+            self.logger.error("Brak pakietu pyarrow - zainstaluj meteopy[parquet], aby używać magazynu Parquet")
+            return 0
+        converted = 0
+        for csv_file in sorted((Dirs.SEPARATED_DIR / data_type).glob("*.csv")):
+            station = csv_file.stem
+            if self.has_parquet(data_type, station):
+                continue
+            df = pd.read_csv(csv_file, encoding=Dirs.ENCODING)
+            if "Data" not in df.columns:
+                self.logger.warning(f"plik {csv_file} nie został jeszcze przeprocesowany, pomijanie")
+                continue
+            self.write(data_type, station, df)
+            converted += 1
+        self.logger.info(f"Skonwertowano {converted} stacji typu {data_type} do formatu Parquet")
+        return converted
@@ -1,5 +1,18 @@
 from __future__ import annotations
 
-from .imgw_stats import IMGWStats
+from meteopy.utils.lazy_imports import attach
 
-__all__ = ["IMGWStats"]
+__getattr__, __dir__, __all__ = attach(
+    __name__,
+    {
+        "IMGWStats": ".imgw_stats",
+        "KLLSketch": ".sketches",
+        "RunningMoments": ".sketches",
+        "StreamingSummary": ".sketches",
+        "CorrelationAccumulator": ".stats_engine",
+        "blocked_correlation": ".stats_engine",
+        "correlation_table": ".stats_engine",
+        "grouped_statistics": ".stats_engine",
+        "top_k_neighbours": ".stats_engine",
+    },
+)
@@ -1,6 +1,9 @@
 from __future__ import annotations
 
+import json
 import os
+import warnings
+from concurrent.futures import ProcessPoolExecutor, as_completed
 from pathlib import Path
 
 import matplotlib.pyplot as plt
@@ -9,86 +12,248 @@ import pandas as pd
 import seaborn as sns
 
 from meteopy.consts.dirs import Dirs
+from meteopy.preprocessing.rollups import RollupStore
+from meteopy.preprocessing.station_store import StationStore
+from meteopy.statistics.sketches import StreamingSummary
+from meteopy.statistics.stats_engine import (
+    STATISTICS,
+    CorrelationAccumulator,
+    blocked_correlation,
+    correlation_table,
+    grouped_statistics,
+    top_k_neighbours,
+)
 from meteopy.utils.log_module import get_logger
+from meteopy.utils.station_catalog import StationCatalog
 
 
 class IMGWStats:
     def __init__(self) -> None:
         """Initialize the IMGWStats class."""
         self.logger = get_logger(__name__)
+        self.store = StationStore()
+        self.rollups = RollupStore()
+        self.catalog = StationCatalog()
 
-    def calculate_basic_stat(self, data_type: str, parameters: list[str], stations: list[str]= [] ) -> None:
+    def calculate_basic_stat(
+        self, data_type: str, parameters: list[str], stations: list[str] = [], export_format: str | None = None
+    ) -> pd.DataFrame | None:
         """
         Process statistics for the given stations, data type, and parameter,
             and save to a file in data/statistics/<data_type>.
         For each parameter statistics are calculated separately and saved to separate files.
+        All statistics for all stations and parameters are computed in one grouped pass (see `grouped_statistics`).
 
         Args:
             data_type: Type of data ['klimat', 'opad', 'synop']            
             parameters: List of string parameters to calculate statistics for
             stations: List of station IDs to include in the statistics
+            export_format: Optional machine-readable export of the whole table: 'csv', 'json' or 'parquet'
+                (saved as data/statistics/<data_type>/STATISTICS.<format>)
         Returns:
-            None
+            Table with one row per (station, parameter), or None if there is no data
         """
-        if stations == []:
-            stations = Dirs.get_stations_id(data_type)
-
         if parameters == []:
             parameters = Dirs.PARAMETER_MAP.get(data_type)
 
+        parameter_list = Dirs.PARAMETER_MAP.get(data_type)
+        for parameter in parameters:
+            if not parameter_list or parameter not in parameter_list:
+                self.logger.error("Parameter %s not found in PARAMETER_MAP for data type %s", parameter, data_type)
+                return None
+
+        if stations == []:
+            stations = Dirs.get_stations_id(data_type, parameters=parameters)
+        else:
+            stations = self.catalog.prune(data_type, stations, parameters=parameters)
+
         data_frames = []
         for station in stations:
-            file_path = os.path.join(Dirs.SEPARATED_DIR, data_type, f"{station}.csv")
-            if os.path.exists(file_path):
-                df = pd.read_csv(file_path, encoding=Dirs.ENCODING)
+            df = self.store.read(data_type, station, ["Kod_stacji", *parameters])
+            if df is not None:
                 data_frames.append(df)
-            else:
-                self.logger.warning(f"File {file_path} does not exist.")
         
         if not data_frames:
             print("No data available for the given stations.")
-            return
+            return None
         data = pd.concat(data_frames, ignore_index=True)
+        table = grouped_statistics(data, parameters)
+
+        self._write_reports(table, data_type, parameters, len(stations))
+        if export_format is not None:
+            self.export_table(table, Path(Dirs.STATISTICS_DIR) / data_type / "STATISTICS", export_format)
+        return table
+
+    def calculate_streaming_stat(
+        self,
+        data_type: str,
+        parameters: list[str],
+        stations: list[str] = [],
+        workers: int = 1,
+        export_format: str | None = None,
+        k: int = 200,
+    ) -> pd.DataFrame | None:
+        """
+        Streaming variant of `calculate_basic_stat` with memory independent of the number of stations.
 
+        Stations are read one at a time and summarized with mergeable accumulators (`StreamingSummary`):
+        count, mean and variance are exact (Welford), median and quartiles come from a KLL sketch with
+        rank error of about 1.65% of the values for k=200 (see `KLLSketch`). Besides per-station rows the
+        table contains a global row (station 'ALL') merged from all stations, also across worker processes.
+
+        Args:
+            data_type: Type of data ['klimat', 'opad', 'synop']
+            parameters: List of string parameters to calculate statistics for
+            stations: List of station IDs to include in the statistics
+            workers: Number of worker processes (1 - run in this process)
+            export_format: Optional machine-readable export: 'csv', 'json' or 'parquet'
+            k: Sketch size (accuracy/memory trade-off)
+        Returns:
+            Table with one row per (station, parameter) plus global rows, or None if there is no data
+        """
+        if parameters == []:
+            parameters = Dirs.PARAMETER_MAP.get(data_type)
+        parameter_list = Dirs.PARAMETER_MAP.get(data_type)
         for parameter in parameters:
-            parameter_list = Dirs.PARAMETER_MAP.get(data_type)
             if not parameter_list or parameter not in parameter_list:
                 self.logger.error("Parameter %s not found in PARAMETER_MAP for data type %s", parameter, data_type)
-                return
-
-            
-            stats = {}
-            for station in stations:
-                station_data = data[data['Kod_stacji'] == int(station)]
-                
-                param_data = station_data[parameter].dropna()
-                if param_data.size == 0:
-                    self.logger.warning("Brak danych dla parametru '%s'.", parameter)
-                    continue
-                stats[station] = {
-                    'mean': np.mean(param_data),
-                    'median': np.median(param_data),
-                    'variance': np.var(param_data),
-                    'std_dev': np.std(param_data),
-                    'quartiles': np.percentile(param_data, [25, 50, 75])
-                }
-
-            output_dir = Path(Dirs.STATISTICS_DIR) / data_type
-            output_dir.mkdir(parents=True, exist_ok=True)
-            filename = f"STATISTICS_{parameter}.txt"
+                return None
+
+        if stations == []:
+            stations = Dirs.get_stations_id(data_type, parameters=parameters)
+        else:
+            stations = self.catalog.prune(data_type, stations, parameters=parameters)
+
+        rows = []
+        totals = {parameter: StreamingSummary(k, seed=0) for parameter in parameters}
+        if workers > 1 and len(stations) > 1:
+            batches = [stations[i::workers] for i in range(workers)]
+            with ProcessPoolExecutor(max_workers=workers) as executor:
+                futures = [
+                    executor.submit(_summarize_stations, data_type, batch, parameters, k) for batch in batches if batch
+                ]
+                for future in as_completed(futures):
+                    batch_rows, batch_totals = future.result()
+                    rows += batch_rows
+                    for parameter, summary in batch_totals.items():
+                        totals[parameter].merge(summary)
+        else:
+            rows, totals = _summarize_stations(data_type, stations, parameters, k)
+
+        if not rows:
+            print("No data available for the given stations.")
+            return None
+        rows += [
+            {"station": "ALL", "parameter": parameter, **summary.result()}
+            for parameter, summary in totals.items()
+            if summary.count
+        ]
+        table = pd.DataFrame(rows).sort_values(["parameter", "station"], kind="stable", ignore_index=True)
+        table = table[["station", "parameter", *STATISTICS]]
+
+        self._write_reports(table, data_type, parameters, len(stations) + 1, prefix="STATISTICS_STREAM")
+        if export_format is not None:
+            self.export_table(table, Path(Dirs.STATISTICS_DIR) / data_type / "STATISTICS_STREAM", export_format)
+        return table
+
+    def calculate_period_stat(
+        self,
+        data_type: str,
+        parameters: list[str],
+        granularity: str = "month",
+        stations: list[str] = [],
+        start_date: str | None = None,
+        end_date: str | None = None,
+        export_format: str = "csv",
+    ) -> pd.DataFrame | None:
+        """
+        Monthly or yearly statistics (count, sum, min, max, mean, std_dev, number of positive values) served from
+        the rollups built at preprocess time (`RollupStore`), without reading daily rows.
+
+        Args:
+            data_type: Type of data ['klimat', 'opad', 'synop']
+            parameters: List of string parameters (all parameters of the data type if empty)
+            granularity: 'month' or 'year'
+            stations: List of station IDs (all available stations if empty)
+            start_date: First day 'YYYY-MM-DD' (optional)
+            end_date: Last day 'YYYY-MM-DD' (optional)
+            export_format: 'csv', 'json' or 'parquet' (saved as data/statistics/<data_type>/STATISTICS_<GRANULARITY>)
+        Returns:
+            Table with one row per (station, period, parameter), or None if there is no data
+        """
+        if parameters == []:
+            parameters = Dirs.PARAMETER_MAP.get(data_type)
+        if stations == []:
+            stations = Dirs.get_stations_id(data_type, start_date, end_date, parameters)
+        else:
+            stations = self.catalog.prune(data_type, stations, start_date, end_date, parameters)
+
+        table = self.rollups.read(data_type, stations, granularity, parameters, start_date, end_date)
+        if table.empty:
+            print("No data available for the given stations.")
+            return None
+        output_dir = Path(Dirs.STATISTICS_DIR) / data_type
+        output_dir.mkdir(parents=True, exist_ok=True)
+        self.export_table(table, output_dir / f"STATISTICS_{granularity.upper()}", export_format)
+        return table
+
+    def _write_reports(
+        self, table: pd.DataFrame, data_type: str, parameters: list[str], expected: int, prefix: str = "STATISTICS"
+    ) -> None:
+        """Write one text report per parameter from a statistics table."""
+        output_dir = Path(Dirs.STATISTICS_DIR) / data_type
+        output_dir.mkdir(parents=True, exist_ok=True)
+        for parameter in parameters:
+            param_table = table[table["parameter"] == parameter]
+            missing = expected - len(param_table)
+            if missing:
+                self.logger.warning("Brak danych dla parametru '%s' w %d stacjach.", parameter, missing)
+
+            filename = f"{prefix}_{parameter}.txt"
             file_path = os.path.join(output_dir, filename)
 
             with open(file_path, 'w') as file:
-                for station, param_stats in stats.items():
-                    file.write(f"Station: {station}\n")
-                    for stat_name, stat_value in param_stats.items():
-                        file.write(f"  {stat_name}: {stat_value}\n")
+                for row in param_table.itertuples(index=False):
+                    file.write(f"Station: {row.station}\n")
+                    file.write(f"  mean: {row.mean}\n")
+                    file.write(f"  median: {row.median}\n")
+                    file.write(f"  variance: {row.variance}\n")
+                    file.write(f"  std_dev: {row.std_dev}\n")
+                    file.write(f"  quartiles: {np.array([row.q25, row.q50, row.q75])}\n")
                     file.write("\n")
             print(f"Statistics for parameter {parameter} saved to {file_path}")
 
+    def export_table(self, table: pd.DataFrame, path: Path, export_format: str) -> Path | None:
+        """Save a statistics table in a machine-readable format.
+
+        Args:
+            table: Table to save
+            path: Output path without extension
+            export_format: 'csv', 'json' or 'parquet' (parquet requires pyarrow)
+        Returns:
+            Path of the saved file, or None if the format is not available
+        """
+        output_file = path.with_suffix(f".{export_format}")
+        if export_format == "csv":
+            table.to_csv(output_file, index=False)
+        elif export_format == "json":
+            table.to_json(output_file, orient="records", indent=1)
+        elif export_format == "parquet":
+            if not StationStore.available():
+                self.logger.error("Brak pakietu pyarrow - zainstaluj meteopy[parquet], aby zapisywać Parquet")
+                return None
+            table.to_parquet(output_file, index=False)
+        else:
+            self.logger.error("Nieznany format eksportu '%s'. Wybierz csv, json lub parquet.", export_format)
+            return None
+        print(f"Statistics table saved to {output_file}")
+        return output_file
+
     def calculate_correlation(self, data_type: str, parameter1: str, parameter2: str, stations: list[str] = []) -> None:
         """Calculate correlation between two parameters for the given stations and data type.
 
+        Values are paired by date; days where either parameter is missing are skipped (see `CorrelationAccumulator`).
+
         Args:
             data_type: Type of data ['klimat', 'opad', 'synop']
             parameter1: First parameter for correlation
@@ -98,54 +263,32 @@ class IMGWStats:
             None
         """
         if stations == []:
-            stations = Dirs.get_stations_id(data_type)
+            stations = Dirs.get_stations_id(data_type, parameters=[parameter1, parameter2])
+        else:
+            stations = self.catalog.prune(data_type, stations, parameters=[parameter1, parameter2])
 
-        data_frames = []
-        for station in stations:
-            file_path = os.path.join(Dirs.SEPARATED_DIR, data_type, f"{station}.csv")
-            if os.path.exists(file_path):
-                df = pd.read_csv(file_path, encoding=Dirs.ENCODING)
-                df['station_id'] = station
-                data_frames.append(df)
-            else:
-                self.logger.warning(f"File {file_path} does not exist.")
-        
-        if not data_frames:
+        accumulators = self._correlation_accumulators(data_type, stations, [parameter1, parameter2])
+        if not accumulators:
             print("No data available for the given stations.")
             return
-        data = pd.concat(data_frames, ignore_index=True)
+        table = correlation_table(accumulators, [parameter1, parameter2]).set_index("station")
 
-        data1 = data[parameter1].dropna()
-        data2 = data[parameter2].dropna()
-        if data1.size == 0 and data2.size == 0:
+        glob_corr = table.loc["ALL", "correlation"]
+        if table.loc["ALL", "n"] == 0:
             self.logger.error("Brak danych dla parametrów '%s' i '%s'.", parameter1, parameter2)
             return
-        if np.std(data1) == 0 or np.std(data2) == 0:
+        if np.isnan(glob_corr):
             self.logger.warning("Unable to calculate Pearson correlation\nStandard deviation is zero for parameter '%s' or '%s'.", parameter1, parameter2)
             return
-        
-        min_len = min(len(data1), len(data2))
-        data1 = data1[:min_len]
-        data2 = data2[:min_len]
-        glob_corr = np.corrcoef(data1, data2)[0, 1]
-        
+
         correlations = {}
-        for station in stations:
-            station_data = data[data['station_id'] == station]
-            param_data1 = station_data[parameter1].dropna()
-            param_data2 = station_data[parameter2].dropna()
-            if param_data1.size == 0 or param_data2.size == 0:
+        for station, row in table.drop(index="ALL").iterrows():
+            if row["n"] == 0:
                 self.logger.warning("Brak danych dla parametrów '%s' i '%s' w stacji '%s'.", parameter1, parameter2, station)
                 continue
-            if np.std(param_data1) == 0 or np.std(param_data2) == 0:
-                #self.logger.warning("Standard deviation is zero for parametry '%s' lub '%s' w stacji '%s'.", parameter1, parameter2, station)
+            if np.isnan(row["correlation"]):
                 continue
-
-            min_length = min(len(param_data1), len(param_data2))
-            param_data1 = param_data1[:min_length]
-            param_data2 = param_data2[:min_length]
-            correlation = np.corrcoef(param_data1, param_data2)[0, 1]
-            correlations[station] = correlation
+            correlations[station] = row["correlation"]
 
         output_dir = Path(Dirs.STATISTICS_DIR) / data_type
         output_dir.mkdir(parents=True, exist_ok=True)
@@ -160,3 +303,197 @@ class IMGWStats:
                 file.write("\n")
         print(f"Correlation between {parameter1} and {parameter2} saved to {file_path}")
 
+    def calculate_correlation_matrix(
+        self, data_type: str, parameters: list[str] = [], stations: list[str] = [], export_format: str = "csv"
+    ) -> pd.DataFrame | None:
+        """Calculate correlations of all parameter pairs, per station and globally, reading each station once.
+
+        Saves the global matrix to data/statistics/<data_type>/CORRELATION_MATRIX.txt and the full table
+        (station, parameter1, parameter2, n, correlation; station 'ALL' is global) as CORRELATION_MATRIX.<format>.
+
+        Args:
+            data_type: Type of data ['klimat', 'opad', 'synop']
+            parameters: Parameters to correlate (all parameters of the data type if empty)
+            stations: List of station IDs (all available stations if empty)
+            export_format: 'csv', 'json' or 'parquet'
+        Returns:
+            Correlation table, or None if there is no data
+        """
+        if parameters == []:
+            parameters = Dirs.PARAMETER_MAP.get(data_type)
+        if stations == []:
+            stations = Dirs.get_stations_id(data_type, parameters=parameters)
+        else:
+            stations = self.catalog.prune(data_type, stations, parameters=parameters)
+
+        accumulators = self._correlation_accumulators(data_type, stations, parameters)
+        if not accumulators:
+            print("No data available for the given stations.")
+            return None
+        table = correlation_table(accumulators, parameters)
+
+        output_dir = Path(Dirs.STATISTICS_DIR) / data_type
+        output_dir.mkdir(parents=True, exist_ok=True)
+        matrix = pd.DataFrame(accumulators["ALL"].matrix()[0], index=parameters, columns=parameters)
+        file_path = output_dir / "CORRELATION_MATRIX.txt"
+        with open(file_path, 'w') as file:
+            file.write(f"Global correlation matrix ({len(accumulators) - 1} stations):\n\n")
+            file.write(matrix.to_string())
+            file.write("\n")
+        print(f"Correlation matrix saved to {file_path}")
+        self.export_table(table, output_dir / "CORRELATION_MATRIX", export_format)
+        return table
+
+    def calculate_spatial_correlation(
+        self,
+        data_type: str,
+        parameter: str,
+        stations: list[str] = [],
+        start_date: str | None = None,
+        end_date: str | None = None,
+        top_k: int = 10,
+        block_size: int = 128,
+        min_periods: int = 30,
+    ) -> tuple[Path, Path] | None:
+        """Calculate station x station correlation of one parameter, with values paired by date.
+
+        The parameter is written into a station x day matrix (np.memmap, each station centered by its mean),
+        and correlations are computed block by block with a masked matrix product (`blocked_correlation`),
+        so memory is bounded by `block_size` rather than the number of stations.
+
+        Outputs in data/statistics/<data_type>:
+            SPATIAL_CORRELATION_<parameter>.npy - float32 station x station matrix (np.load(..., mmap_mode="r")),
+            SPATIAL_CORRELATION_<parameter>.stations.json - station IDs in matrix order,
+            SPATIAL_NEIGHBOURS_<parameter>.csv - top-k most correlated stations for each station.
+
+        Args:
+            data_type: Type of data ['klimat', 'opad', 'synop']
+            parameter: Parameter to correlate
+            stations: List of station IDs (all available stations if empty)
+            start_date: First day 'YYYY-MM-DD' (default: earliest available)
+            end_date: Last day 'YYYY-MM-DD' (default: latest available)
+            top_k: Number of neighbours saved per station
+            block_size: Number of stations per block
+            min_periods: Minimum number of common days for a correlation
+        Returns:
+            Paths of the matrix and neighbours files, or None if there is no data
+        """
+        if parameter not in Dirs.PARAMETER_MAP.get(data_type, []):
+            self.logger.error("Parameter %s not found in PARAMETER_MAP for data type %s", parameter, data_type)
+            return None
+        if stations == []:
+            stations = Dirs.get_stations_id(data_type, start_date, end_date, [parameter])
+        else:
+            stations = self.catalog.prune(data_type, stations, start_date, end_date, [parameter])
+        stations = [str(station) for station in stations if self.store.exists(data_type, str(station))]
+        if not stations:
+            print("No data available for the given stations.")
+            return None
+
+        span = self.catalog.date_span(data_type, stations)
+        if span is None:
+            dates = [self.store.read(data_type, station, ["Data"])["Data"] for station in stations]
+            span = (min(d.min() for d in dates if len(d)), max(d.max() for d in dates if len(d)))
+        first_day = pd.Timestamp(start_date) if start_date is not None else pd.Timestamp(span[0])
+        last_day = pd.Timestamp(end_date) if end_date is not None else pd.Timestamp(span[1])
+        n_days = (last_day - first_day).days + 1
+        if n_days <= 0:
+            self.logger.error("Pusty zakres dat %s - %s", first_day.date(), last_day.date())
+            return None
+
+        output_dir = Path(Dirs.STATISTICS_DIR) / data_type
+        output_dir.mkdir(parents=True, exist_ok=True)
+        name = parameter.replace("/", "_")
+        matrix_path = output_dir / f"SPATIAL_CORRELATION_{name}.npy"
+        values_path = output_dir / f".SPATIAL_VALUES_{name}.npy"
+
+        values = np.lib.format.open_memmap(values_path, mode="w+", dtype=np.float32, shape=(len(stations), n_days))
+        try:
+            for row, station in enumerate(stations):
+                df = self.store.read(data_type, station, ["Data", parameter], first_day, last_day)
+                series = np.full(n_days, np.nan, dtype=np.float32)
+                if df is not None and not df.empty:
+                    days = (df["Data"] - first_day).dt.days.to_numpy()
+                    series[days] = df[parameter].to_numpy(dtype=np.float32)
+                    with warnings.catch_warnings():
+                        warnings.simplefilter("ignore", RuntimeWarning)  # stacja bez wartości w zakresie
+                        series -= np.nan_to_num(np.nanmean(series))
+                values[row] = series
+            values.flush()
+
+            corr = np.lib.format.open_memmap(
+                matrix_path, mode="w+", dtype=np.float32, shape=(len(stations), len(stations))
+            )
+            blocked_correlation(values, corr, block_size, min_periods)
+            corr.flush()
+        finally:
+            del values
+            values_path.unlink(missing_ok=True)
+
+        with open(output_dir / f"SPATIAL_CORRELATION_{name}.stations.json", "w", encoding="utf-8") as file:
+            json.dump(stations, file)
+
+        indices, scores = top_k_neighbours(corr, top_k)
+        station_ids = np.asarray(stations)
+        rank = np.tile(np.arange(1, indices.shape[1] + 1), len(stations))
+        neighbours = pd.DataFrame(
+            {
+                "station": np.repeat(station_ids, indices.shape[1]),
+                "rank": rank,
+                "neighbour": np.where(indices >= 0, station_ids[np.maximum(indices, 0)], "").ravel(),
+                "correlation": scores.ravel(),
+            }
+        )
+        neighbours = neighbours[neighbours["neighbour"] != ""]
+        neighbours_path = output_dir / f"SPATIAL_NEIGHBOURS_{name}.csv"
+        neighbours.to_csv(neighbours_path, index=False)
+        del corr
+        print(f"Spatial correlation for {parameter} saved to {matrix_path} and {neighbours_path}")
+        return matrix_path, neighbours_path
+
+    def _correlation_accumulators(
+        self, data_type: str, stations: list[str], parameters: list[str]
+    ) -> dict[str, CorrelationAccumulator]:
+        """Read each station once and build its correlation accumulator plus the merged global one ('ALL')."""
+        accumulators = {}
+        total = None
+        for station in stations:
+            df = self.store.read(data_type, station, parameters)
+            if df is None:
+                continue
+            values = df[parameters].to_numpy(dtype=np.float64)
+            with warnings.catch_warnings():
+                warnings.simplefilter("ignore", RuntimeWarning)  # kolumna bez wartości
+                shift = np.nan_to_num(np.nanmean(values, axis=0)) if len(values) else None
+            accumulator = CorrelationAccumulator(len(parameters), shift)
+            accumulator.update(values)
+            accumulators[str(station)] = accumulator
+            if total is None:
+                total = CorrelationAccumulator(len(parameters), accumulator.shift)
+            total.merge(accumulator)
+        if total is not None:
+            accumulators["ALL"] = total
+        return accumulators
+
+
+def _summarize_stations(
+    data_type: str, stations: list[str], parameters: list[str], k: int
+) -> tuple[list[dict], dict[str, StreamingSummary]]:
+    """Summarize stations one at a time; returns per-station rows and the merged partial summaries.
+
+    Each station is read in chunks of Dirs.READ_CHUNK_ROWS rows (`StationStore.iter_chunks`), so memory does
+    not depend on the length of a station's history. Defined at module level so it can run in a worker process.
+    """
+    store = StationStore()
+    rows = []
+    totals = {parameter: StreamingSummary(k, seed=0) for parameter in parameters}
+    for station in stations:
+        summaries = {parameter: StreamingSummary(k, seed=0) for parameter in parameters}
+        for chunk in store.iter_chunks(data_type, station, parameters):
+            for parameter, summary in summaries.items():
+                summary.update(chunk[parameter].to_numpy())
+        for parameter, summary in summaries.items():
+            if summary.count:
+                rows.append({"station": str(station), "parameter": parameter, **summary.result()})
+                totals[parameter].merge(summary)
+    return rows, totals
@@ -0,0 +1,158 @@
+from __future__ import annotations
+
+import numpy as np
+
+
+class RunningMoments:
+    """Średnia i wariancja liczone strumieniowo (algorytm Welforda) z możliwością łączenia stanów.
+
+    Porcje danych dodawane są przez `update` (statystyki porcji liczone wektorowo i łączone wzorem
+    Chana i in.), a stany z różnych procesów łączy `merge`. Wynik jest dokładny (z dokładnością float64).
+    """
+
+    def __init__(self):
+        self.count = 0
+        self.mean = 0.0
+        self.m2 = 0.0
+
+    def update(self, values: np.ndarray) -> None:
+        values = np.asarray(values, dtype=np.float64)
+        values = values[~np.isnan(values)]
+        if values.size == 0:
+            return
+        batch = RunningMoments()
+        batch.count = values.size
+        batch.mean = float(values.mean())
+        batch.m2 = float(((values - batch.mean) ** 2).sum())
+        self.merge(batch)
+
+    def merge(self, other: RunningMoments) -> None:
+        if other.count == 0:
+            return
+        count = self.count + other.count
+        delta = other.mean - self.mean
+        self.mean += delta * other.count / count
+        self.m2 += other.m2 + delta**2 * self.count * other.count / count
+        self.count = count
+
+    @property
+    def variance(self) -> float:
+        """Wariancja populacyjna (ddof=0, jak np.var)."""
+        return self.m2 / self.count if self.count else float("nan")
+
+
+class KLLSketch:
+    """Szkic kwantyli KLL (Karnin, Lang, Liberty 2016) o stałym rozmiarze, z możliwością łączenia.
+
+    Wartości trafiają do hierarchii kompaktorów; poziom `h` przechowuje elementy o wadze 2**h, a pojemność
+    poziomów maleje geometrycznie (współczynnik 2/3) od najwyższego, który ma pojemność `k`. Pełny poziom jest
+    sortowany i co drugi element (losowo parzyste lub nieparzyste) przechodzi poziom wyżej. Szkic zajmuje
+    O(k + log(n/k)) elementów niezależnie od liczby wartości `n`.
+
+    Dokładność: błąd rangi zwracanego kwantyla maleje mniej więcej jak 1/k. Analiza KLL daje tylko
+    asymptotyczne O(1/k), więc przyjęty próg pochodzi z empirycznej kalibracji szkiców KLL (Apache DataSketches,
+    tabela błędów dla k=200): z prawdopodobieństwem 99% nie więcej niż ok. 1.65% n, tzn. zwrócona "mediana"
+    leży między kwantylem 0.4835 a 0.5165 rzeczywistych danych. Próg sprawdzają testy tej implementacji
+    (porównanie z np.percentile dla wielu ziaren i porcji danych, także po `merge`). Błąd dotyczy rangi,
+    nie wartości - w obszarach o małej gęstości danych (ogony rozkładu) błąd wartości może być większy.
+    Dopóki nie nastąpi pierwsza kompaktacja (n nie większe niż pojemność poziomu 0), wynik jest dokładny
+    i zgodny z np.percentile.
+    Łączenie szkiców (`merge`) zachowuje tę samą gwarancję względem łącznej liczby wartości.
+    """
+
+    def __init__(self, k: int = 200, seed: int | None = None):
+        self.k = k
+        self.count = 0
+        self.levels: list[np.ndarray] = [np.empty(0)]
+        self._rng = np.random.default_rng(seed)
+
+    def _capacity(self, level: int) -> int:
+        depth = len(self.levels) - level - 1
+        return max(int(np.ceil(self.k * (2 / 3) ** depth)), 2)
+
+    def update(self, values: np.ndarray) -> None:
+        values = np.asarray(values, dtype=np.float64)
+        values = values[~np.isnan(values)]
+        if values.size == 0:
+            return
+        self.count += values.size
+        self.levels[0] = np.concatenate([self.levels[0], values])
+        self._compress()
+
+    def merge(self, other: KLLSketch) -> None:
+        if other.count == 0:
+            return
+        while len(self.levels) < len(other.levels):
+            self.levels.append(np.empty(0))
+        for level, items in enumerate(other.levels):
+            self.levels[level] = np.concatenate([self.levels[level], items])
+        self.count += other.count
+        self._compress()
+
+    def _compress(self) -> None:
+        level = 0
+        while level < len(self.levels):
+            items = self.levels[level]
+            if items.size > self._capacity(level):
+                if level + 1 == len(self.levels):
+                    self.levels.append(np.empty(0))
+                items = np.sort(items)
+                # przy nieparzystej liczbie elementów jeden zostaje na bieżącym poziomie
+                keep, items = items[: items.size % 2], items[items.size % 2 :]
+                promoted = items[self._rng.integers(2) :: 2]
+                self.levels[level] = keep
+                self.levels[level + 1] = np.concatenate([self.levels[level + 1], promoted])
+            level += 1
+
+    def quantiles(self, qs: list[float]) -> np.ndarray:
+        """Zwraca przybliżone kwantyle (interpolacja liniowa między sąsiednimi rangami, jak np.percentile)."""
+        if self.count == 0:
+            return np.full(len(qs), np.nan)
+        items = np.concatenate(self.levels)
+        weights = np.concatenate([np.full(level.size, 2**h, dtype=np.int64) for h, level in enumerate(self.levels)])
+        order = np.argsort(items, kind="stable")
+        items, cumulative = items[order], np.cumsum(weights[order])
+        total = cumulative[-1]
+
+        ranks = (total - 1) * np.asarray(qs, dtype=np.float64)
+        lower = np.floor(ranks)
+        low = items[np.searchsorted(cumulative, lower, side="right")]
+        high = items[np.searchsorted(cumulative, np.minimum(lower + 1, total - 1), side="right")]
+        return low + (high - low) * (ranks - lower)
+
+
+class StreamingSummary:
+    """Strumieniowe podsumowanie jednego parametru: liczność, średnia, wariancja (dokładne) oraz mediana
+    i kwartyle (przybliżone, KLLSketch). Pamięć jest stała, a podsumowania można łączyć przez `merge`."""
+
+    def __init__(self, k: int = 200, seed: int | None = None):
+        self.moments = RunningMoments()
+        self.sketch = KLLSketch(k, seed)
+
+    def update(self, values: np.ndarray) -> None:
+        values = np.asarray(values, dtype=np.float64)
+        values = values[~np.isnan(values)]
+        self.moments.update(values)
+        self.sketch.update(values)
+
+    def merge(self, other: StreamingSummary) -> None:
+        self.moments.merge(other.moments)
+        self.sketch.merge(other.sketch)
+
+    @property
+    def count(self) -> int:
+        return self.moments.count
+
+    def result(self) -> dict:
+        """Statystyki w układzie kolumn `grouped_statistics`."""
+        q25, q50, q75 = self.sketch.quantiles([0.25, 0.5, 0.75])
+        return {
+            "count": self.count,
+            "mean": self.moments.mean,
+            "median": q50,
+            "variance": self.moments.variance,
+            "std_dev": np.sqrt(self.moments.variance),
+            "q25": q25,
+            "q50": q50,
+            "q75": q75,
+        }
@@ -0,0 +1,224 @@
+from __future__ import annotations
+
+import numpy as np
+import pandas as pd
+
+STATISTICS = ["count", "mean", "median", "variance", "std_dev", "q25", "q50", "q75"]
+
+
+def _group_quantile(sorted_values: np.ndarray, starts: np.ndarray, counts: np.ndarray, q: float) -> np.ndarray:
+    """Kwantyl każdej grupy posortowanych wartości (interpolacja liniowa, jak domyślnie w np.percentile)."""
+    position = (counts - 1) * q
+    lower = np.floor(position).astype(np.int64)
+    upper = np.minimum(lower + 1, counts - 1)
+    fraction = position - lower
+    low = sorted_values[starts + lower]
+    high = sorted_values[starts + upper]
+    return low + (high - low) * fraction
+
+
+def grouped_statistics(data: pd.DataFrame, parameters: list[str], key: str = "Kod_stacji") -> pd.DataFrame:
+    """Liczy statystyki opisowe wszystkich parametrów dla wszystkich stacji naraz.
+
+    Dla każdego parametru wartości są raz sortowane po (stacja, wartość); liczności, sumy i odchylenia
+    liczone są przez `np.bincount`, a mediana i kwartyle odczytywane bezpośrednio z posortowanej tablicy.
+    Wyniki są zgodne z np.mean, np.var, np.std (ddof=0) i np.percentile dla każdej stacji osobno.
+
+    Args:
+        data (pd.DataFrame): Dane wielu stacji (kolumna `key` i kolumny parametrów).
+        parameters (list[str]): Parametry do przeliczenia.
+        key (str): Kolumna identyfikująca stację.
+
+    Returns:
+        pd.DataFrame: Tabela w formacie długim: station, parameter oraz kolumny z STATISTICS.
+            Pary (stacja, parametr) bez żadnej wartości są pomijane.
+
+    """
+    stations, codes = np.unique(data[key].to_numpy(), return_inverse=True)
+    frames = []
+    for parameter in parameters:
+        values = data[parameter].to_numpy(dtype=np.float64)
+        valid = ~np.isnan(values)
+        group = codes[valid]
+        values = values[valid]
+
+        order = np.argsort(values, kind="stable")
+        order = order[np.argsort(group[order], kind="stable")]  # sortowanie po (stacja, wartość)
+        sorted_values = values[order]
+        counts = np.bincount(group, minlength=len(stations))
+        present = counts > 0
+        starts = np.concatenate(([0], np.cumsum(counts)[:-1]))
+
+        with np.errstate(invalid="ignore", divide="ignore"):
+            mean = np.bincount(group, weights=values, minlength=len(stations)) / counts
+            variance = np.bincount(group, weights=(values - mean[group]) ** 2, minlength=len(stations)) / counts
+
+        counts, starts = counts[present], starts[present]
+        quartiles = [_group_quantile(sorted_values, starts, counts, q) for q in (0.25, 0.5, 0.75)]
+        frames.append(
+            pd.DataFrame(
+                {
+                    "station": stations[present].astype(str),
+                    "parameter": parameter,
+                    "count": counts,
+                    "mean": mean[present],
+                    "median": quartiles[1],
+                    "variance": variance[present],
+                    "std_dev": np.sqrt(variance[present]),
+                    "q25": quartiles[0],
+                    "q50": quartiles[1],
+                    "q75": quartiles[2],
+                }
+            )
+        )
+    if not frames:
+        return pd.DataFrame(columns=["station", "parameter", *STATISTICS])
+    return pd.concat(frames, ignore_index=True)
+
+
+class CorrelationAccumulator:
+    """Sumy potrzebne do macierzy korelacji Pearsona z pominięciem braków parami (pairwise-complete).
+
+    Dla każdej pary parametrów (i, j) liczone są - tylko po wierszach, w których oba są niepuste - liczność,
+    sumy, sumy kwadratów i suma iloczynów. Wiersze to kolejne dni stacji, więc pary wartości są
+    wyrównane po dacie. Sumy wylicza kilka mnożeń macierzy (n, p) x (n, p), a akumulatory różnych stacji
+    (lub procesów) można łączyć przez `merge`, np. w globalną macierz dla wszystkich stacji.
+    """
+
+    def __init__(self, n_parameters: int, shift: np.ndarray | None = None):
+        p = n_parameters
+        # przesunięcie wartości (np. o przybliżoną średnią) ogranicza utratę precyzji przy odejmowaniu sum
+        self.shift = np.zeros(p) if shift is None else np.asarray(shift, dtype=np.float64)
+        self.n = np.zeros((p, p))
+        self.sum_x = np.zeros((p, p))
+        self.sum_xx = np.zeros((p, p))
+        self.sum_xy = np.zeros((p, p))
+
+    def update(self, values: np.ndarray) -> None:
+        """Dodaje wiersze (n, p) - kolumny w kolejności parametrów, NaN oznacza brak."""
+        values = np.asarray(values, dtype=np.float64) - self.shift
+        mask = ~np.isnan(values)
+        x = np.where(mask, values, 0.0)
+        m = mask.astype(np.float64)
+        self.n += m.T @ m
+        self.sum_x += x.T @ m  # [i, j] = suma x_i po wierszach, gdzie obecne są i oraz j
+        self.sum_xx += (x * x).T @ m
+        self.sum_xy += x.T @ x
+
+    def merge(self, other: CorrelationAccumulator) -> None:
+        delta = other.shift - self.shift  # sprowadzenie sum drugiego akumulatora do wspólnego przesunięcia
+        sum_x = other.sum_x + delta[:, None] * other.n
+        self.sum_xx += other.sum_xx + 2 * delta[:, None] * other.sum_x + delta[:, None] ** 2 * other.n
+        self.sum_xy += (
+            other.sum_xy
+            + delta[:, None] * other.sum_x.T
+            + delta[None, :] * other.sum_x
+            + np.outer(delta, delta) * other.n
+        )
+        self.sum_x += sum_x
+        self.n += other.n
+
+    def matrix(self) -> tuple[np.ndarray, np.ndarray]:
+        """Zwraca (macierz korelacji, liczność par). Pary bez zmienności lub z mniej niż 2 wierszami dają NaN."""
+        n, sx, sy = self.n, self.sum_x, self.sum_x.T
+        with np.errstate(invalid="ignore", divide="ignore"):
+            cov = n * self.sum_xy - sx * sy
+            var_x = n * self.sum_xx - sx**2
+            var_y = n * self.sum_xx.T - sy**2
+            corr = cov / np.sqrt(var_x * var_y)
+        corr[(n < 2) | (var_x <= 0) | (var_y <= 0)] = np.nan
+        return np.clip(corr, -1.0, 1.0), n.astype(np.int64)
+
+
+def correlation_table(accumulators: dict[str, CorrelationAccumulator], parameters: list[str]) -> pd.DataFrame:
+    """Zamienia akumulatory (stacja -> CorrelationAccumulator) na tabelę: station, parameter1, parameter2, n,
+    correlation (każda para parametrów raz, i < j)."""
+    upper = np.triu_indices(len(parameters), k=1)
+    frames = []
+    for station, accumulator in accumulators.items():
+        corr, n = accumulator.matrix()
+        frames.append(
+            pd.DataFrame(
+                {
+                    "station": str(station),
+                    "parameter1": np.asarray(parameters)[upper[0]],
+                    "parameter2": np.asarray(parameters)[upper[1]],
+                    "n": n[upper],
+                    "correlation": corr[upper],
+                }
+            )
+        )
+    if not frames:
+        return pd.DataFrame(columns=["station", "parameter1", "parameter2", "n", "correlation"])
+    return pd.concat(frames, ignore_index=True)
+
+
+def blocked_correlation(
+    values: np.ndarray, output: np.ndarray, block_size: int = 128, min_periods: int = 30
+) -> np.ndarray:
+    """Liczy macierz korelacji wierszy (stacja x dzień) blokami, z pominięciem braków parami.
+
+    Dla każdej pary bloków wierszy (I, J), J >= I, sumy po wspólnych dniach liczone są mnożeniami
+    macierzy zamaskowanych (NaN -> 0) - pamięć zależy od `block_size`, a nie od liczby stacji,
+    więc `values` i `output` mogą być plikami np.memmap.
+
+    Args:
+        values (np.ndarray): Macierz (stacje, dni) z NaN w miejscu braków, najlepiej wycentrowana wierszami.
+        output (np.ndarray): Macierz (stacje, stacje) na wynik.
+        block_size (int): Liczba stacji w bloku.
+        min_periods (int): Minimalna liczba wspólnych dni; mniej daje NaN.
+
+    Returns:
+        np.ndarray: `output` wypełniona korelacjami (na przekątnej 1 lub NaN).
+
+    """
+    n_rows = values.shape[0]
+
+    def load(start: int) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+        block = np.asarray(values[start : start + block_size], dtype=np.float64)
+        mask = ~np.isnan(block)
+        x = np.where(mask, block, 0.0)
+        return x, x * x, mask.astype(np.float64)
+
+    for i in range(0, n_rows, block_size):
+        x_i, xx_i, m_i = load(i)
+        for j in range(i, n_rows, block_size):
+            x_j, xx_j, m_j = (x_i, xx_i, m_i) if j == i else load(j)
+            n = m_i @ m_j.T
+            sum_x, sum_y = x_i @ m_j.T, m_i @ x_j.T
+            with np.errstate(invalid="ignore", divide="ignore"):
+                var_x = n * (xx_i @ m_j.T) - sum_x**2
+                var_y = n * (m_i @ xx_j.T) - sum_y**2
+                corr = (n * (x_i @ x_j.T) - sum_x * sum_y) / np.sqrt(var_x * var_y)
+            corr[(n < max(min_periods, 2)) | (var_x <= 0) | (var_y <= 0)] = np.nan
+            corr = np.clip(corr, -1.0, 1.0)
+            output[i : i + len(x_i), j : j + len(x_j)] = corr
+            output[j : j + len(x_j), i : i + len(x_i)] = corr.T
+    return output
+
+
+def top_k_neighbours(corr: np.ndarray, k: int, block_size: int = 1024) -> tuple[np.ndarray, np.ndarray]:
+    """Zwraca dla każdego wiersza indeksy i wartości `k` największych korelacji z innymi wierszami.
+
+    Brakujące korelacje (NaN) i sama stacja są pomijane; gdy sąsiadów jest mniej niż `k`, reszta to -1 / NaN.
+    """
+    n_rows = corr.shape[0]
+    k = min(k, max(n_rows - 1, 0))
+    indices = np.full((n_rows, k), -1, dtype=np.int64)
+    scores = np.full((n_rows, k), np.nan)
+    for start in range(0, n_rows, block_size):
+        block = np.array(corr[start : start + block_size], dtype=np.float64)
+        rows = np.arange(len(block))
+        block[rows, start + rows] = np.nan
+        block = np.where(np.isnan(block), -np.inf, block)
+        if k == 0:
+            continue
+        best = np.argpartition(-block, k - 1, axis=1)[:, :k]
+        best_scores = np.take_along_axis(block, best, axis=1)
+        order = np.argsort(-best_scores, axis=1, kind="stable")
+        best = np.take_along_axis(best, order, axis=1)
+        best_scores = np.take_along_axis(best_scores, order, axis=1)
+        valid = np.isfinite(best_scores)
+        indices[start : start + len(block)] = np.where(valid, best, -1)
+        scores[start : start + len(block)] = np.where(valid, best_scores, np.nan)
+    return indices, scores
@@ -0,0 +1,866 @@
+from __future__ import annotations
+
+import os
+import shutil
+import subprocess
+import sys
+import threading
+import warnings
+import zipfile
+from functools import partial
+from http.server import SimpleHTTPRequestHandler, ThreadingHTTPServer
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from meteopy.consts.dirs import Dirs
+from meteopy.utils.startup_benchmark import STARTUP_BUDGET_SECONDS, heavy_imports, import_times
+
+CLI_MODULE = "meteopy.workflow.entrypoint"
+
+
+@pytest.fixture(scope="session", autouse=True)
+def log_file(tmp_path_factory):
+    """Kieruje logi testów (także uruchamianych podprocesów) do katalogu tymczasowego zamiast meteopy/logs."""
+    from meteopy.utils.log_module import configure_logging
+
+    path = tmp_path_factory.mktemp("logs") / "app.log"
+    with pytest.MonkeyPatch.context() as monkeypatch:
+        monkeypatch.setenv("METEOPY_LOG_FILE", str(path))
+        configure_logging(log_file=path)
+        yield path
+
+
+def test_cli_import_skips_heavy_dependencies():
+    assert heavy_imports(import_times(CLI_MODULE)) == []
+
+
+def test_package_import_skips_heavy_dependencies():
+    assert heavy_imports(import_times("meteopy")) == []
+
+
+def test_cli_startup_within_budget():
+    # najlepszy z kilku pomiarów - pojedynczy może być zawyżony przez zimny cache dysku
+    best = min(import_times(CLI_MODULE)[CLI_MODULE] for _ in range(3))
+    assert best < STARTUP_BUDGET_SECONDS, f"import {CLI_MODULE} trwa {best:.3f} s"
+
+
+def test_cli_help_lists_commands():
+    result = subprocess.run(
+        [sys.executable, "-m", CLI_MODULE, "--help"], capture_output=True, text=True, check=True
+    )
+    for command in ("download", "full_analysis", "basic_summary", "drop_data", "build_store"):
+        assert command in result.stdout
+
+
+@pytest.fixture
+def imgw_server(tmp_path, monkeypatch):
+    """Lokalny serwer HTTP z katalogiem klimat/2001/ w układzie IMGW (dwa małe archiwa ZIP)."""
+    site = tmp_path / "site"
+    year_dir = site / "klimat" / "2001"
+    year_dir.mkdir(parents=True)
+    for month in ("01", "02"):
+        with zipfile.ZipFile(year_dir / f"2001_{month}_k.zip", "w") as archive:
+            rows = "".join(f"249180010,TEST,2001,{int(month)},{day},1.0\n" for day in (1, 2))
+            archive.writestr(f"k_d_{month}_2001.csv", rows)
+            archive.writestr(f"k_d_t_{month}_2001.csv", "pomijany\n")
+    monkeypatch.setattr(Dirs, "DATA_DIR", tmp_path / "downloaded")
+    served = []  # (ścieżka, kod odpowiedzi) każdego zapytania
+
+    class Handler(SimpleHTTPRequestHandler):
+        def log_request(self, code="-", size="-"):
+            served.append((self.path, int(code)))
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), partial(Handler, directory=str(site)))
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    yield f"http://127.0.0.1:{server.server_address[1]}/", served
+    server.shutdown()
+    server.server_close()
+
+
+def test_download_files_fetches_archives_through_shared_session(imgw_server):
+    from meteopy.data_fetchers.imgw_fetcher import KODataFetcher
+
+    base_url, served = imgw_server
+    fetcher = KODataFetcher(max_workers=4, base_url=base_url)
+    requested = []
+    session_get = fetcher.session.get
+
+    def recording_get(url, **kwargs):
+        requested.append(url)
+        return session_get(url, **kwargs)
+
+    fetcher.session.get = recording_get
+
+    archives = fetcher.collect_archives(2001, 2001, 1)
+    assert sorted(url.rsplit("/", 1)[1] for url in archives) == ["2001_01_k.zip", "2001_02_k.zip"]
+
+    missing = base_url + "klimat/2001/2001_03_k.zip"
+    fetcher.tempdata_dir = Dirs.DATA_DIR / "klimat"
+    fetcher.tempdata_dir.mkdir(parents=True)
+    failed = fetcher.download_files([*archives, missing], unzip=True)
+
+    assert failed == [missing]
+    assert sorted(path.name for path in fetcher.tempdata_dir.iterdir()) == ["k_d_01_2001.csv", "k_d_02_2001.csv"]
+    assert sorted(set(archives) | {missing}) == sorted(url for url in requested if url.endswith(".zip"))
+    assert ("/klimat/2001/2001_03_k.zip", 404) in served
+
+
+def test_unchanged_archives_are_not_transferred_again(imgw_server):
+    from meteopy.data_fetchers.imgw_fetcher import KODataFetcher
+
+    base_url, served = imgw_server
+    KODataFetcher(base_url=base_url).fetch(2001, 2001, 1)
+    assert sorted(code for path, code in served if path.endswith(".zip")) == [200, 200]
+
+    served.clear()
+    fetcher = KODataFetcher(base_url=base_url)  # manifest wczytany z dysku
+    fetcher.tempdata_dir = Dirs.DATA_DIR / "klimat"
+    archives = fetcher.collect_archives(2001, 2001, 1)
+    assert [fetcher.download_file(url, unzip=True) for url in archives] == [False, False]
+    assert sorted(code for path, code in served if path.endswith(".zip")) == [304, 304]
+
+
+def test_stream_manifest_is_saved_only_after_rows_are_written(imgw_server, data_dirs, monkeypatch):
+    from meteopy.data_fetchers.imgw_fetcher import KODataFetcher
+    from meteopy.preprocessing.imgw_handler import IMGWDataHandler
+    from meteopy.preprocessing.partition_writer import StationPartitionWriter
+
+    base_url, served = imgw_server
+    handler = IMGWDataHandler()
+    fetcher = KODataFetcher(base_url=base_url)
+
+    def failing_flush(self):
+        raise OSError("No space left on device")
+
+    with monkeypatch.context() as patch:
+        patch.setattr(StationPartitionWriter, "flush", failing_flush)
+        with pytest.raises(OSError):
+            handler.divide_stream(fetcher.stream_members(2001, 2001, 1), "klimat", manifest=fetcher.manifest)
+    assert not fetcher.manifest.path.exists()
+
+    # kolejne uruchomienie pobiera archiwa ponownie (bez 304) i dopiero wtedy zapisuje manifest
+    served.clear()
+    fetcher = KODataFetcher(base_url=base_url)
+    handler.divide_stream(fetcher.stream_members(2001, 2001, 1), "klimat", manifest=fetcher.manifest)
+    assert sorted(code for path, code in served if path.endswith(".zip")) == [200, 200]
+    assert fetcher.manifest.path.exists()
+    assert (Dirs.STAGING_DIR / "klimat" / "249180010.csv").is_file()
+
+
+def _series_with_gaps(n: int = 400, seed: int = 0) -> pd.Series:
+    """Szereg dobowy z pojedynczymi brakami i kilkoma dłuższymi lukami."""
+    rng = np.random.default_rng(seed)
+    days = pd.date_range("2000-01-01", periods=n, freq="D")
+    values = pd.Series(10 + 5 * np.sin(np.arange(n) / 30) + rng.normal(0, 1, n), index=days)
+    values.iloc[rng.choice(n, n // 10, replace=False)] = np.nan
+    values.iloc[100:104] = np.nan
+    values.iloc[200:230] = np.nan
+    return values
+
+
+def test_fill_rolling_mean_matches_pandas_rolling():
+    from meteopy.preprocessing.imputation import fill_rolling_mean
+
+    window = 50
+    values = _series_with_gaps().reset_index(drop=True)
+    values.iloc[0] = np.nan
+    values.iloc[300:380] = np.nan  # luka dłuższa niż okno
+    filled = fill_rolling_mean(values.to_numpy(), window)[:, 0]
+
+    # średnia pomiarów z `window` poprzednich wierszy; pierwszy wiersz 0, dalej w długiej luce poprzednia wartość
+    expected = values.fillna(values.shift(1).rolling(window, min_periods=1).mean())
+    expected.iloc[0] = 0.0
+    expected = expected.ffill()
+    np.testing.assert_allclose(filled, expected, rtol=1e-12)
+    assert np.all(filled[350:380] == filled[349])
+
+    # kolumny uzupełniane są niezależnie
+    two_columns = np.column_stack([values, values[::-1].to_numpy()])
+    np.testing.assert_allclose(fill_rolling_mean(two_columns, window)[:, 0], filled)
+
+    # przetwarzanie od środka szeregu: kontekst to uzupełnione wiersze z maską pomiarów
+    for split in (120, 340, 385):
+        context = slice(split - window, split)
+        tail = np.concatenate([filled[context], values.to_numpy()[split:]])
+        measured = np.concatenate([values.notna().to_numpy()[context], np.ones(len(values) - split, dtype=bool)])
+        np.testing.assert_allclose(fill_rolling_mean(tail, window, measured)[window:, 0], filled[split:], rtol=1e-12)
+
+
+def test_fill_linear_matches_pandas_interpolate_within_max_gap():
+    from meteopy.preprocessing.imputation import fill_linear
+
+    values = _series_with_gaps()
+    values = values.drop(values.index[300:320])  # dni bez wierszy
+    values.iloc[299] = np.nan  # jeden brakujący wiersz między pomiarami odległymi o 22 dni
+    days = values.index.to_numpy().astype("datetime64[D]").astype(np.int64)
+    max_gap = 7
+
+    filled = pd.Series(fill_linear(values.to_numpy(), max_gap, days)[:, 0], index=values.index)
+
+    observed = values.dropna()
+    gap_days = pd.Series(observed.index, index=observed.index).diff().dt.days - 1
+    gap_to_next = gap_days.reindex(values.index).bfill()
+    expected = values.interpolate(method="time", limit_area="inside").where(values.notna() | (gap_to_next <= max_gap))
+    pd.testing.assert_series_equal(filled, expected)
+    assert np.isnan(filled.iloc[299])
+    assert filled.iloc[100:104].notna().all() and filled.iloc[200:230].isna().all()
+
+    # bez `positions` długość luki to liczba kolejnych brakujących wierszy
+    by_rows = fill_linear(values.to_numpy(), 20)[:, 0]
+    assert not np.isnan(by_rows[299])
+
+
+def test_fill_climatology_matches_pandas_groupby():
+    from meteopy.preprocessing.imputation import fill_climatology
+
+    values = _series_with_gaps(n=3 * 365)
+    values[values.index.dayofyear == 45] = np.nan  # dzień roku bez pomiaru zostaje pusty
+    day_of_year = values.index.dayofyear.to_numpy()
+
+    filled = fill_climatology(values.to_numpy(), day_of_year)[:, 0]
+    expected = values.fillna(values.groupby(day_of_year).transform("mean"))
+    np.testing.assert_allclose(filled, expected)
+    assert np.isnan(filled[day_of_year == 45]).all()
+
+
+@pytest.fixture
+def data_dirs(tmp_path, monkeypatch):
+    """Przekierowuje katalogi danych pakietu do katalogu tymczasowego."""
+    for name in ("SEPARATED_DIR", "STAGING_DIR", "RAW_DIR", "STATE_DIR", "STORE_DIR", "ROLLUP_DIR", "FORECAST_DIR"):
+        monkeypatch.setattr(Dirs, name, tmp_path / name.lower())
+    monkeypatch.setattr(Dirs, "CATALOG_PATH", tmp_path / "catalog.sqlite")
+    monkeypatch.setattr(Dirs, "MODEL_CACHE_PATH", tmp_path / "models.sqlite")
+    return tmp_path
+
+
+def _klimat_rows(dates: pd.DatetimeIndex, missing: np.ndarray, seed: int = 0) -> pd.DataFrame:
+    """Surowe wiersze klimat w układzie IMGW; wartości z `missing` mają status 8 (brak pomiaru)."""
+    rng = np.random.default_rng(seed)
+    schema = Dirs.SCHEMA["klimat"]
+    rows = pd.DataFrame(0.0, index=range(len(dates)), columns=range(schema["raw_columns"]))
+    rows[0], rows[1] = 249180010, "TEST"
+    rows[2], rows[3], rows[4] = dates.year, dates.month, dates.day
+    for value_column, flag_column in zip(schema["value_columns"], schema["flag_columns"]):
+        rows[value_column] = np.round(rng.normal(5, 3, len(dates)), 1)
+        rows[flag_column] = np.where(missing, 8, 0)
+    return rows
+
+
+def _stage(rows: pd.DataFrame) -> None:
+    staged_file = Dirs.STAGING_DIR / "klimat" / "249180010.csv"
+    staged_file.parent.mkdir(parents=True, exist_ok=True)
+    rows.to_csv(staged_file, index=False, encoding=Dirs.ENCODING)
+
+
+def _processed_station() -> tuple[pd.DataFrame, pd.DataFrame, pd.DataFrame, tuple]:
+    """Przetworzony plik, magazyn, agregaty miesięczne i wpis katalogu stacji testowej."""
+    from meteopy.preprocessing.rollups import RollupStore
+    from meteopy.preprocessing.station_store import StationStore
+    from meteopy.utils.station_catalog import StationCatalog
+
+    processed = pd.read_csv(Dirs.SEPARATED_DIR / "klimat" / "249180010.csv", encoding=Dirs.ENCODING)
+    stored = StationStore().read("klimat", "249180010")
+    rollups = RollupStore().read("klimat", ["249180010"], "month")
+    catalog = StationCatalog()
+    parameter = Dirs.PARAMETER_MAP["klimat"][1]
+    entry = catalog.stations("klimat", "1999-10-01", "1999-10-31", [parameter]), catalog.paths("klimat")
+    return processed, stored, rollups, entry
+
+
+@pytest.mark.parametrize("mode", [1, 2, 3, 4, 5])
+def test_incremental_preprocessing_matches_full_run(data_dirs, mode):
+    from meteopy.preprocessing.imgw_handler import IMGWDataHandler
+
+    dates = pd.date_range("1999-10-01", "2000-06-30", freq="D")
+    missing = np.random.default_rng(1).random(len(dates)) < 0.15
+    # luka na styku kolejnych aktualizacji: trzy ostatnie dni pierwszej i dwa pierwsze dni drugiej
+    missing[dates.isin(pd.date_range("2000-03-29", "2000-04-02"))] = True
+    rows = _klimat_rows(dates, missing)
+    correction = rows[dates == "2000-02-10"].copy()
+    correction[[5, 6]] = [99.0, 0]
+    batches = [
+        rows[(dates >= "2000-01-01") & (dates <= "2000-03-31")],
+        rows[dates >= "2000-04-01"],
+        pd.concat([rows[dates < "2000-01-01"], correction]),  # zaległe miesiące i korekta przetworzonego dnia
+    ]
+
+    _stage(pd.concat(batches))
+    IMGWDataHandler().preprocess(mode)
+    full = _processed_station()
+
+    for name in ("SEPARATED_DIR", "RAW_DIR", "STATE_DIR", "STORE_DIR", "ROLLUP_DIR"):
+        shutil.rmtree(getattr(Dirs, name), ignore_errors=True)
+    Dirs.CATALOG_PATH.unlink()
+    statuses = []
+    for batch in batches:
+        _stage(batch)
+        statuses += IMGWDataHandler().preprocess(mode).values()
+    incremental = _processed_station()
+
+    assert statuses == ["processed", "reprocessed" if mode == 5 else "appended", "reprocessed"]
+    pd.testing.assert_frame_equal(incremental[0], full[0], rtol=1e-5)
+    pd.testing.assert_frame_equal(incremental[1], full[1], rtol=1e-5)
+    pd.testing.assert_frame_equal(incremental[2], full[2], rtol=1e-5)
+    assert incremental[3] == full[3]
+    assert (full[0]["Maksymalna_temperatura_dobowa_[C]"] == 99.0).sum() == 1
+    if mode == 4:
+        boundary = full[0]["Data"].between("2000-03-29", "2000-04-02")
+        assert full[0].loc[boundary, "Minimalna_temperatura_dobowa_[C]"].notna().all()
+
+    IMGWDataHandler().preprocess(mode)  # bez nowych wierszy nic się nie zmienia
+    pd.testing.assert_frame_equal(_processed_station()[0], incremental[0])
+
+
+def _write_processed(dates: pd.DatetimeIndex, station: str = "249180010") -> pd.DataFrame:
+    df = pd.DataFrame({"Kod_stacji": int(station), "Nazwa_stacji": "TEST", "Data": dates.strftime("%Y-%m-%d")})
+    df["v"] = np.arange(len(dates))
+    csv_file = Dirs.SEPARATED_DIR / "klimat" / f"{station}.csv"
+    csv_file.parent.mkdir(parents=True, exist_ok=True)
+    df.to_csv(csv_file, index=False, encoding=Dirs.ENCODING)
+    return df
+
+
+def test_year_index_is_rebuilt_when_a_grown_file_was_rewritten(data_dirs):
+    from meteopy.preprocessing.station_store import StationStore
+
+    store = StationStore()
+    _write_processed(pd.date_range("2001-01-01", "2002-12-31"))
+    assert sorted(store.year_index("klimat", "249180010")["years"]) == ["2001", "2002"]
+
+    # dopisanie nowych dni: indeks jest rozszerzany
+    _write_processed(pd.date_range("2001-01-01", "2003-06-30"))
+    assert sorted(store.year_index("klimat", "249180010")["years"]) == ["2001", "2002", "2003"]
+
+    # plik przepisany od wcześniejszej daty i większy niż poprzednio: stare pozycje lat są nieaktualne
+    expected = _write_processed(pd.date_range("1999-01-01", "2003-12-31"))
+    index = store.year_index("klimat", "249180010")
+    assert sorted(index["years"]) == ["1999", "2000", "2001", "2002", "2003"]
+    store.index_path("klimat", "249180010").unlink()
+    assert store.year_index("klimat", "249180010")["years"] == index["years"]
+
+    year = store.read("klimat", "249180010", ["v"], "2001-01-01", "2001-12-31")
+    np.testing.assert_array_equal(year["v"], expected.loc[expected["Data"].str.startswith("2001"), "v"])
+
+
+def test_store_append_rewrites_only_the_affected_years(data_dirs):
+    from meteopy.preprocessing.station_store import StationStore
+
+    store = StationStore()
+    station = "249180010"
+    store.write("klimat", station, _write_processed(pd.date_range("1999-01-01", "2001-06-30"), station))
+    directory = store.parquet_dir("klimat", station)
+    untouched = {year: (directory / f"{year}.parquet").stat().st_mtime_ns for year in (1999, 2000)}
+
+    def assert_matches_csv() -> None:
+        assert store.has_parquet("klimat", station)
+        expected = StationStore.to_typed(pd.read_csv(store.csv_path("klimat", station), encoding=Dirs.ENCODING))
+        pd.testing.assert_frame_equal(store.read("klimat", station), expected, check_dtype=False)
+        ranged = store.read("klimat", station, ["v"], "2000-12-30", "2001-01-02")
+        in_range = expected["Data"].between("2000-12-30", "2001-01-02")
+        np.testing.assert_array_equal(ranged["v"], expected.loc[in_range, "v"])
+
+    # nowe dni (z korektą ostatniego miesiąca): przepisywane są tylko pliki lat 2001 i 2002
+    grown = _write_processed(pd.date_range("1999-01-01", "2002-03-31"), station)
+    assert not store.has_parquet("klimat", station)
+    store.append("klimat", station, grown[grown["Data"] >= "2001-06-01"])
+    assert sorted(int(path.stem) for path in directory.glob("*.parquet")) == [1999, 2000, 2001, 2002]
+    assert {year: (directory / f"{year}.parquet").stat().st_mtime_ns for year in (1999, 2000)} == untouched
+    assert_matches_csv()
+
+    # dane przepisane od wcześniejszej daty i krótsze: pliki późniejszych lat znikają
+    shrunk = _write_processed(pd.date_range("1999-01-01", "2000-08-31"), station)
+    store.append("klimat", station, shrunk[shrunk["Data"] >= "2000-03-01"])
+    assert sorted(int(path.stem) for path in directory.glob("*.parquet")) == [1999, 2000]
+    assert_matches_csv()
+
+    # magazyn niezgodny z CSV przed aktualizacją jest odtwarzany z całego pliku
+    _write_processed(pd.date_range("1998-01-01", "2000-09-30"), station)
+    store.append("klimat", station, shrunk.tail(1), rebuild=True)
+    assert_matches_csv()
+
+
+def _station_frame(n_stations: int = 6, n_rows: int = 200, seed: int = 0) -> pd.DataFrame:
+    """Dane kilku stacji z brakami; stacja 1 ma jeden wiersz, stacja 2 nie ma żadnej wartości parametru b."""
+    rng = np.random.default_rng(seed)
+    data = pd.DataFrame(
+        {
+            "Kod_stacji": rng.integers(3, 3 + n_stations, n_rows),
+            "a": rng.normal(10, 4, n_rows),
+            "b": rng.gamma(2, 3, n_rows).round(1),
+        }
+    )
+    data.loc[rng.random(n_rows) < 0.2, "a"] = np.nan
+    data.loc[rng.random(n_rows) < 0.2, "b"] = np.nan
+    extra = pd.DataFrame({"Kod_stacji": [1, 2, 2], "a": [4.5, 1.0, np.nan], "b": [2.0, np.nan, np.nan]})
+    return pd.concat([data, extra], ignore_index=True)
+
+
+def test_grouped_statistics_matches_pandas_groupby():
+    from meteopy.statistics.stats_engine import grouped_statistics
+
+    data = _station_frame()
+    result = grouped_statistics(data, ["a", "b"]).set_index(["station", "parameter"]).sort_index()
+
+    rows = []
+    for parameter in ("a", "b"):
+        for station, values in data.groupby("Kod_stacji")[parameter]:
+            values = values.dropna()
+            if values.empty:
+                continue
+            q25, q50, q75 = np.percentile(values, [25, 50, 75])
+            rows.append(
+                {
+                    "station": str(station),
+                    "parameter": parameter,
+                    "count": len(values),
+                    "mean": np.mean(values),
+                    "median": np.median(values),
+                    "variance": np.var(values),
+                    "std_dev": np.std(values),
+                    "q25": q25,
+                    "q50": q50,
+                    "q75": q75,
+                }
+            )
+    expected = pd.DataFrame(rows).set_index(["station", "parameter"]).sort_index()
+
+    assert ("2", "b") not in result.index and result.loc[("1", "a"), "count"] == 1
+    pd.testing.assert_frame_equal(result, expected, check_dtype=False)
+
+
+def _rank_error(data: np.ndarray, estimates: np.ndarray, qs: np.ndarray) -> np.ndarray:
+    """Odległość kwantyli `qs` od przedziału rang, jaki wartości `estimates` zajmują w `data`."""
+    data = np.sort(data)
+    lower = np.searchsorted(data, estimates, side="left") / data.size
+    upper = np.searchsorted(data, estimates, side="right") / data.size
+    return np.maximum(0.0, np.maximum(lower - qs, qs - upper))
+
+
+KLL_RANK_ERROR = 0.0165  # deklarowany w KLLSketch błąd rangi dla k=200
+QUANTILES = np.linspace(0.01, 0.99, 99)
+
+
+@pytest.mark.parametrize("seed", range(20))
+def test_kll_quantiles_within_rank_error_bound(seed):
+    from meteopy.statistics.sketches import KLLSketch
+
+    rng = np.random.default_rng(seed)
+    data = np.concatenate([rng.gamma(2.0, 3.0, 30_000), rng.normal(-5, 1, 20_000)])
+    rng.shuffle(data)
+    sketch = KLLSketch(200, seed=seed)
+    for chunk in np.array_split(data, 37):
+        sketch.update(chunk)
+
+    assert sketch.count == data.size
+    assert sum(level.size for level in sketch.levels) < 1_000
+    assert _rank_error(data, sketch.quantiles(QUANTILES), QUANTILES).max() <= KLL_RANK_ERROR
+
+
+def test_merged_kll_sketches_match_single_sketch():
+    from meteopy.statistics.sketches import KLLSketch
+
+    rng = np.random.default_rng(0)
+    stations = [rng.normal(loc, scale, size) for loc, scale, size in [(0, 1, 9_000), (4, 2, 15_000), (-3, 0.5, 600)]]
+    data = np.concatenate(stations)
+
+    single = KLLSketch(200, seed=0)
+    single.update(data)
+    merged = KLLSketch(200, seed=0)
+    for values in stations:
+        station_sketch = KLLSketch(200, seed=0)
+        for chunk in np.array_split(values, 5):
+            station_sketch.update(chunk)
+        merged.merge(station_sketch)
+
+    assert merged.count == single.count == data.size
+    for sketch in (single, merged):
+        assert _rank_error(data, sketch.quantiles(QUANTILES), QUANTILES).max() <= KLL_RANK_ERROR
+    # przed pierwszą kompaktacją szkic przechowuje wszystkie wartości - wynik dokładny
+    small = [values[:40] for values in stations]
+    merged_small = KLLSketch(200, seed=0)
+    for values in small:
+        station_sketch = KLLSketch(200, seed=0)
+        station_sketch.update(values)
+        merged_small.merge(station_sketch)
+    np.testing.assert_allclose(merged_small.quantiles(QUANTILES), np.percentile(np.concatenate(small), QUANTILES * 100))
+
+
+def test_streaming_statistics_read_stations_in_chunks(data_dirs):
+    from meteopy.preprocessing.station_store import StationStore
+    from meteopy.statistics.imgw_stats import _summarize_stations
+
+    frames = [
+        _write_processed(pd.date_range("2001-01-01", "2003-12-31"), station) for station in ("249180010", "249180020")
+    ]
+    chunks = list(StationStore().iter_chunks("klimat", "249180010", ["v"], chunk_rows=100))
+    assert len(chunks) == 11 and max(len(chunk) for chunk in chunks) == 100
+    np.testing.assert_array_equal(pd.concat(chunks)["v"], frames[0]["v"])
+
+    rows, totals = _summarize_stations("klimat", ["249180010", "249180020", "missing"], ["v"], 200)
+    assert [row["station"] for row in rows] == ["249180010", "249180020"]
+    for row, frame in zip(rows, frames):
+        assert row["count"] == len(frame)
+        assert row["mean"] == pytest.approx(frame["v"].mean())
+        assert row["variance"] == pytest.approx(frame["v"].var(ddof=0))
+    values = pd.concat(frames)["v"].to_numpy()
+    assert totals["v"].count == values.size
+    assert _rank_error(values, totals["v"].sketch.quantiles(QUANTILES), QUANTILES).max() <= KLL_RANK_ERROR
+
+
+def test_merged_correlation_accumulators_match_pandas_corr():
+    from meteopy.statistics.stats_engine import CorrelationAccumulator
+
+    rng = np.random.default_rng(0)
+    n_rows, min_periods = 3_000, 20
+    base = rng.normal(size=n_rows)
+    values = np.column_stack(
+        [
+            1e5 + base + rng.normal(0, 0.5, n_rows),  # duża średnia - precyzja zależy od przesunięcia
+            -3 * base + rng.normal(0, 2, n_rows),
+            rng.normal(50, 10, n_rows),
+            base + rng.normal(0, 0.1, n_rows),
+        ]
+    )
+    values[rng.random(values.shape) < 0.2] = np.nan
+    values[rng.random(n_rows) < 0.995, 3] = np.nan  # mniej niż min_periods wspólnych dni z resztą
+    frame = pd.DataFrame(values)
+
+    merged = None
+    for chunk in np.array_split(values, 7):
+        # każda porcja z innym przesunięciem (średnią porcji), jak akumulatory kolejnych stacji lub procesów
+        with warnings.catch_warnings():
+            warnings.simplefilter("ignore", RuntimeWarning)
+            shift = np.nan_to_num(np.nanmean(chunk, axis=0))
+        accumulator = CorrelationAccumulator(values.shape[1], shift)
+        accumulator.update(chunk)
+        if merged is None:
+            merged = CorrelationAccumulator(values.shape[1], accumulator.shift)
+        merged.merge(accumulator)
+    corr, n = merged.matrix()
+    corr[n < min_periods] = np.nan
+
+    mask = (~frame.isna()).astype(int)
+    np.testing.assert_array_equal(n, mask.T @ mask)
+    assert np.isnan(corr[0, 3]) and not np.isnan(corr[0, 1])
+    np.testing.assert_allclose(corr, frame.corr(min_periods=min_periods).to_numpy(), rtol=1e-9, atol=1e-12)
+
+
+def test_blocked_correlation_matches_pairwise_corrcoef(tmp_path):
+    from meteopy.statistics.stats_engine import blocked_correlation, top_k_neighbours
+
+    rng = np.random.default_rng(0)
+    n_stations, n_days, min_periods = 11, 400, 30
+    signal = rng.normal(size=n_days)
+    values = signal * rng.uniform(-1, 1, (n_stations, 1)) + rng.normal(0, 0.5, (n_stations, n_days))
+    values[rng.random(values.shape) < 0.3] = np.nan
+    values[4, 30:] = np.nan  # mniej niż min_periods wspólnych dni
+    values[7] = 2.0  # stacja bez zmienności
+    matrix = np.memmap(tmp_path / "values.npy", dtype=np.float32, mode="w+", shape=values.shape)
+    matrix[:] = values - np.nanmean(values, axis=1, keepdims=True)
+    output = np.memmap(tmp_path / "corr.npy", dtype=np.float32, mode="w+", shape=(n_stations, n_stations))
+
+    corr = blocked_correlation(matrix, output, block_size=4, min_periods=min_periods)
+
+    expected = np.full((n_stations, n_stations), np.nan)
+    for i in range(n_stations):
+        for j in range(n_stations):
+            common = ~np.isnan(values[i]) & ~np.isnan(values[j])
+            if common.sum() >= min_periods and values[i, common].std() > 0 and values[j, common].std() > 0:
+                expected[i, j] = np.corrcoef(values[i, common], values[j, common])[0, 1]
+    np.testing.assert_allclose(corr, expected, atol=1e-5)
+    assert np.isnan(corr[4]).all() and np.isnan(corr[7]).all()
+
+    indices, scores = top_k_neighbours(corr, k=3, block_size=4)
+    for row in range(n_stations):
+        candidates = [(expected[row, j], j) for j in range(n_stations) if j != row and not np.isnan(expected[row, j])]
+        best = sorted(candidates, reverse=True)[:3]
+        np.testing.assert_allclose(scores[row, : len(best)], [score for score, _ in best], atol=1e-5)
+        assert list(indices[row, : len(best)]) == [j for _, j in best]
+        assert (indices[row, len(best) :] == -1).all() and np.isnan(scores[row, len(best) :]).all()
+
+
+def test_fit_linear_batch_matches_sklearn_per_station():
+    from sklearn.linear_model import LinearRegression
+
+    from meteopy.forecasting.batch_regression import fit_linear_batch, to_ordinal
+
+    rng = np.random.default_rng(0)
+    frames = []
+    for group, (start, days) in enumerate([("1990-01-01", 900), ("2005-03-01", 300), ("2020-06-15", 50)]):
+        dates = pd.Series(pd.date_range(start, periods=days))
+        frames.append(pd.DataFrame({"group": group, "x": to_ordinal(dates), "y": rng.normal(0.01 * group, 1, days)}))
+    frames[0]["y"] += 0.003 * np.arange(900)
+    frames.append(pd.DataFrame({"group": 3, "x": 738000, "y": rng.normal(4, 1, 20)}))  # stały x
+    frames.append(pd.DataFrame({"group": 4, "x": [737000], "y": [2.5]}))  # jedna obserwacja
+    data = pd.concat(frames, ignore_index=True)
+    data.loc[rng.random(len(data)) < 0.1, "y"] = np.nan
+    x, y, groups = data["x"].to_numpy(), data["y"].to_numpy(), data["group"].to_numpy()
+
+    n, slope, intercept = fit_linear_batch(x, y, groups, n_groups=6, x0=float(np.mean(x)))
+
+    assert n[5] == 0 and np.isnan(slope[5]) and np.isnan(intercept[5])
+    for group, station in data.dropna().groupby("group"):
+        model = LinearRegression().fit(station[["x"]].to_numpy(dtype=np.float64), station["y"].to_numpy())
+        assert n[group] == len(station)
+        assert slope[group] == pytest.approx(model.coef_[0], abs=1e-9)
+        assert intercept[group] == pytest.approx(model.intercept_, rel=1e-6, abs=1e-6)
+        future = np.array([[station["x"].max() + 30.0], [station["x"].max() + 365.0]])
+        np.testing.assert_allclose(intercept[group] + slope[group] * future[:, 0], model.predict(future), atol=1e-6)
+    assert slope[3] == 0 and slope[4] == 0
+
+
+def test_model_cache_misses_after_the_station_file_changed(data_dirs):
+    import os
+
+    from meteopy.forecasting.model_cache import ModelCache
+    from meteopy.preprocessing.processing_state import ProcessingState
+
+    station = "249180010"
+    csv_file = Dirs.SEPARATED_DIR / "klimat" / f"{station}.csv"
+    cache = ModelCache()
+    model = {(station, "v"): (730, 0.5, 1.0)}
+
+    def rewrite_in_place(values: np.ndarray) -> None:
+        # ten sam rozmiar i czas modyfikacji - odcisk oparty na stat() by się nie zmienił
+        stat = csv_file.stat()
+        df = pd.read_csv(csv_file, encoding=Dirs.ENCODING)
+        df["v"] = values
+        df.to_csv(csv_file, index=False, encoding=Dirs.ENCODING)
+        os.utime(csv_file, ns=(stat.st_atime_ns, stat.st_mtime_ns))
+        assert csv_file.stat().st_size == stat.st_size
+
+    # plik bez stanu preprocessingu: skrót zawartości pliku
+    original = _write_processed(pd.date_range("2001-01-01", "2002-12-31"), station)
+    fingerprint = ModelCache.fingerprint("klimat", station)
+    cache.put_many("klimat", "2001-01-01", "2002-12-31", {station: fingerprint}, model)
+    assert cache.get_many("klimat", "2001-01-01", "2002-12-31", {station: fingerprint}, ["v"]) == model
+    rewrite_in_place(original["v"].to_numpy()[::-1])
+    changed = ModelCache.fingerprint("klimat", station)
+    assert changed != fingerprint
+    assert cache.get_many("klimat", "2001-01-01", "2002-12-31", {station: changed}, ["v"]) == {}
+
+    # plik zapisany przez preprocessing: skrót z ProcessingState
+    state = ProcessingState("klimat")
+    state.set(station, ProcessingState.next_entry(None, csv_file, "2002-12-31", len(original), csv_file.read_bytes()))
+    fingerprint = ModelCache.fingerprint("klimat", station, state)
+    assert fingerprint == state.get(station)["sha256"]
+    cache.put_many("klimat", "2001-01-01", "2002-12-31", {station: fingerprint}, model)
+    rewrite_in_place(original["v"].to_numpy())
+    state.set(station, ProcessingState.next_entry(None, csv_file, "2002-12-31", len(original), csv_file.read_bytes()))
+    changed = ModelCache.fingerprint("klimat", station, state)
+    assert changed != fingerprint
+    assert cache.get_many("klimat", "2001-01-01", "2002-12-31", {station: changed}, ["v"]) == {}
+
+
+@pytest.mark.parametrize("window", [None, 120])
+def test_rolling_origin_errors_matches_naive_refit_loop(window):
+    from sklearn.linear_model import LinearRegression
+
+    from meteopy.forecasting.backtesting import rolling_origin_errors
+    from meteopy.forecasting.batch_regression import to_ordinal
+
+    rng = np.random.default_rng(0)
+    dates = pd.Series(pd.date_range("2000-01-01", "2003-06-30"))
+    dates = dates[(dates < "2001-02-01") | (dates > "2001-05-15")]  # przerwa w danych
+    x = to_ordinal(dates)
+    y = 10 + 8 * np.sin(2 * np.pi * np.arange(len(x)) / 365) + rng.normal(0, 2, len(x))
+    y[rng.random(len(y)) < 0.1] = np.nan
+    options = {"horizon": 30, "step": 45, "initial": 200, "window": window, "min_train": 60}
+
+    origins, points, mae, rmse = rolling_origin_errors(x, y, **options)
+
+    valid = ~np.isnan(y)
+    days, values = (x[valid] - x[valid][0]).astype(np.float64), y[valid]
+    errors = []
+    for origin in range(options["initial"], int(days[-1]) + 1, options["step"]):
+        train = (days < origin) & (days >= (origin - window if window is not None else -np.inf))
+        test = (days >= origin) & (days < origin + options["horizon"])
+        if train.sum() < options["min_train"] or not test.any():
+            continue
+        model = LinearRegression().fit(days[train, None], values[train])
+        errors.append(values[test] - model.predict(days[test, None]))
+    assert origins == len(errors) > 10
+    errors = np.concatenate(errors)
+    assert points == errors.size
+    assert mae == pytest.approx(np.abs(errors).mean(), rel=1e-9)
+    assert rmse == pytest.approx(np.sqrt((errors**2).mean()), rel=1e-9)
+
+
+def test_downsampling_keeps_endpoints_extremes_and_point_budget():
+    from meteopy.eda.downsampling import downsample, lttb, minmax
+
+    rng = np.random.default_rng(0)
+    x = pd.date_range("1990-01-01", periods=20_000).to_numpy()
+    y = np.cumsum(rng.normal(size=x.size))
+    y[[1234, 15000]] = [500.0, -500.0]  # pojedyncze skoki muszą zostać na wykresie
+
+    selected = lttb(x, y, 400)
+    assert selected.size == 400 and np.all(np.diff(selected) > 0)
+    assert selected[0] == 0 and selected[-1] == x.size - 1
+    assert {1234, 15000} <= set(selected)
+
+    selected = minmax(x, y, 300)
+    assert selected.size <= 2 * 300 + 2 and np.all(np.diff(selected) > 0)
+    assert selected[0] == 0 and selected[-1] == x.size - 1
+    days = (x - x[0]).astype("timedelta64[D]").astype(np.float64)
+    buckets = np.minimum((days / days[-1] * 300).astype(np.int64), 299)
+    for bucket in range(300):
+        members = np.flatnonzero(buckets == bucket)
+        kept = np.intersect1d(selected, members)
+        assert y[kept].min() == y[members].min() and y[kept].max() == y[members].max()
+
+    # krótkie szeregi (nie więcej punktów niż limit) przechodzą bez zmian
+    short_x, short_y = x[:50], y[:50]
+    np.testing.assert_array_equal(lttb(short_x, short_y, 50), np.arange(50))
+    np.testing.assert_array_equal(lttb(short_x, short_y, 80), np.arange(50))
+    np.testing.assert_array_equal(minmax(short_x, short_y, 25), np.arange(50))
+    short_y = short_y.copy()
+    short_y[[3, 7]] = np.nan
+    np.testing.assert_array_equal(downsample(short_x, short_y, 100), np.delete(np.arange(50), [3, 7]))
+
+
+def test_forecast_plot_name_escapes_slash_in_parameter(data_dirs):
+    import json
+
+    from meteopy.forecasting.imgw_simple_forecaster import IMGWSimpleForecaster
+
+    parameter = "Srednia_dobowa_predkosc_wiatru_[m/s]"
+    dates = pd.date_range("2001-01-01", "2001-12-31")
+    df = pd.DataFrame({"Kod_stacji": 249180010, "Nazwa_stacji": "TEST", "Data": dates.strftime("%Y-%m-%d")})
+    df[parameter] = np.arange(len(dates)) % 7 * 1.0
+    csv_file = Dirs.SEPARATED_DIR / "synop" / "249180010.csv"
+    csv_file.parent.mkdir(parents=True)
+    df.to_csv(csv_file, index=False, encoding=Dirs.ENCODING)
+
+    IMGWSimpleForecaster().plot_forecasts(
+        "synop", "2001-01-01", "2001-12-31", "2002-01-31", ["249180010"], [parameter], workers=1
+    )
+
+    output_dir = Dirs.FORECAST_DIR / "synop"
+    assert (output_dir / "249180010_Srednia_dobowa_predkosc_wiatru_[m_s]_forecast.png").is_file()
+    with open(output_dir / Dirs.RENDER_MANIFEST_NAME, encoding="utf-8") as file:
+        assert [entry["status"] for entry in json.load(file)] == ["ok"]
+
+
+def test_time_series_charts_are_rendered_through_the_farm(data_dirs, monkeypatch):
+    import json
+
+    from meteopy.eda.imgw_eda_visualizer import IMGWDataVisualizer
+
+    monkeypatch.setattr(Dirs, "PLOTS_DIR", data_dirs / "plots")
+    parameter = Dirs.PARAMETER_MAP["klimat"][1]
+    dates = pd.date_range("2001-01-01", "2001-12-31")
+    df = pd.DataFrame({"Kod_stacji": 249180010, "Nazwa_stacji": "TEST", "Data": dates.strftime("%Y-%m-%d")})
+    df[parameter] = np.arange(len(dates)) % 11 * 1.0
+    csv_file = Dirs.SEPARATED_DIR / "klimat" / "249180010.csv"
+    csv_file.parent.mkdir(parents=True)
+    df.to_csv(csv_file, index=False, encoding=Dirs.ENCODING)
+
+    visualizer = IMGWDataVisualizer()
+    visualizer.plot_time_series("klimat", [parameter], "2001-01-01", "2001-12-31", ["249180010"], workers=1)
+    output_dir = Dirs.PLOTS_DIR / "klimat"
+    with open(output_dir / Dirs.RENDER_MANIFEST_NAME, encoding="utf-8") as file:
+        entries = json.load(file)
+    assert [(entry["kind"], entry["series"], entry["status"]) for entry in entries] == [("line", 1, "ok")]
+    assert entries[0]["output_file"] == str(output_dir / f"klimat_multi_{parameter.replace('/', '_')}.png")
+
+    visualizer.plot_time_series(
+        "klimat", [parameter], "2001-01-01", "2001-12-31", ["249180010"], downsample="lttb", workers=1
+    )
+    with open(output_dir / Dirs.RENDER_MANIFEST_NAME, encoding="utf-8") as file:
+        assert [entry["status"] for entry in json.load(file)] == ["ok"]
+
+
+@pytest.mark.parametrize(
+    "values",
+    [
+        np.random.default_rng(0).standard_t(2, 5_000),  # ciężkie ogony - wiele wartości odstających
+        np.random.default_rng(1).exponential(2.0, 301),
+        np.array([0.0, 0.0, 0.0, 10.0]),  # brak wartości między q3 a końcem wąsa - wąs kończy się na q3
+        np.array([-10.0, 0.0, 0.0, 0.0]),
+        np.array([3.5]),
+    ],
+)
+def test_summarize_values_matches_matplotlib_boxplot_stats(values):
+    from matplotlib.cbook import boxplot_stats
+
+    from meteopy.eda.distributions import summarize_values
+
+    values = values.copy()
+    if values.size > 100:
+        values[::97] = np.nan
+    max_fliers = 200
+    (keys, counts), stats = summarize_values(values, "S", max_fliers=max_fliers)
+    (expected,) = boxplot_stats(values[~np.isnan(values)], whis=1.5)
+
+    for key in ("mean", "med", "q1", "q3", "iqr", "whislo", "whishi"):
+        assert stats[key] == pytest.approx(expected[key], rel=1e-12, abs=1e-12), key
+    fliers = np.sort(expected["fliers"])
+    assert stats["fliers"].size == min(fliers.size, max_fliers)
+    assert np.isin(stats["fliers"], fliers).all()
+    if fliers.size:
+        assert stats["fliers"].min() == fliers[0] and stats["fliers"].max() == fliers[-1]
+    assert counts.sum() == np.count_nonzero(~np.isnan(values))
+
+
+def test_unknown_log_levels_fall_back_with_a_warning(tmp_path):
+    import logging
+
+    from meteopy.utils import log_module
+
+    log_file = tmp_path / "app.log"
+    script = (
+        "from meteopy.utils import log_module as m; "
+        "print(m._config['level'], m._config['file_level']); "
+        "m.get_logger('test').info('wpis %s', [1]); m._stop_listener()"
+    )
+    env = {
+        **os.environ,
+        "METEOPY_LOG_LEVEL": "verbose",
+        "METEOPY_LOG_FILE_LEVEL": "warning",
+        "METEOPY_LOG_FILE": str(log_file),
+    }
+    result = subprocess.run([sys.executable, "-c", script], capture_output=True, text=True, env=env, check=True)
+    assert result.stdout.split("\n")[0] == f"{logging.INFO} {logging.WARNING}"
+    assert "Nieznany poziom logów 'verbose' (METEOPY_LOG_LEVEL)" in result.stderr
+    assert " - test - INFO - wpis [1]" in result.stderr and not log_file.exists()
+
+    previous = log_module._config["level"], log_module._config["file_level"]
+    try:
+        with pytest.warns(RuntimeWarning, match="Nieznany poziom logów 'loud'"):
+            log_module.configure_logging(level="loud", file_level="Error")
+        assert (log_module._config["level"], log_module._config["file_level"]) == (logging.INFO, logging.ERROR)
+    finally:
+        log_module.configure_logging(*previous)
+
+
+def test_log_file_is_truncated_once_per_run(tmp_path):
+    log_file = tmp_path / "app.log"
+    script = (
+        "import sys; from meteopy.utils import log_module as m; log = m.get_logger('test'); "
+        "log.warning('uruchomienie %s', sys.argv[1]); m.configure_logging(level='ERROR'); "
+        "log.warning('po zmianie poziomu'); m._stop_listener()"
+    )
+    env = {**os.environ, "METEOPY_LOG_FILE": str(log_file)}
+    for run in ("1", "2"):
+        subprocess.run([sys.executable, "-c", script, run], capture_output=True, text=True, env=env, check=True)
+
+    lines = log_file.read_text(encoding="utf-8").splitlines()
+    assert [line.split(" - ", 3)[3] for line in lines] == ["uruchomienie 2", "po zmianie poziomu"]
+
+
+def test_queue_handler_leaves_formatting_to_the_listener():
+    import logging
+
+    from meteopy.utils.log_module import _handler
+
+    args = {"rows": [1, 2]}
+    record = logging.LogRecord("test", logging.INFO, __file__, 1, "wiersze %(rows)s", (args,), None)
+    prepared = _handler.prepare(record)
+    args["rows"].append(3)  # późniejsza zmiana argumentów nie zmienia treści wpisu
+
+    assert prepared is not record and record.msg == "wiersze %(rows)s"
+    assert prepared.getMessage() == "wiersze [1, 2]" and prepared.args is None
+    assert not hasattr(prepared, "asctime") and prepared.exc_text is None
@@ -1,5 +1,13 @@
 from __future__ import annotations
 
-from .log_module import get_logger
+from .lazy_imports import attach
 
-__all__ = ["get_logger"]
+__getattr__, __dir__, __all__ = attach(
+    __name__,
+    {
+        "ProgressLog": ".log_module",
+        "configure_logging": ".log_module",
+        "get_logger": ".log_module",
+        "StationCatalog": ".station_catalog",
+    },
+)
@@ -0,0 +1,35 @@
+from __future__ import annotations
+
+import importlib
+from typing import Any, Callable
+
+
+def attach(package: str, exports: dict[str, str]) -> tuple[Callable[[str], Any], Callable[[], list[str]], list[str]]:
+    """Leniwe eksporty pakietu (PEP 562): moduł z nazwą importowany jest dopiero przy pierwszym użyciu nazwy.
+
+    Dzięki temu `import meteopy` ani import pojedynczego modułu nie ładuje pandas, matplotlib czy scikit-learn,
+    dopóki nie są potrzebne. Użycie w `__init__.py`:
+
+        __getattr__, __dir__, __all__ = attach(__name__, {"StationStore": ".station_store"})
+
+    Args:
+        package (str): Nazwa pakietu (`__name__`).
+        exports (dict[str, str]): Nazwa eksportowana -> moduł względny, który ją definiuje.
+
+    Returns:
+        tuple: Funkcje `__getattr__` i `__dir__` pakietu oraz posortowana lista `__all__`.
+
+    """
+    package_globals = importlib.import_module(package).__dict__
+
+    def __getattr__(name: str) -> Any:
+        if name not in exports:
+            raise AttributeError(f"module {package!r} has no attribute {name!r}")
+        value = getattr(importlib.import_module(exports[name], package), name)
+        package_globals[name] = value  # kolejne odwołania nie przechodzą przez __getattr__
+        return value
+
+    def __dir__() -> list[str]:
+        return sorted({*package_globals, *exports})
+
+    return __getattr__, __dir__, sorted(exports)
@@ -1,38 +1,271 @@
 from __future__ import annotations
 
+import atexit
+import copy
 import logging
+import os
+import queue
+import threading
+import time
+import warnings
+from logging.handlers import QueueHandler, QueueListener
 from pathlib import Path
+
 from meteopy.consts.dirs import Dirs
 
-def get_logger(name: str, level: int = logging.INFO, log_file: Path = Dirs.LOG_DIR / "app.log") -> logging.Logger:
+_FORMAT = "%(asctime)s - %(name)s - %(levelname)s - %(message)s"
+
+# Konfiguracja wspólna dla wszystkich loggerów pakietu; wartości domyślne można nadpisać zmiennymi środowiskowymi
+# METEOPY_LOG_LEVEL (konsola), METEOPY_LOG_FILE_LEVEL (plik) i METEOPY_LOG_FILE (pusty - bez pliku)
+# albo w trakcie działania przez `configure_logging`.
+def _level(value: int | str, default: int, source: str) -> int:
+    """Poziom logów jako liczba; nieznana nazwa poziomu daje `default` z ostrzeżeniem (zamiast błędu w setLevel)."""
+    if isinstance(value, int):
+        return value
+    name = value.strip().upper()
+    if name.isdigit():
+        return int(name)
+    levels = logging.getLevelNamesMapping()
+    if name not in levels:
+        warnings.warn(
+            f"Nieznany poziom logów {value!r} ({source}), używany jest {logging.getLevelName(default)}; "
+            f"dostępne: {', '.join(sorted(levels, key=levels.get))}",
+            RuntimeWarning,
+            stacklevel=3,
+        )
+        return default
+    return levels[name]
+
+
+_log_file = os.environ.get("METEOPY_LOG_FILE")
+_config = {
+    "level": _level(os.environ.get("METEOPY_LOG_LEVEL", "INFO"), logging.INFO, "METEOPY_LOG_LEVEL"),
+    "file_level": _level(os.environ.get("METEOPY_LOG_FILE_LEVEL", "DEBUG"), logging.DEBUG, "METEOPY_LOG_FILE_LEVEL"),
+    "log_file": Dirs.LOG_FILE if _log_file is None else Path(_log_file) if _log_file else None,
+}
+
+_lock = threading.RLock()
+_listener: dict = {"pid": None, "queue": None, "listener": None}
+_loggers: dict[str, int | None] = {}
+# pliki logów wyczyszczone w tym uruchomieniu; procesy robocze (fork) dziedziczą zbiór i tylko dopisują
+_truncated: set[Path] = set()
+
+
+class _ProcessQueueHandler(QueueHandler):
+    """QueueHandler kierujący wpisy do kolejki bieżącego procesu.
+
+    Procesy robocze (ProcessPoolExecutor) dziedziczą loggery po procesie głównym, ale nie jego wątek zapisu,
+    dlatego każdy proces przy pierwszym wpisie uruchamia własny QueueListener.
+    """
+
+    def __init__(self):
+        super().__init__(None)
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        # QueueHandler.prepare formatuje cały wpis w wątku wywołującym, bo kolejka może prowadzić do innego
+        # procesu; tu kolejka jest w tym samym procesie, więc w wątku wywołującym składana jest tylko treść
+        # (argumenty mogą się później zmienić), a czas, ślad wyjątku i format wpisu tworzy wątek zapisu
+        record = copy.copy(record)
+        record.msg = record.getMessage()
+        record.args = None
+        return record
+
+    def enqueue(self, record: logging.LogRecord) -> None:
+        _current_queue().put_nowait(record)
+
+
+_handler = _ProcessQueueHandler()
+
+
+def _build_handlers() -> list[logging.Handler]:
+    formatter = logging.Formatter(_FORMAT)
+    handlers = []
+    if _config["log_file"] is not None:
+        log_file = _config["log_file"]
+        log_file.parent.mkdir(parents=True, exist_ok=True)
+        # każde uruchomienie zaczyna plik od nowa (plik nie rośnie z kolejnymi uruchomieniami); czyszczenie odbywa
+        # się raz, przy pierwszym użyciu pliku, a dalej (także w procesach roboczych) wpisy są dopisywane, więc
+        # procesy robocze nie kasują logów procesu głównego; delay=True otwiera plik dopiero przy pierwszym wpisie
+        if log_file not in _truncated:
+            if log_file.exists():
+                log_file.open("w", encoding="utf-8").close()
+            _truncated.add(log_file)
+        file_handler = logging.FileHandler(log_file, mode="a", encoding="utf-8", delay=True)
+        file_handler.setLevel(_config["file_level"])
+        handlers.append(file_handler)
+    stream_handler = logging.StreamHandler()
+    stream_handler.setLevel(_config["level"])
+    handlers.append(stream_handler)
+    for handler in handlers:
+        handler.setFormatter(formatter)
+    return handlers
+
+
+def _current_queue() -> queue.SimpleQueue:
+    """Kolejka bieżącego procesu; przy pierwszym użyciu w procesie uruchamia wątek zapisujący (QueueListener)."""
+    with _lock:
+        if _listener["pid"] != os.getpid():
+            log_queue = queue.SimpleQueue()
+            listener = QueueListener(log_queue, *_build_handlers(), respect_handler_level=True)
+            listener.start()
+            _listener.update(pid=os.getpid(), queue=log_queue, listener=listener)
+            atexit.register(_stop_listener)
+            # procesy potomne multiprocessing (fork) kończą się przez os._exit, bez wywołania atexit
+            from multiprocessing.util import Finalize
+
+            Finalize(None, _stop_listener, exitpriority=0)
+        return _listener["queue"]
+
+
+def _stop_listener() -> None:
+    """Zapisuje zaległe wpisy i zatrzymuje wątek zapisujący bieżącego procesu."""
+    with _lock:
+        if _listener["pid"] != os.getpid() or _listener["listener"] is None:
+            return
+        listener = _listener["listener"]
+        _listener.update(pid=None, queue=None, listener=None)
+    listener.stop()
+    for handler in listener.handlers:
+        handler.close()
+
+
+def _effective_level(level: int | None) -> int:
+    # wpisy poniżej progu wszystkich miejsc docelowych odrzucane są przed sformatowaniem i kolejką
+    if level is not None:
+        return level
+    levels = [_config["level"]] + ([_config["file_level"]] if _config["log_file"] is not None else [])
+    return min(levels)
+
+
+def configure_logging(
+    level: int | str | None = None,
+    file_level: int | str | None = None,
+    log_file: Path | str | None = None,
+    file_enabled: bool | None = None,
+) -> None:
+    """Zmienia w trakcie działania poziomy i miejsce zapisu logów wszystkich loggerów pakietu.
+
+    Args:
+        level (int | str, optional): Poziom wpisów wypisywanych na konsolę (np. 'DEBUG', logging.WARNING);
+            nieznana nazwa poziomu daje ostrzeżenie i poziom INFO.
+        file_level (int | str, optional): Poziom wpisów zapisywanych do pliku (nieznana nazwa - DEBUG).
+        log_file (Path | str, optional): Plik logów (domyślnie Dirs.LOG_FILE).
+        file_enabled (bool, optional): False - logi tylko na konsoli, True - ponowne włączenie zapisu do pliku.
+
+    """
+    with _lock:
+        if level is not None:
+            _config["level"] = _level(level, logging.INFO, "level")
+        if file_level is not None:
+            _config["file_level"] = _level(file_level, logging.DEBUG, "file_level")
+        if log_file is not None:
+            _config["log_file"] = Path(log_file)
+        elif file_enabled is True and _config["log_file"] is None:
+            _config["log_file"] = Dirs.LOG_FILE
+        if file_enabled is False:
+            _config["log_file"] = None
+
+        if _listener["pid"] == os.getpid():
+            listener = _listener["listener"]
+            listener.stop()
+            for handler in listener.handlers:
+                handler.close()
+            listener.handlers = tuple(_build_handlers())
+            listener.start()
+        for name, own_level in _loggers.items():
+            logging.getLogger(name).setLevel(_effective_level(own_level))
+
+
+def get_logger(name: str, level: int | None = None, log_file: Path | None = None) -> logging.Logger:
     """Konfiguruje logger dla aplikacji.
 
+    Wpisy trafiają do kolejki z gotową treścią, a formatowaniem i zapisem (plik i konsola) zajmuje się wątek w tle
+    (QueueListener), więc logowanie nie blokuje obliczeń na operacjach dyskowych. Miejsce zapisu i poziomy
+    są wspólne dla całego pakietu (patrz `configure_logging`).
+
     Args:
         name (str): Nazwa loggera (zazwyczaj modułu).
-        log_file (Path): Ścieżka do pliku logów.
-        level (int): Poziom logowania (np. logging.INFO).
+        level (int, optional): Własny próg loggera (domyślnie najniższy z poziomów konsoli i pliku).
+        log_file (Path, optional): Zmienia plik logów całego pakietu (patrz `configure_logging`).
 
     Returns:
         logging.Logger: Skonfigurowany logger.
 
     """
-    log_file.parent.mkdir(parents=True, exist_ok=True)
+    if log_file is not None:
+        configure_logging(log_file=log_file)
 
     logger = logging.getLogger(name)
-    logger.setLevel(logging.DEBUG)
+    with _lock:
+        _loggers[name] = level
+        logger.setLevel(_effective_level(level))
+        if _handler not in logger.handlers:
+            logger.addHandler(_handler)
+    return logger
 
-    formatter = logging.Formatter("%(asctime)s - %(name)s - %(levelname)s - %(message)s")
 
-    file_handler = logging.FileHandler(log_file, mode="w")
-    file_handler.setFormatter(formatter)
-    file_handler.setLevel(logging.DEBUG)
+class ProgressLog:
+    """Zbiorczy wpis postępu w miejsce jednego wpisu na element.
 
-    stream_handler = logging.StreamHandler()
-    stream_handler.setFormatter(formatter)
-    stream_handler.setLevel(level)
+    Np. "Podział plików: 12 plików, 1 250 000 wierszy (34 000 wierszy/s), 36.8 s". Wpis powstaje najwyżej
+    raz na `interval` sekund oraz przy zamknięciu (podsumowanie), dzięki czemu pętle przetwarzające tysiące
+    plików lub stacji nie formatują i nie zapisują logu dla każdego z nich.
 
-    if not logger.handlers:
-        logger.addHandler(file_handler)
-        logger.addHandler(stream_handler)
+    Args:
+        logger (logging.Logger): Logger, do którego trafiają wpisy.
+        label (str): Opis czynności, np. "Podział plików".
+        unit (str): Nazwa liczonych elementów, np. "plików" lub "stacji".
+        interval (float): Minimalny odstęp między wpisami w sekundach.
+        level (int): Poziom wpisów.
 
-    return logger
+    """
+
+    def __init__(
+        self,
+        logger: logging.Logger,
+        label: str,
+        unit: str = "elementów",
+        interval: float = Dirs.LOG_PROGRESS_INTERVAL,
+        level: int = logging.INFO,
+    ):
+        self.logger = logger
+        self.label = label
+        self.unit = unit
+        self.interval = interval
+        self.level = level
+        self.items = 0
+        self.rows = 0
+        self._start = self._last = time.monotonic()
+
+    def update(self, items: int = 1, rows: int = 0) -> None:
+        self.items += items
+        self.rows += rows
+        now = time.monotonic()
+        if now - self._last >= self.interval:
+            self._last = now
+            self._emit(now)
+
+    def _emit(self, now: float, final: bool = False) -> None:
+        if not self.logger.isEnabledFor(self.level):
+            return
+        elapsed = max(now - self._start, 1e-9)
+        message = f"{self.label}{' zakończony' if final else ''}: {_number(self.items)} {self.unit}"
+        if self.rows:
+            message += f", {_number(self.rows)} wierszy ({_number(self.rows / elapsed)} wierszy/s)"
+        else:
+            message += f" ({self.items / elapsed:.1f} {self.unit}/s)"
+        self.logger.log(self.level, f"{message}, {elapsed:.1f} s")
+
+    def close(self) -> None:
+        self._emit(time.monotonic(), final=True)
+
+    def __enter__(self) -> ProgressLog:
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+
+def _number(value: float) -> str:
+    """Liczba zaokrąglona do całości z odstępami co trzy cyfry (1 250 000)."""
+    return f"{value:,.0f}".replace(",", " ")
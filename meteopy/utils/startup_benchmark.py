@@ -0,0 +1,47 @@
+from __future__ import annotations
+
+import re
+import subprocess
+import sys
+
+HEAVY_MODULES = ("pandas", "numpy", "matplotlib", "seaborn", "sklearn", "requests", "pyarrow", "scipy")
+STARTUP_BUDGET_SECONDS = 0.5
+
+_IMPORTTIME = re.compile(r"import time:\s+(\d+)\s+\|\s+(\d+)\s+\|(\s*)(\S+)")
+
+
+def import_times(module: str = "meteopy.workflow.entrypoint") -> dict[str, float]:
+    """Skumulowany czas importu (w sekundach) każdego modułu ładowanego przez `import module`.
+
+    Import wykonywany jest w osobnym interpreterze z `python -X importtime`, więc wynik nie zależy
+    od modułów załadowanych w bieżącym procesie.
+    """
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    times = {}
+    for line in result.stderr.splitlines():
+        match = _IMPORTTIME.match(line)
+        if match:
+            times[match.group(4)] = int(match.group(2)) / 1e6
+    return times
+
+
+def heavy_imports(times: dict[str, float]) -> list[str]:
+    """Ciężkie zależności (HEAVY_MODULES) obecne wśród zaimportowanych modułów."""
+    return sorted({name.split(".")[0] for name in times} & set(HEAVY_MODULES))
+
+
+def main(module: str = "meteopy.workflow.entrypoint", top: int = 15) -> None:
+    times = import_times(module)
+    print(f"Import {module}: {times.get(module, float('nan')):.3f} s (budżet {STARTUP_BUDGET_SECONDS} s)")
+    print(f"Ciężkie zależności: {', '.join(heavy_imports(times)) or 'brak'}")
+    for name, seconds in sorted(times.items(), key=lambda item: item[1], reverse=True)[:top]:
+        print(f"{seconds:8.3f} s  {name}")
+
+
+if __name__ == "__main__":
+    main(*sys.argv[1:2])
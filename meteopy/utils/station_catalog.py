@@ -0,0 +1,232 @@
+from __future__ import annotations
+
+import sqlite3
+from contextlib import closing
+from pathlib import Path
+
+import pandas as pd
+
+from meteopy.consts.dirs import Dirs
+from meteopy.utils.log_module import get_logger
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS stations (
+    data_type TEXT NOT NULL,
+    station TEXT NOT NULL,
+    name TEXT,
+    first_date TEXT,
+    last_date TEXT,
+    row_count INTEGER NOT NULL,
+    path TEXT NOT NULL,
+    PRIMARY KEY (data_type, station)
+);
+CREATE TABLE IF NOT EXISTS parameter_counts (
+    data_type TEXT NOT NULL,
+    station TEXT NOT NULL,
+    parameter TEXT NOT NULL,
+    non_null INTEGER NOT NULL,
+    PRIMARY KEY (data_type, station, parameter)
+);
+"""
+
+
+class StationCatalog:
+    """Trwały katalog przetworzonych stacji (SQLite w Dirs.CATALOG_PATH).
+
+    Dla każdej stacji przechowuje nazwę, typ danych, pierwszą i ostatnią datę, liczbę wierszy, liczbę
+    niepustych wartości każdego parametru i ścieżkę pliku. Katalog aktualizowany jest przy preprocessingu,
+    a statystyki, wykresy i prognozy używają go do odrzucenia stacji bez danych przed otwarciem plików.
+    """
+
+    def __init__(self, path: Path | None = None):
+        self.path = path if path is not None else Dirs.CATALOG_PATH
+        self.logger = get_logger("StationCatalog")
+
+    def _connect(self) -> sqlite3.Connection:
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        connection = sqlite3.connect(self.path)
+        connection.executescript(_SCHEMA)
+        return connection
+
+    @staticmethod
+    def summarize(
+        df: pd.DataFrame, data_type: str, path: Path, replace: bool = True, removed: pd.DataFrame | None = None
+    ) -> dict:
+        """Zwraca podsumowanie przetworzonych wierszy stacji do zapisania w katalogu.
+
+        Args:
+            df (pd.DataFrame): Przetworzone wiersze stacji (z kolumną 'Data').
+            data_type (str): Typ danych.
+            path (Path): Przetworzony plik stacji.
+            replace (bool): True - wiersze to cały plik; False - dopisane wiersze, łączone z dotychczasowym wpisem.
+            removed (pd.DataFrame, optional): Przy replace=False: wiersze usunięte z pliku (zastąpione przez `df`),
+                odejmowane od liczby wierszy i wartości dotychczasowego wpisu.
+
+        """
+        dates = pd.to_datetime(df["Data"])
+        parameters = [parameter for parameter in Dirs.PARAMETER_MAP[data_type] if parameter in df.columns]
+        counts = df[parameters].notna().sum()
+        rows = len(df)
+        if removed is not None:
+            counts = counts - removed[parameters].notna().sum()
+            rows -= len(removed)
+        return {
+            "name": str(df["Nazwa_stacji"].iloc[0]) if len(df) else None,
+            "first_date": dates.min().strftime("%Y-%m-%d") if len(df) else None,
+            "last_date": dates.max().strftime("%Y-%m-%d") if len(df) else None,
+            "rows": rows,
+            "path": str(path),
+            "counts": {parameter: int(n) for parameter, n in counts.items()},
+            "replace": replace,
+        }
+
+    @staticmethod
+    def merge(base: dict, delta: dict) -> dict:
+        """Łączy podsumowanie dopisanych wierszy (`delta`) z podsumowaniem istniejących (`base`)."""
+        merged = dict(delta, replace=base.get("replace", True))
+        merged["name"] = delta["name"] or base["name"]
+        merged["first_date"] = min(filter(None, [base["first_date"], delta["first_date"]]), default=None)
+        merged["last_date"] = max(filter(None, [base["last_date"], delta["last_date"]]), default=None)
+        merged["rows"] = base["rows"] + delta["rows"]
+        merged["counts"] = {
+            parameter: base["counts"].get(parameter, 0) + delta["counts"].get(parameter, 0)
+            for parameter in base["counts"].keys() | delta["counts"].keys()
+        }
+        return merged
+
+    def update(self, data_type: str, station: str, summary: dict) -> None:
+        """Zapisuje podsumowanie stacji (wynik `summarize`, ewentualnie łączony z dotychczasowym wpisem)."""
+        with closing(self._connect()) as connection, connection:
+            if not summary.get("replace", True):
+                row = connection.execute(
+                    "SELECT name, first_date, last_date, row_count FROM stations WHERE data_type = ? AND station = ?",
+                    (data_type, station),
+                ).fetchone()
+                if row is not None:
+                    counts = dict(
+                        connection.execute(
+                            "SELECT parameter, non_null FROM parameter_counts WHERE data_type = ? AND station = ?",
+                            (data_type, station),
+                        ).fetchall()
+                    )
+                    base = dict(zip(("name", "first_date", "last_date", "rows"), row), counts=counts)
+                    summary = self.merge(base, summary)
+
+            connection.execute(
+                "INSERT OR REPLACE INTO stations VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (
+                    data_type,
+                    station,
+                    summary["name"],
+                    summary["first_date"],
+                    summary["last_date"],
+                    summary["rows"],
+                    summary["path"],
+                ),
+            )
+            connection.execute(
+                "DELETE FROM parameter_counts WHERE data_type = ? AND station = ?", (data_type, station)
+            )
+            connection.executemany(
+                "INSERT INTO parameter_counts VALUES (?, ?, ?, ?)",
+                [(data_type, station, parameter, n) for parameter, n in summary["counts"].items()],
+            )
+
+    def remove(self, data_type: str, station: str) -> None:
+        with closing(self._connect()) as connection, connection:
+            connection.execute("DELETE FROM stations WHERE data_type = ? AND station = ?", (data_type, station))
+            connection.execute(
+                "DELETE FROM parameter_counts WHERE data_type = ? AND station = ?", (data_type, station)
+            )
+
+    def is_populated(self, data_type: str) -> bool:
+        """Czy katalog zawiera jakiekolwiek stacje danego typu."""
+        if not self.path.exists():
+            return False
+        with closing(self._connect()) as connection:
+            row = connection.execute("SELECT 1 FROM stations WHERE data_type = ? LIMIT 1", (data_type,)).fetchone()
+        return row is not None
+
+    def stations(
+        self,
+        data_type: str,
+        start_date: str | None = None,
+        end_date: str | None = None,
+        parameters: list[str] | None = None,
+    ) -> list[str]:
+        """Zwraca ID stacji, które mają dane w zakresie dat i niepuste wartości choć jednego z parametrów.
+
+        Args:
+            data_type (str): Typ danych.
+            start_date (str, optional): Początek zakresu 'YYYY-MM-DD'.
+            end_date (str, optional): Koniec zakresu 'YYYY-MM-DD'.
+            parameters (list[str], optional): Parametry, z których choć jeden musi mieć dane.
+
+        Returns:
+            list[str]: Posortowane ID stacji.
+
+        """
+        query = "SELECT station FROM stations s WHERE data_type = ?"
+        args: list = [data_type]
+        if start_date is not None:
+            query += " AND last_date >= ?"
+            args.append(pd.Timestamp(start_date).strftime("%Y-%m-%d"))
+        if end_date is not None:
+            query += " AND first_date <= ?"
+            args.append(pd.Timestamp(end_date).strftime("%Y-%m-%d"))
+        if parameters:
+            query += (
+                " AND EXISTS (SELECT 1 FROM parameter_counts p WHERE p.data_type = s.data_type"
+                f" AND p.station = s.station AND p.non_null > 0 AND p.parameter IN ({','.join('?' * len(parameters))}))"
+            )
+            args += list(parameters)
+        with closing(self._connect()) as connection:
+            return [row[0] for row in connection.execute(query + " ORDER BY station", args)]
+
+    def date_span(self, data_type: str, stations: list[str]) -> tuple[str, str] | None:
+        """Zwraca najwcześniejszą i najpóźniejszą datę danych podanych stacji (None, jeśli brak ich w katalogu)."""
+        if not stations:
+            return None
+        with closing(self._connect()) as connection:
+            row = connection.execute(
+                "SELECT MIN(first_date), MAX(last_date) FROM stations WHERE data_type = ?"
+                f" AND station IN ({','.join('?' * len(stations))})",
+                [data_type, *map(str, stations)],
+            ).fetchone()
+        return None if row is None or row[0] is None else (row[0], row[1])
+
+    def names(self, data_type: str) -> dict[str, str]:
+        """Zwraca nazwy stacji danego typu (ID -> nazwa)."""
+        if not self.path.exists():
+            return {}
+        with closing(self._connect()) as connection:
+            rows = connection.execute("SELECT station, name FROM stations WHERE data_type = ?", (data_type,))
+            return {station: name for station, name in rows}
+
+    def paths(self, data_type: str) -> list[Path]:
+        """Zwraca ścieżki plików wszystkich stacji danego typu."""
+        with closing(self._connect()) as connection:
+            rows = connection.execute(
+                "SELECT path FROM stations WHERE data_type = ? ORDER BY station", (data_type,)
+            ).fetchall()
+        return [Path(row[0]) for row in rows]
+
+    def prune(
+        self,
+        data_type: str,
+        stations: list[str],
+        start_date: str | None = None,
+        end_date: str | None = None,
+        parameters: list[str] | None = None,
+    ) -> list[str]:
+        """Odrzuca z listy stacje bez danych w zakresie dat lub bez wartości parametrów.
+
+        Jeśli katalog dla typu danych jest pusty (np. dane sprzed wprowadzenia katalogu), lista nie jest zmieniana.
+        """
+        if not self.is_populated(data_type):
+            return list(stations)
+        available = set(self.stations(data_type, start_date, end_date, parameters))
+        pruned = [station for station in stations if str(station) in available]
+        if len(pruned) < len(stations):
+            self.logger.info(f"Pominięto {len(stations) - len(pruned)} stacji bez danych w wybranym zakresie")
+        return pruned
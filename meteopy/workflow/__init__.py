@@ -1,9 +1,10 @@
 from __future__ import annotations
 
-from .download import download, fetch_data, preprocess_data
+from .download import download, fetch_data, preprocess_data, stream_data
 from .entrypoint import cli
 from .full_analysis import full_analysis
 from .basic_summary import basic_summary
 from .destruktor import drop_data
+from .store import build_store
 
-__all__ = ["cli", "download", "fetch_data", "full_analysis", "preprocess_data", "basic_summary","drop_data"]
+__all__ = ["cli", "download", "fetch_data", "full_analysis", "preprocess_data", "stream_data", "basic_summary","drop_data", "build_store"]
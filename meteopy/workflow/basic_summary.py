@@ -5,8 +5,6 @@ import random
 import click
 
 from meteopy.consts import Dirs
-from meteopy.eda.imgw_eda_visualizer import IMGWDataVisualizer
-from meteopy.statistics.imgw_stats import IMGWStats
 from meteopy.utils.log_module import get_logger
 
 logger = get_logger(__name__)
@@ -85,6 +83,10 @@ def basic_summary(data_type: int) -> None:
     random_stations = random.sample(station_paths, min(5, len(station_paths)))
     random_stations = [ station.name.replace(".csv","") for station in random_stations]
     logger.info("Wybrane parametry: %s", ", ".join(selected_parameters))
+    # importy lokalne - pandas i matplotlib ładowane są dopiero, gdy polecenie faktycznie działa
+    from meteopy.eda.imgw_eda_visualizer import IMGWDataVisualizer
+    from meteopy.statistics.imgw_stats import IMGWStats
+
     stats = IMGWStats()
     stats.calculate_basic_stat(data_type_str, selected_parameters, random_stations)
     visualizer = IMGWDataVisualizer()
@@ -8,7 +8,9 @@ from meteopy.consts.dirs import Dirs
 def drop_data() -> None:
     """Usuwa wszystkie pobrane dane.
 
-    Funkcja próbuje usunąć katalog data/separated/ oraz wszystkie pliki i podkatalogi w nim zawarte.
+    Funkcja próbuje usunąć katalog data/separated/ oraz wszystkie pliki i podkatalogi w nim zawarte,
+    a także magazyn Parquet (data/store/), nieprzetworzone wiersze (data/staging/), surową historię stacji
+    (data/raw/), stan przetworzenia (data/state/) i manifest pobranych archiwów.
     Jeśli operacja się powiedzie, wyświetla komunikat o sukcesie. W przeciwnym razie, wyświetla
     komunikat o błędzie z podaniem przyczyny niepowodzenia.
 
@@ -26,3 +28,23 @@ def drop_data() -> None:
         print(f'Successfully deleted {Dirs.SEPARATED_DIR}')
     except Exception as e:
         print(f'Failed to delete {Dirs.SEPARATED_DIR}. Reason: {e}')
+
+    for directory in (Dirs.STORE_DIR, Dirs.ROLLUP_DIR, Dirs.STAGING_DIR, Dirs.RAW_DIR, Dirs.STATE_DIR):
+        try:
+            shutil.rmtree(directory)
+            print(f'Successfully deleted {directory}')
+        except FileNotFoundError:
+            pass
+        except Exception as e:
+            print(f'Failed to delete {directory}. Reason: {e}')
+
+    for path in (Dirs.CATALOG_PATH, Dirs.MODEL_CACHE_PATH):
+        if path.exists():
+            path.unlink()
+            print(f'Successfully deleted {path}')
+
+    # bez manifestu kolejne pobranie ściągnie ponownie wszystkie archiwa zamiast je pominąć
+    manifest_path = Dirs.DATA_DIR / Dirs.MANIFEST_NAME
+    if manifest_path.exists():
+        manifest_path.unlink()
+        print(f'Successfully deleted {manifest_path}')
@@ -2,8 +2,7 @@ from __future__ import annotations
 
 import click
 
-from meteopy.data_fetchers.imgw_fetcher import KODataFetcher, SynopDataFetcher
-from meteopy.preprocessing.imgw_handler import IMGWDataHandler
+from meteopy.consts.dirs import Dirs
 from meteopy.utils.log_module import get_logger
 
 logger = get_logger(__name__)
@@ -21,31 +20,56 @@ def download():
         data_type = 1
 
     click.echo("Pobieranie danych...")
-    fetch_data(start_year, end_year, data_type)
+    stream_data(start_year, end_year, data_type)
     click.echo("Pobieranie zakończone.")
 
-    missing_data_strategy = click.prompt("Podaj strategię radzenia sobie z brakami danych:\n1 - zostawia brakujące dane bez zmian,\n2 - uzupełnia brakujące dane wartością z poprzedniego dnia,\n3 - uzupełnia brakujące dane średnią z 50 poprzednich dni", type=int)
-    if missing_data_strategy not in [1, 2, 3]:
-        raise click.BadParameter("Strategia radzenia sobie z brakami danych musi być jednym z: 1, 2, 3")
+    missing_data_strategy = click.prompt("Podaj strategię radzenia sobie z brakami danych:\n1 - zostawia brakujące dane bez zmian,\n2 - uzupełnia brakujące dane wartością z poprzedniego dnia,\n3 - uzupełnia brakujące dane średnią z 50 poprzednich dni,\n4 - interpoluje liniowo krótkie luki (do 7 dni),\n5 - uzupełnia brakujące dane średnią wieloletnią dla danego dnia roku", type=int)
+    if missing_data_strategy not in [1, 2, 3, 4, 5]:
+        raise click.BadParameter("Strategia radzenia sobie z brakami danych musi być jednym z: 1, 2, 3, 4, 5")
 
     click.echo("Przetwarzanie danych...")
     preprocess_data(missing_data_strategy)
     click.echo("Przetwarzanie zakończone.")
 
 
-def fetch_data(start_year, end_year, data_type):
-    """Funkcja do pobierania danych."""
-    if data_type == 1 or data_type == 2:
-        fetcher = KODataFetcher()
-    elif data_type == 3:
-        fetcher = SynopDataFetcher()
+# Fetchery i handler importowane są lokalnie - ładują requests i pandas, a CLI ma startować szybko.
+def _make_fetcher(data_type, workers):
+    from meteopy.data_fetchers.imgw_fetcher import KODataFetcher, SynopDataFetcher
+
+    if data_type == 3:
+        return SynopDataFetcher(workers)
+    return KODataFetcher(workers)
+
+
+def fetch_data(start_year, end_year, data_type, workers: int = Dirs.MAX_DOWNLOAD_WORKERS):
+    """Funkcja do pobierania danych (archiwa pobierane są równolegle przez `workers` wątków)."""
+    fetcher = _make_fetcher(data_type, workers)
     fetcher.fetch(start_year, end_year, data_type)
     print(f"Dane zostały pobrane dla lat {start_year}-{end_year} i typu {data_type}.")
 
 
-def preprocess_data(missing_data_strategy):
-    """Funkcja do przetwarzania danych."""
+def stream_data(start_year, end_year, data_type, workers: int = Dirs.MAX_DOWNLOAD_WORKERS):
+    """Pobiera dane i od razu dzieli je na stacje, bez zapisywania plików w data/downloaded.
+
+    Pobieranie kolejnych archiwów odbywa się w tle, w czasie gdy bieżące archiwum jest rozpakowywane i dzielone.
+    """
+    from meteopy.preprocessing.imgw_handler import IMGWDataHandler
+
+    fetcher = _make_fetcher(data_type, workers)
+    handler = IMGWDataHandler()
+    handler.divide_stream(
+        fetcher.stream_members(start_year, end_year, data_type),
+        Dirs.DATA_TYPES[data_type - 1],
+        manifest=fetcher.manifest,
+    )
+    print(f"Dane zostały pobrane i podzielone dla lat {start_year}-{end_year} i typu {data_type}.")
+
+
+def preprocess_data(missing_data_strategy, workers: int = Dirs.PREPROCESS_WORKERS):
+    """Funkcja do przetwarzania danych (pliki stacji przetwarzane są równolegle przez `workers` procesów)."""
+    from meteopy.preprocessing.imgw_handler import IMGWDataHandler
+
     handler = IMGWDataHandler()
     handler.divide_downloaded()
-    handler.preprocess(missing_data_strategy)
+    handler.preprocess(missing_data_strategy, workers)
     print(f"Dane zostały przetworzone z użyciem strategii: {missing_data_strategy}.")
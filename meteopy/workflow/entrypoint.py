@@ -1,18 +1,25 @@
 from __future__ import annotations
 import click
+from meteopy.utils.log_module import configure_logging
 from meteopy.workflow.download import download
 from meteopy.workflow.basic_summary import basic_summary
 from meteopy.workflow.full_analysis import full_analysis
 from meteopy.workflow.destruktor import drop_data
+from meteopy.workflow.store import build_store
 
 @click.group()
-def cli():
+@click.option("--log-level", default=None, help="Poziom logów na konsoli (DEBUG, INFO, WARNING, ERROR).")
+@click.option("--log-file", default=None, help="Plik logów (domyślnie logs/app.log); pusty - bez zapisu do pliku.")
+def cli(log_level: str | None, log_file: str | None):
     """METEOPY CLI - Narzędzie do analizy danych meteorologicznych."""
+    if log_level is not None or log_file is not None:
+        configure_logging(level=log_level, log_file=log_file or None, file_enabled=False if log_file == "" else None)
 
 cli.add_command(download, name="download")
 cli.add_command(full_analysis, name="full_analysis")
 cli.add_command(basic_summary, name="basic_summary")
 cli.add_command(drop_data, name="drop_data")
+cli.add_command(build_store, name="build_store")
 
 
 if __name__ == "__main__":
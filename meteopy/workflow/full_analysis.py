@@ -3,11 +3,8 @@ from __future__ import annotations
 import click
 
 from meteopy.consts import Dirs
-from meteopy.eda.imgw_eda_visualizer import IMGWDataVisualizer
-from meteopy.forecasting.imgw_simple_forecaster import IMGWSimpleForecaster
-from meteopy.statistics.imgw_stats import IMGWStats
 from meteopy.utils.log_module import get_logger
-from meteopy.workflow.download import fetch_data, preprocess_data
+from meteopy.workflow.download import preprocess_data, stream_data
 
 logger = get_logger(__name__)
 
@@ -15,8 +12,8 @@ logger = get_logger(__name__)
 @click.command()
 def full_analysis():
     """Pobiera dane i generuje wszystkie wykresy dla wszystkich stacji dla wszystkich
-    parametrów (UWAGA: może to potrwać dłuższą chwilę i zająć nawet 10GB RAMU (dla 1000 stacji), gdyż wsystkie stację są
-    nanoszone na jeden wykres dla IMGWDataVisualizer)."""
+    parametrów (UWAGA: może to potrwać dłuższą chwilę; szeregi czasowe wszystkich stacji są nanoszone na jeden wykres,
+    dlatego przed narysowaniem są redukowane do szerokości wykresu w pikselach)."""
     start_year = click.prompt("Podaj rok początkowy", type=int)
     end_year = click.prompt("Podaj rok końcowy", type=int)
     data_type = click.prompt("Podaj typ danych: 1 - klimat, 2 - opad, 3 - synop", type=int)
@@ -26,17 +23,22 @@ def full_analysis():
         data_type = 1
 
     click.echo("Pobieranie danych...")
-    fetch_data(start_year, end_year, data_type)
+    stream_data(start_year, end_year, data_type)
     click.echo("Pobieranie zakończone.")
 
-    missing_data_strategy = click.prompt("Podaj strategię radzenia sobie z brakami danych:\n1 - zostawia brakujące dane bez zmian,\n2 - uzupełnia brakujące dane wartością z poprzedniego dnia,\n3 - uzupełnia brakujące dane średnią z 50 poprzednich dni", type=int)
-    if missing_data_strategy not in [1, 2, 3]:
-        raise click.BadParameter("Strategia radzenia sobie z brakami danych musi być jednym z: 1, 2, 3")
+    missing_data_strategy = click.prompt("Podaj strategię radzenia sobie z brakami danych:\n1 - zostawia brakujące dane bez zmian,\n2 - uzupełnia brakujące dane wartością z poprzedniego dnia,\n3 - uzupełnia brakujące dane średnią z 50 poprzednich dni,\n4 - interpoluje liniowo krótkie luki (do 7 dni),\n5 - uzupełnia brakujące dane średnią wieloletnią dla danego dnia roku", type=int)
+    if missing_data_strategy not in [1, 2, 3, 4, 5]:
+        raise click.BadParameter("Strategia radzenia sobie z brakami danych musi być jednym z: 1, 2, 3, 4, 5")
 
     click.echo("Przetwarzanie danych...")
     preprocess_data(missing_data_strategy)
     click.echo("Przetwarzanie zakończone.")
 
+    # importy lokalne - pandas, matplotlib i scikit-learn ładowane są dopiero, gdy polecenie faktycznie działa
+    from meteopy.eda.imgw_eda_visualizer import IMGWDataVisualizer
+    from meteopy.forecasting.imgw_simple_forecaster import IMGWSimpleForecaster
+    from meteopy.statistics.imgw_stats import IMGWStats
+
     Start_date = f"{start_year}-01-01"
     End_date = f"{end_year}-12-31"
     visualizer = IMGWDataVisualizer()
@@ -44,13 +46,16 @@ def full_analysis():
     stats = IMGWStats()
     typ = Dirs.DATA_TYPES[data_type - 1]
     click.echo("Tworzenie wykresów szeregów czasowych...")
-    visualizer.plot_time_series(typ, [], Start_date, End_date, Dirs.get_stations_id(typ)[:Dirs.MAXSTATION])
+    stations = Dirs.get_stations_id(typ, Start_date, End_date)[:Dirs.MAXSTATION]
+    visualizer.plot_time_series(typ, [], Start_date, End_date, stations, downsample="lttb")
     click.echo("Tworzenie rozkładów parametrów...")
-    visualizer.distribution_polts(typ, [], Start_date, End_date, Dirs.get_stations_id(typ)[:Dirs.MAXSTATION])
+    visualizer.distribution_polts(typ, [], Start_date, End_date, stations)
     click.echo("Obliczanie statystyk...")
     stats.calculate_basic_stat(typ, Dirs.PARAMETER_MAP[typ])
-    click.echo("liczenie korelacji dla przykładowych parametrów...")
-    stats.calculate_correlation(typ, Dirs.PARAMETER_MAP[typ][0], Dirs.PARAMETER_MAP[typ][1])
+    click.echo("liczenie korelacji wszystkich par parametrów...")
+    stats.calculate_correlation_matrix(typ)
     click.echo("Tworzenie prognóz...")
-    for i in range(len(Dirs.PARAMETER_MAP[typ])):
-        forecaster.plot_forecast(typ, Start_date, End_date, f"{end_year + 1}-12-31", Dirs.get_stations_id(typ)[:Dirs.MAXSTATION], Dirs.PARAMETER_MAP[typ][i])
+    forecaster.plot_forecasts(typ, Start_date, End_date, f"{end_year + 1}-12-31", stations, Dirs.PARAMETER_MAP[typ])
+    if click.confirm("Czy wykonać backtest prognoz (ocena błędów na danych historycznych, długotrwałe)?", default=False):
+        click.echo("Backtest prognoz...")
+        forecaster.backtest(typ, Start_date, End_date, stations, workers=Dirs.PREPROCESS_WORKERS)
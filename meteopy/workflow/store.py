@@ -0,0 +1,23 @@
+from __future__ import annotations
+
+import click
+
+from meteopy.consts.dirs import Dirs
+
+
+@click.command()
+@click.argument("data_type", type=int, required=False)
+def build_store(data_type: int | None = None) -> None:
+    """Konwertuje przetworzone pliki CSV z data/separated do kolumnowego magazynu Parquet (data/store).
+
+    DATA_TYPE: 1 - klimat, 2 - opad, 3 - synop. Bez argumentu konwertowane są wszystkie typy danych.
+    Wymaga pakietu pyarrow (pip install meteopy[parquet]).
+    """
+    from meteopy.preprocessing.station_store import StationStore  # import lokalny - StationStore ładuje pandas
+
+    data_types = Dirs.DATA_TYPES if data_type is None else [Dirs.DATA_TYPES[data_type - 1]]
+    store = StationStore()
+    for data_type_str in data_types:
+        if (Dirs.SEPARATED_DIR / data_type_str).exists():
+            converted = store.convert_csv(data_type_str)
+            click.echo(f"{data_type_str}: skonwertowano {converted} stacji")